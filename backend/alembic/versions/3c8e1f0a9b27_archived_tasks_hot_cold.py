@@ -0,0 +1,60 @@
+"""Separate hot and cold archived tasks
+
+Revision ID: 3c8e1f0a9b27
+Revises: 0f9401067cde
+Create Date: 2026-10-19 09:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8e1f0a9b27'
+down_revision: Union[str, None] = '0f9401067cde'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Normalize legacy rows so they match the partial index predicate
+    op.execute("UPDATE tasks SET is_archived = false WHERE is_archived IS NULL")
+    op.execute("UPDATE tasks SET archived_at = COALESCE(updated_at, created_at) WHERE is_archived AND archived_at IS NULL")
+
+    op.create_index(
+        'ix_tasks_active_board_status_position', 'tasks', ['board_id', 'status', 'position'],
+        unique=False,
+        sqlite_where=sa.text('is_archived = 0'),
+        postgresql_where=sa.text('NOT is_archived'),
+    )
+
+    op.create_table(
+        'archived_tasks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('board_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('priority', sa.String(), nullable=True),
+        sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('moved_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('creator_id', sa.Integer(), nullable=True),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['board_id'], ['boards.id'], ),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_tasks_board_id_id', 'archived_tasks', ['board_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_archived_tasks_board_id_id', table_name='archived_tasks')
+    op.drop_table('archived_tasks')
+    op.drop_index('ix_tasks_active_board_status_position', table_name='tasks')
+    op.drop_column('tasks', 'archived_at')
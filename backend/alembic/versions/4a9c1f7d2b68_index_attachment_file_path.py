@@ -0,0 +1,26 @@
+"""Index attachment file paths for the upload garbage collector
+
+Revision ID: 4a9c1f7d2b68
+Revises: d2a7c5e9f013
+Create Date: 2026-10-19 21:03:41.729154
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9c1f7d2b68'
+down_revision: Union[str, None] = 'd2a7c5e9f013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_attachments_file_path'), 'attachments', ['file_path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_attachments_file_path'), table_name='attachments')
@@ -0,0 +1,26 @@
+"""Add team membership version
+
+Revision ID: 5b0e3f7a2d91
+Revises: 7d2a9e4b6c13
+Create Date: 2026-10-19 13:41:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0e3f7a2d91'
+down_revision: Union[str, None] = '7d2a9e4b6c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('teams', sa.Column('membership_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('teams', 'membership_version')
@@ -0,0 +1,33 @@
+"""Index task_members for per-user task listings
+
+Revision ID: 6c0e2b9a7f34
+Revises: 2f6a9c3d8e15
+Create Date: 2026-10-19 18:54:09.227641
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c0e2b9a7f34'
+down_revision: Union[str, None] = '2f6a9c3d8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The table has no key, so drop duplicate assignments before the unique index
+    op.execute("CREATE TABLE task_members_dedup AS SELECT DISTINCT task_id, user_id FROM task_members")
+    op.execute("DELETE FROM task_members")
+    op.execute("INSERT INTO task_members (task_id, user_id) SELECT task_id, user_id FROM task_members_dedup")
+    op.execute("DROP TABLE task_members_dedup")
+    op.create_index('ix_task_members_user_id_task_id', 'task_members', ['user_id', 'task_id'], unique=True)
+    op.create_index('ix_task_members_task_id', 'task_members', ['task_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_members_task_id', table_name='task_members')
+    op.drop_index('ix_task_members_user_id_task_id', table_name='task_members')
@@ -0,0 +1,64 @@
+"""Add change sequences and tombstones for delta sync
+
+Revision ID: 8b3d6f1e4a70
+Revises: e5a9d2c71b48
+Create Date: 2026-10-19 17:02:14.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3d6f1e4a70'
+down_revision: Union[str, None] = 'e5a9d2c71b48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('comments', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('labels', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('attachments', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_tasks_board_id_change_seq', 'tasks', ['board_id', 'change_seq'])
+    op.create_index(op.f('ix_comments_change_seq'), 'comments', ['change_seq'])
+    op.create_index(op.f('ix_labels_change_seq'), 'labels', ['change_seq'])
+    op.create_index(op.f('ix_attachments_change_seq'), 'attachments', ['change_seq'])
+
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('board_id', sa.Integer(), nullable=True),
+        sa.Column('change_seq', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_board_id_change_seq', 'tombstones', ['board_id', 'change_seq'])
+
+    sync_state = op.create_table(
+        'sync_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('last_seq', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('compacted_seq', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(sync_state, [{'id': 1, 'last_seq': 0, 'compacted_seq': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('sync_state')
+    op.drop_index('ix_tombstones_board_id_change_seq', table_name='tombstones')
+    op.drop_table('tombstones')
+    op.drop_index(op.f('ix_attachments_change_seq'), table_name='attachments')
+    op.drop_index(op.f('ix_labels_change_seq'), table_name='labels')
+    op.drop_index(op.f('ix_comments_change_seq'), table_name='comments')
+    op.drop_index('ix_tasks_board_id_change_seq', table_name='tasks')
+    op.drop_column('attachments', 'change_seq')
+    op.drop_column('labels', 'change_seq')
+    op.drop_column('comments', 'change_seq')
+    op.drop_column('tasks', 'change_seq')
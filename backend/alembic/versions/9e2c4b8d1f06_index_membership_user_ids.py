@@ -0,0 +1,28 @@
+"""Index team and board memberships by user
+
+Revision ID: 9e2c4b8d1f06
+Revises: 5b0e3f7a2d91
+Create Date: 2026-10-19 14:22:06.905113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e2c4b8d1f06'
+down_revision: Union[str, None] = '5b0e3f7a2d91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_team_members_user_id'), 'team_members', ['user_id'], unique=False)
+    op.create_index(op.f('ix_board_members_user_id'), 'board_members', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_board_members_user_id'), table_name='board_members')
+    op.drop_index(op.f('ix_team_members_user_id'), table_name='team_members')
@@ -0,0 +1,33 @@
+"""Add board templates and task clone lineage
+
+Revision ID: b7e4d1a9c256
+Revises: 6c0e2b9a7f34
+Create Date: 2026-10-19 19:27:35.840129
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d1a9c256'
+down_revision: Union[str, None] = '6c0e2b9a7f34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('boards', sa.Column('is_template', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('tasks', sa.Column('cloned_from_id', sa.Integer(), nullable=True))
+    # Clones join labels and attachments on their task
+    op.create_index('ix_task_labels_task_id', 'task_labels', ['task_id'], unique=False)
+    op.create_index(op.f('ix_attachments_task_id'), 'attachments', ['task_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_attachments_task_id'), table_name='attachments')
+    op.drop_index('ix_task_labels_task_id', table_name='task_labels')
+    op.drop_column('tasks', 'cloned_from_id')
+    op.drop_column('boards', 'is_template')
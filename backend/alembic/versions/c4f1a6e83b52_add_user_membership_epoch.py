@@ -0,0 +1,26 @@
+"""Add user membership epoch
+
+Revision ID: c4f1a6e83b52
+Revises: 9e2c4b8d1f06
+Create Date: 2026-10-19 15:07:44.126530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a6e83b52'
+down_revision: Union[str, None] = '9e2c4b8d1f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('membership_epoch', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'membership_epoch')
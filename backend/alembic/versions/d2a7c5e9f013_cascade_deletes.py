@@ -0,0 +1,90 @@
+"""Cascade deletes along task and board foreign keys; soft-deleted boards
+
+Revision ID: d2a7c5e9f013
+Revises: b7e4d1a9c256
+Create Date: 2026-10-19 20:14:52.306817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c5e9f013'
+down_revision: Union[str, None] = 'b7e4d1a9c256'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite cannot alter constraints, so each table is rebuilt in batch mode; the
+# convention names the (so far unnamed) SQLite foreign keys so they can be dropped
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+# table -> [(column, referred table)]
+CASCADES = {
+    'tasks': [('board_id', 'boards')],
+    'comments': [('task_id', 'tasks')],
+    'attachments': [('task_id', 'tasks')],
+    'task_labels': [('task_id', 'tasks'), ('label_id', 'labels')],
+    'task_members': [('task_id', 'tasks')],
+    'notifications': [('task_id', 'tasks')],
+    'board_members': [('board_id', 'boards')],
+    'boards': [('team_id', 'teams')],
+    'team_members': [('team_id', 'teams')],
+    'archived_tasks': [('board_id', 'boards')],
+}
+
+
+def _replace_foreign_keys(ondelete: Union[str, None]) -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in CASCADES.items():
+        existing = inspector.get_foreign_keys(table)
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, referred in columns:
+                name = f'fk_{table}_{column}_{referred}'
+                for fk in existing:
+                    if fk['constrained_columns'] == [column]:
+                        batch_op.drop_constraint(fk['name'] or name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def _drop_orphans() -> None:
+    # SQLite never enforced these keys; rows pointing at deleted parents would
+    # now fail every later write that touches them. Boards of a missing team are
+    # kept (detached) rather than deleted with everything on them.
+    op.execute('UPDATE boards SET team_id = NULL WHERE team_id NOT IN (SELECT id FROM teams)')
+    for table, columns in CASCADES.items():
+        for column, referred in columns:
+            op.execute(
+                f'DELETE FROM {table} WHERE {column} IS NOT NULL '
+                f'AND {column} NOT IN (SELECT id FROM {referred})'
+            )
+
+
+def _drop_partial_index() -> None:
+    # Batch mode does not carry partial index conditions over on SQLite
+    op.drop_index('ix_tasks_active_board_status_position', table_name='tasks')
+
+
+def _create_partial_index() -> None:
+    op.create_index(
+        'ix_tasks_active_board_status_position', 'tasks', ['board_id', 'status', 'position'],
+        sqlite_where=sa.text('is_archived = 0'),
+        postgresql_where=sa.text('NOT is_archived'),
+    )
+
+
+def upgrade() -> None:
+    op.add_column('boards', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    _drop_orphans()
+    _drop_partial_index()
+    _replace_foreign_keys('CASCADE')
+    _create_partial_index()
+
+
+def downgrade() -> None:
+    _drop_partial_index()
+    _replace_foreign_keys(None)
+    _create_partial_index()
+    op.drop_column('boards', 'deleted_at')
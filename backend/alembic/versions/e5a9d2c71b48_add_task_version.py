@@ -0,0 +1,26 @@
+"""Add task version for optimistic concurrency
+
+Revision ID: e5a9d2c71b48
+Revises: c4f1a6e83b52
+Create Date: 2026-10-19 15:48:31.602917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9d2c71b48'
+down_revision: Union[str, None] = 'c4f1a6e83b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'version')
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal, engine
+from ..utils.invalidation import bus as invalidation_bus, publish_after_commit
+
+# Access tokens can carry the user's team and board roles as a "caps" claim:
+#
+#     {"e": 4, "t": {"admin": "1,7-9"}, "b": {"admin": "3", "member": "10-14"}}
+#
+# Ids are grouped by role and written as sorted ranges, which stays short for
+# the mostly consecutive ids users accumulate. "e" is the user's membership
+# epoch when the token was issued; any membership change bumps the epoch, which
+# makes the claim stale and sends authorization back to the database.
+
+def encode_ids(ids: Iterable[int]) -> str:
+    ranges: List[Tuple[int, int]] = []
+    for value in sorted(set(ids)):
+        if ranges and value == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], value)
+        else:
+            ranges.append((value, value))
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+def decode_ids(encoded: str) -> List[Tuple[int, int]]:
+    """Parse an encoded id list into sorted inclusive (start, end) ranges."""
+    ranges = []
+    for part in filter(None, encoded.split(",")):
+        start, _, end = part.partition("-")
+        ranges.append((int(start), int(end or start)))
+    return ranges
+
+def _encode_roles(rows) -> Dict[str, str]:
+    by_role = defaultdict(list)
+    for object_id, role in rows:
+        by_role[role].append(object_id)
+    return {role: encode_ids(ids) for role, ids in by_role.items()}
+
+def build_claims(db: Session, user: models.User) -> Optional[dict]:
+    """The capability claim for a new access token, or None if disabled or too large."""
+    if not settings.TOKEN_CAPABILITIES_ENABLED:
+        return None
+    teams = db.execute(
+        select(models.TeamMember.team_id, models.TeamMember.role)
+        .where(models.TeamMember.user_id == user.id)
+    ).all()
+    boards = db.execute(
+        select(models.BoardMember.board_id, models.BoardMember.role)
+        .where(models.BoardMember.user_id == user.id)
+    ).all()
+    if len(teams) + len(boards) > settings.TOKEN_CAPABILITIES_MAX_IDS:
+        return None
+    return {"e": user.membership_epoch or 0, "t": _encode_roles(teams), "b": _encode_roles(boards)}
+
+class RoleSet:
+    """Membership lookups over the decoded ranges of one claim section."""
+
+    def __init__(self, encoded: Dict[str, str]):
+        self._ranges = [(start, end, role) for role, ids in encoded.items() for start, end in decode_ids(ids)]
+
+    def role(self, object_id: int) -> Optional[str]:
+        for start, end, role in self._ranges:
+            if start <= object_id <= end:
+                return role
+        return None
+
+class Principal:
+    """The authenticated caller as described by its access token.
+
+    ``teams`` and ``boards`` are only set when the token carried a capability
+    claim at the user's current membership epoch; otherwise they are None and
+    callers must ask the database.
+    """
+
+    def __init__(self, id: int, teams: Optional[RoleSet] = None, boards: Optional[RoleSet] = None):
+        self.id = id
+        self.teams = teams
+        self.boards = boards
+
+    @property
+    def has_capabilities(self) -> bool:
+        return self.teams is not None
+
+class MembershipEpochCache:
+    """Per-process cache of users' membership epochs.
+
+    Entries are dropped when a "membership" invalidation for the user arrives over
+    the bus, and expire after ``ttl`` seconds to bound staleness across hosts.
+    Epochs are read from the primary, since a replica may not have the bump yet.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._epochs: Dict[int, Tuple[int, float]] = {}
+        # Bumped by every invalidation; a read that overlapped one is not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> Optional[int]:
+        """The user's current epoch, or None if the user does not exist."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._epochs.get(user_id)
+            generation = self._generation
+        if cached is not None and now - cached[1] < self.ttl:
+            return cached[0]
+        epoch = self._read(db, user_id)
+        if epoch is None:
+            return None
+        with self._lock:
+            if self._generation == generation:
+                self._epochs[user_id] = (epoch, now)
+        return epoch
+
+    def _read(self, db: Session, user_id: int) -> Optional[int]:
+        query = select(models.User.membership_epoch).where(models.User.id == user_id)
+        if db.get_bind() is engine:
+            row = db.execute(query).first()
+        else:
+            # GET requests run on the read pool
+            with SessionLocal() as primary:
+                row = primary.execute(query).first()
+        return None if row is None else row[0] or 0
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._epochs.pop(int(user_id), None)
+
+epoch_cache = MembershipEpochCache(settings.MEMBERSHIP_EPOCH_CACHE_SECONDS)
+invalidation_bus.subscribe("membership", epoch_cache.invalidate)
+
+def membership_changed(db: Session, user_id: int) -> None:
+    """Bump the user's membership epoch and broadcast the change once committed.
+
+    Revokes the capability claims of every token issued to the user so far.
+    """
+    db.execute(
+        update(models.User).where(models.User.id == user_id)
+        .values(membership_epoch=models.User.membership_epoch + 1)
+    )
+    publish_after_commit(db, "membership", user_id)
+
+def principal_from_payload(db: Session, payload: dict) -> Optional[Principal]:
+    """Build the caller from a verified token payload; None if the user no longer exists."""
+    user_id = int(payload["sub"])
+    epoch = epoch_cache.get(db, user_id)
+    if epoch is None:
+        return None
+    caps = payload.get("caps")
+    if not caps or caps.get("e") != epoch:
+        return Principal(user_id)
+    return Principal(user_id, teams=RoleSet(caps.get("t", {})), boards=RoleSet(caps.get("b", {})))
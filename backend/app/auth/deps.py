@@ -5,12 +5,12 @@ from sqlalchemy.orm import Session
 from jose import JWTError
 import logging
 
+from ..config import settings
 from ..database import get_db
 from ..models import User
 from .utils import verify_token
+from .capabilities import Principal, principal_from_payload
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -53,6 +53,29 @@ async def get_current_user(
     logger.info(f"Successfully authenticated user: {user.username} (id: {user.id})")
     return user
 
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Authenticate from the token alone, for hot read paths that only need ids and roles.
+
+    The user row is not loaded; with a current capability claim and a cached
+    membership epoch this dependency runs no queries at all.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = verify_token(token)
+    if payload is None or payload.get("sub") is None:
+        raise credentials_exception
+    principal = principal_from_payload(db, payload)
+    if principal is None:
+        logger.warning(f"No user found for id: {payload.get('sub')}")
+        raise credentials_exception
+    return principal
+
 async def get_optional_user(
     token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -65,4 +88,13 @@ async def get_optional_user(
         return await get_current_user(token, db)
     except HTTPException:
         logger.warning("Failed to get optional user")
-        return None 
\ No newline at end of file
+        return None
+
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.email not in settings.ADMIN_EMAILS:
+        logger.warning(f"Admin access denied for user: {current_user.username}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
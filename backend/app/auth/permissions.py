@@ -0,0 +1,140 @@
+from typing import Optional, Set, Union
+
+from fastapi import HTTPException
+from sqlalchemy import and_, exists, or_, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from .capabilities import Principal
+
+# Membership questions are answered with single-row lookups on the
+# (team_id, user_id) / (board_id, user_id) primary keys, never by loading
+# member collections into Python. Callers authenticated as a Principal with a
+# current capability claim are answered from the token without any query.
+
+Caller = Union[models.User, Principal]
+
+def _claims(user: Caller) -> Optional[Principal]:
+    if isinstance(user, Principal) and user.has_capabilities:
+        return user
+    return None
+
+def team_role(db: Session, team_id: int, user_id: int) -> Optional[str]:
+    """The user's role in a team, or None if they are not a member."""
+    return db.execute(
+        select(models.TeamMember.role).where(
+            models.TeamMember.team_id == team_id,
+            models.TeamMember.user_id == user_id
+        )
+    ).scalar_one_or_none()
+
+def board_role(db: Session, board_id: int, user_id: int) -> Optional[str]:
+    """The user's explicit role on a board, or None if they are not a board member."""
+    return db.execute(
+        select(models.BoardMember.role).where(
+            models.BoardMember.board_id == board_id,
+            models.BoardMember.user_id == user_id
+        )
+    ).scalar_one_or_none()
+
+def is_board_member(db: Session, board_id: int, user: Caller) -> bool:
+    claims = _claims(user)
+    if claims is not None:
+        return claims.boards.role(board_id) is not None
+    return board_role(db, board_id, user.id) is not None
+
+def is_team_member(db: Session, team_id: int, user_id: int) -> bool:
+    return db.execute(
+        select(exists().where(
+            models.TeamMember.team_id == team_id,
+            models.TeamMember.user_id == user_id
+        ))
+    ).scalar()
+
+def can_access_board(db: Session, board: models.Board, user: Caller) -> bool:
+    """Public boards are open; private ones need board or team membership."""
+    if board.is_public:
+        return True
+    claims = _claims(user)
+    if claims is not None:
+        return claims.boards.role(board.id) is not None or claims.teams.role(board.team_id) is not None
+    user_id = user.id
+    return db.execute(
+        select(or_(
+            exists().where(
+                models.BoardMember.board_id == board.id,
+                models.BoardMember.user_id == user_id
+            ),
+            exists().where(
+                models.TeamMember.team_id == board.team_id,
+                models.TeamMember.user_id == user_id
+            )
+        ))
+    ).scalar()
+
+def accessible_board_clause(user_id: int):
+    """SQL condition on ``models.Board`` matching the boards a user may see."""
+    return and_(models.Board.deleted_at.is_(None), or_(
+        models.Board.is_public.is_(True),
+        exists().where(
+            models.BoardMember.board_id == models.Board.id,
+            models.BoardMember.user_id == user_id
+        ),
+        exists().where(
+            models.TeamMember.team_id == models.Board.team_id,
+            models.TeamMember.user_id == user_id
+        )
+    ))
+
+def users_with_board_access(db: Session, board: models.Board, user_ids: Set[int]) -> Set[int]:
+    """The subset of ``user_ids`` (existing users only) that may see ``board``."""
+    if not user_ids:
+        return set()
+    if board.is_public:
+        query = select(models.User.id).where(models.User.id.in_(user_ids))
+    else:
+        query = select(models.BoardMember.user_id).where(
+            models.BoardMember.board_id == board.id,
+            models.BoardMember.user_id.in_(user_ids)
+        ).union(select(models.TeamMember.user_id).where(
+            models.TeamMember.team_id == board.team_id,
+            models.TeamMember.user_id.in_(user_ids)
+        ))
+    return set(db.execute(query).scalars())
+
+def require_team_member(db: Session, team_id: int, current_user: Caller) -> str:
+    """Return the user's team role; 404 if the team is missing, 403 if not a member."""
+    claims = _claims(current_user)
+    if claims is not None:
+        role = claims.teams.role(team_id)
+    else:
+        role = team_role(db, team_id, current_user.id)
+    if role is None:
+        # Only pay for the existence check on the failure path
+        if db.get(models.Team, team_id) is None:
+            raise HTTPException(status_code=404, detail="Team not found")
+        raise HTTPException(status_code=403, detail="Not a member of this team")
+    return role
+
+def require_board_admin(db: Session, board_id: int, current_user: models.User, detail: str) -> None:
+    if board_role(db, board_id, current_user.id) != 'admin':
+        raise HTTPException(status_code=403, detail=detail)
+
+def check_board_access(board_id: int, current_user: Caller, db: Session) -> models.Board:
+    """Load a board the user may see; 404 if it does not exist, 403 if not allowed."""
+    board = db.get(models.Board, board_id)
+    # Boards being deleted are gone as far as callers are concerned
+    if not board or board.deleted_at is not None:
+        raise HTTPException(status_code=404, detail="Board not found")
+
+    if not can_access_board(db, board, current_user):
+        raise HTTPException(status_code=403, detail="Not authorized to access this board")
+
+    return board
+
+def require_board_access(board_id: int, current_user: Caller, db: Session) -> None:
+    """Like check_board_access, but skips loading the board when the token proves membership."""
+    claims = _claims(current_user)
+    if claims is not None and claims.boards.role(board_id) is not None:
+        return
+    check_board_access(board_id, current_user, db)
@@ -0,0 +1,152 @@
+"""Command line tools for administering the Kanban backend.
+
+Run from the ``backend/`` directory, e.g.::
+
+    python -m app.cli import-board 3 export.json --format trello --user 1
+    python -m app.cli export-boards exports/ --format ndjson --gzip
+    python -m app.cli archive-tasks --older-than-days 90
+    python -m app.cli compact-tombstones --older-than-days 30
+    python -m app.cli gc-uploads --dry-run
+    python -m app.cli purge-archived --dry-run
+"""
+import argparse
+import json
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+from .config import settings
+from .database import SessionLocal
+from . import models
+from .services.importer import BoardImporter, IMPORT_FORMATS, iter_cards, parse_status_map
+from .services.exporter import EXPORT_FORMATS, export_filename, stream_board_export
+from .services.archive import move_to_cold_archive
+from .services import retention, sync
+from .services.jobs import JobFailed
+
+def import_board(args) -> int:
+    db = SessionLocal()
+    try:
+        if db.query(models.Board.id).filter(models.Board.id == args.board_id).first() is None:
+            print(f"Board {args.board_id} not found", file=sys.stderr)
+            return 1
+        importer = BoardImporter(
+            db, args.board_id, args.user,
+            status_map=parse_status_map(args.map),
+            chunk_size=args.chunk_size,
+        )
+        with open(args.file, "rb") as fp:
+            stats = importer.run(
+                iter_cards(fp, args.format),
+                progress=lambda stats: print(f"\rimported {stats['tasks']} cards", end="", file=sys.stderr),
+            )
+        print(file=sys.stderr)
+        print(f"Imported {stats['tasks']} tasks, {stats['labels_created']} new labels, "
+              f"{stats['attachments']} attachments into board {args.board_id}")
+        return 0
+    finally:
+        db.close()
+
+def export_boards(args) -> int:
+    db = SessionLocal()
+    try:
+        # Soft-deleted boards wait for their purge job and are hidden everywhere else too
+        board_ids = args.board or [
+            board_id for board_id, in db.query(models.Board.id)
+            .filter(models.Board.deleted_at.is_(None))
+            .order_by(models.Board.id)
+        ]
+    finally:
+        db.close()
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for board_id in board_ids:
+        path = output_dir / export_filename(board_id, args.format, args.gzip)
+        with path.open("wb") as fp:
+            for chunk in stream_board_export(board_id, format=args.format, compress=args.gzip):
+                fp.write(chunk)
+        print(f"Exported board {board_id} to {path}")
+    return 0
+
+def archive_tasks(args) -> int:
+    db = SessionLocal()
+    try:
+        moved = move_to_cold_archive(db, timedelta(days=args.older_than_days), board_id=args.board)
+    finally:
+        db.close()
+    print(f"Moved {moved} archived tasks to the cold archive")
+    return 0
+
+def compact_tombstones(args) -> int:
+    db = SessionLocal()
+    try:
+        removed = sync.compact_tombstones(db, timedelta(days=args.older_than_days))
+    finally:
+        db.close()
+    print(f"Removed {removed} tombstones")
+    return 0
+
+def gc_uploads(args) -> int:
+    db = SessionLocal()
+    try:
+        report = retention.collect_orphaned_files(db, dry_run=args.dry_run)
+    except JobFailed as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+    return 0
+
+def purge_archived(args) -> int:
+    db = SessionLocal()
+    try:
+        report = retention.purge_archived(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    importer = subcommands.add_parser("import-board", help="bulk import cards from an export file")
+    importer.add_argument("board_id", type=int)
+    importer.add_argument("file")
+    importer.add_argument("--format", choices=IMPORT_FORMATS, default="csv")
+    importer.add_argument("--user", type=int, required=True, help="id of the user recorded as creator")
+    importer.add_argument("--map", help="list name to status overrides, e.g. 'Backlog=todo,Doing=in_progress'")
+    importer.add_argument("--chunk-size", type=int, default=1000)
+    importer.set_defaults(func=import_board)
+
+    exporter = subcommands.add_parser("export-boards", help="stream board exports to files")
+    exporter.add_argument("output_dir")
+    exporter.add_argument("--board", type=int, action="append", help="board id (repeatable); defaults to every board")
+    exporter.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    exporter.add_argument("--gzip", action="store_true")
+    exporter.set_defaults(func=export_boards)
+
+    archiver = subcommands.add_parser("archive-tasks", help="move long-archived tasks to the cold archive")
+    archiver.add_argument("--older-than-days", type=int, default=settings.COLD_ARCHIVE_AFTER_DAYS)
+    archiver.add_argument("--board", type=int, help="only archive tasks of this board")
+    archiver.set_defaults(func=archive_tasks)
+
+    compactor = subcommands.add_parser("compact-tombstones", help="drop delta-sync tombstones past the retention window")
+    compactor.add_argument("--older-than-days", type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    compactor.set_defaults(func=compact_tombstones)
+
+    collector = subcommands.add_parser("gc-uploads", help="delete upload files no attachment refers to")
+    collector.add_argument("--dry-run", action="store_true", help="only report the orphaned files")
+    collector.set_defaults(func=gc_uploads)
+
+    purger = subcommands.add_parser("purge-archived", help="delete archived tasks past RETENTION_ARCHIVED_DAYS")
+    purger.add_argument("--dry-run", action="store_true", help="only report what would be purged, per board")
+    purger.set_defaults(func=purge_archived)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
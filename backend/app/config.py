@@ -4,14 +4,100 @@ from functools import lru_cache
 class Settings(BaseSettings):
     # Database settings
     DATABASE_URL: str = "sqlite:///./kanban.db"
+    READ_DATABASE_URL: str = ""  # Replica for read-only requests; empty = read-only connections to DATABASE_URL (SQLite)
+    READ_STICKY_SECONDS: float = 5.0  # After writing, a client reads from the primary this long (replicas only)
+    SQLITE_WAL_ENABLED: bool = True  # WAL lets readers proceed while a write is in progress
+    SQLITE_FOREIGN_KEYS: bool = True  # Enforce foreign keys, and with them ON DELETE CASCADE (off by default in SQLite)
+    SCHEMA_CHECK_STRICT: bool = True  # Refuse to start when the schema is not at the Alembic head; false only warns
+    
+    # Uploaded attachments, served under /uploads
+    UPLOAD_DIR: str = "uploads"
     
     # JWT settings
     SECRET_KEY: str = "your-secret-key-here"  # In production, use a secure secret key
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CAPABILITIES_ENABLED: bool = True  # Embed team/board roles in access tokens
+    TOKEN_CAPABILITIES_MAX_IDS: int = 256  # Above this many memberships tokens carry no roles
+    MEMBERSHIP_EPOCH_CACHE_SECONDS: int = 30  # Bounds revocation delay between hosts
+    
+    # Users allowed to call the /api/admin endpoints
+    ADMIN_EMAILS: list = []
+    PASSWORD_HASH_WORKERS: int = 0  # Threads hashing passwords during bulk provisioning; 0 = CPU count
     
     # CORS settings
     CORS_ORIGINS: list = ["http://localhost:5173"]  # Add your frontend URL
     
+    # Archive settings
+    COLD_ARCHIVE_AFTER_DAYS: int = 90  # Archived tasks older than this move to archived_tasks
+    
+    # Delta sync: tombstones of deleted rows are kept this long, after which
+    # clients with an older cursor have to reload the board
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+    
+    # Boards with more tasks than this are deleted by a background job, one
+    # chunk of tasks per transaction, so no single delete holds the write lock long
+    BOARD_DELETE_CHUNK_SIZE: int = 1000
+    
+    # Materialized board documents served to board reads, patched from the
+    # change sequence (see services/board_documents.py)
+    BOARD_DOCUMENTS_ENABLED: bool = True
+    BOARD_DOCUMENT_CACHE_BYTES: int = 64 * 1024 * 1024  # Per process; least recently read boards go first
+    BOARD_DOCUMENT_BOARD_TTL_SECONDS: int = 30  # Bounds staleness of memberships changed on other hosts
+    BOARD_DOCUMENT_VERIFY_RATE: float = 0.0  # Share of reads that re-check their document against the tables
+    
+    # Write coalescing: funnel comment and checklist writes through one writer
+    # thread that group-commits them (worth it on SQLite's single-writer lock)
+    WRITE_QUEUE_ENABLED: bool = False
+    WRITE_QUEUE_WINDOW_MS: float = 2.0  # How long the writer waits to fill a batch
+    WRITE_QUEUE_MAX_BATCH: int = 64
+    WRITE_QUEUE_TIMEOUT_SECONDS: float = 30.0  # Longest a request waits for the writer before a 503
+
+    # Background jobs: a worker pool in every app process claims rows from the
+    # jobs table; no broker needed
+    JOBS_ENABLED: bool = True
+    JOB_WORKERS: int = 2
+    JOB_POLL_SECONDS: float = 1.0  # Fallback when no wakeup arrives over the invalidation bus
+    JOB_LEASE_SECONDS: int = 600  # A running job whose worker stopped renewing it for this long counts as abandoned
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 5.0  # Retries back off exponentially from this
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+    JOB_SPOOL_DIR: str = "spool"  # Uploads waiting for a job, e.g. background imports
+
+    # Storage maintenance: deleting orphaned upload files and purging archived
+    # tasks past their retention. Both run as jobs every MAINTENANCE_INTERVAL_HOURS
+    MAINTENANCE_INTERVAL_HOURS: int = 24  # 0 = only when started from the CLI or admin API
+    GC_BATCH_SIZE: int = 500  # Upload files checked against the database per query
+    GC_GRACE_HOURS: int = 24  # Younger files are left alone (their attachment may not be committed yet)
+    GC_DELETES_PER_SECOND: float = 50.0  # Throttles file deletions; 0 = unthrottled
+    RETENTION_ARCHIVED_DAYS: int = 0  # Archived tasks (hot or cold) are purged this long after archiving; 0 = kept forever
+    RETENTION_BOARD_DAYS: dict = {}  # Per-board overrides, board id -> days (0 = kept forever)
+    RETENTION_BATCH_SIZE: int = 500  # Tasks purged per transaction
+    RETENTION_BATCH_PAUSE_SECONDS: float = 0.1  # Pause between purge transactions
+
+    # Due-date reminder settings
+    REMINDERS_ENABLED: bool = True
+    REMINDER_LEAD_HOURS: int = 24  # "due soon" fires this long before the due date
+    REMINDER_WINDOW_HOURS: int = 6  # How far ahead the in-memory timer queue is loaded
+    REMINDER_CATCHUP_HOURS: int = 24  # Events missed while the app was down are replayed this far back
+    
+    # Rate limiting settings (requests per minute, burst size)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "sqlite" (shared by local workers)
+    RATE_LIMIT_SQLITE_PATH: str = "./ratelimit.db"
+    RATE_LIMIT_READ_PER_MINUTE: int = 600
+    RATE_LIMIT_READ_BURST: int = 100
+    RATE_LIMIT_WRITE_PER_MINUTE: int = 120
+    RATE_LIMIT_WRITE_BURST: int = 30
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 10  # Per client IP for login and register
+    RATE_LIMIT_AUTH_BURST: int = 5
+    
+    # Cross-worker cache invalidation
+    INVALIDATION_BUS_DIR: str = ""  # Directory for worker sockets; defaults to a temp dir per database
+    
+    # Profiling settings
+    QUERY_COUNT_HEADER: bool = False  # Report per-request SQL query counts in X-Query-Count
+    STRICT_LOADING: bool = False  # Lazy loads outside an endpoint's load profile raise instead of querying (bench servers turn it on)
+    
     class Config:
         env_file = ".env"
 
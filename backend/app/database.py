@@ -1,20 +1,151 @@
-from sqlalchemy import create_engine
+import hashlib
+import threading
+import time
+from typing import Dict, List
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from .config import settings
+from .utils.invalidation import bus as invalidation_bus
+
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./kanban.db"
+connect_args = {}
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    connect_args["check_same_thread"] = False
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args=connect_args
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Reads go to their own connection pool so they never wait for a pooled
+# connection held by a writer. With READ_DATABASE_URL set that pool points at a
+# replica; for a SQLite file it opens read-only connections to the same database,
+# which in WAL mode read the last committed state while a write is in progress.
+_sqlite_file = (
+    SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+    and ":memory:" not in SQLALCHEMY_DATABASE_URL
+    and SQLALCHEMY_DATABASE_URL not in ("sqlite://", "sqlite:///")
+)
+
+if _sqlite_file and settings.SQLITE_WAL_ENABLED:
+    @event.listens_for(engine, "connect")
+    def _enable_wal(dbapi_connection, connection_record):
+        # The journal mode is stored in the database file, so readers see it too
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite") and settings.SQLITE_FOREIGN_KEYS:
+    @event.listens_for(engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, connection_record):
+        # Per connection; needed for the ON DELETE CASCADE rules to apply
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+if settings.READ_DATABASE_URL:
+    read_engine = create_engine(settings.READ_DATABASE_URL, connect_args=connect_args)
+elif _sqlite_file:
+    read_engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
+
+    @event.listens_for(read_engine, "connect")
+    def _read_only(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA query_only = ON")
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
-# Dependency
-def get_db():
+class StickyReads:
+    """Remember which clients wrote recently, so their reads can go to the primary.
+
+    Only needed with a replica: a client that just wrote must not read a replica
+    that has not caught up yet. Marks are shared between worker processes over
+    the invalidation bus.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) > 10000:
+                self._until = {k: until for k, until in self._until.items() if until > now}
+            self._until[key] = now + self.seconds
+
+    def is_sticky(self, key: str) -> bool:
+        with self._lock:
+            until = self._until.get(key)
+        return until is not None and until > time.monotonic()
+
+sticky_reads = StickyReads(settings.READ_STICKY_SECONDS)
+invalidation_bus.subscribe("sticky", sticky_reads.mark)
+
+# Replicas lag; same-file SQLite readers and a shared engine do not
+_replica = bool(settings.READ_DATABASE_URL) and settings.READ_STICKY_SECONDS > 0
+
+def _sticky_key(value: str) -> str:
+    return hashlib.sha1(value.encode()).hexdigest()[:16]
+
+def _token_key(token: str) -> str:
+    return _sticky_key(f"token:{token}")
+
+def _client_keys(request: Request) -> List[str]:
+    # The bearer token identifies one signed-in client. Behind a proxy every
+    # client shares an address, so the address only keys requests without one
+    # (e.g. register); carry_stickiness hands that over to the token issued next
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return [_token_key(token)]
+    return [_sticky_key(f"address:{request.client.host if request.client else ''}")]
+
+def carry_stickiness(request: Request, token: str) -> None:
+    """Keep reading from the primary with a newly issued token if the client that
+    asked for it (by its address or previous token) has just written."""
+    if _replica and any(sticky_reads.is_sticky(key) for key in _client_keys(request)):
+        invalidation_bus.publish("sticky", _token_key(token))
+
+@event.listens_for(Session, "after_commit")
+def _stick_after_write(session: Session) -> None:
+    keys = session.info.get("sticky_keys")
+    if keys:
+        invalidation_bus.publish_many(("sticky", key) for key in keys)
+
+# Dependencies
+def get_write_db(request: Request):
+    """Session on the primary database."""
     db = SessionLocal()
+    if _replica:
+        db.info["sticky_keys"] = _client_keys(request)
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_read_db(request: Request):
+    """Session on the read pool, or on the primary for a client that just wrote."""
+    if _replica and any(sticky_reads.is_sticky(key) for key in _client_keys(request)):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def get_db(request: Request):
+    """The request's session: the read pool for safe methods, the primary otherwise.
+
+    Routes and the auth dependencies share this one dependency so that a request
+    uses a single session; FastAPI caches it per request.
+    """
+    if request.method in SAFE_METHODS:
+        yield from get_read_db(request)
+    else:
+        yield from get_write_db(request)
@@ -1,20 +1,62 @@
 import warnings
 warnings.filterwarnings("ignore", message="Pydantic serializer warnings")
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
-import logging
-from .database import engine, Base
-from .routers import tasks, auth, teams
+from .database import engine, read_engine
+from .routers import tasks, auth, teams, me, admin, sync, jobs
 from .config import settings
 from .utils.logging import debug_log, logger
+from .utils.profiling import install_query_counter, start_query_count
+from .utils.ratelimit import RateLimitMiddleware, build_store
+from .utils.invalidation import bus as invalidation_bus
+from .utils.startup import check_schema, warm_up
+from .services.reminders import scheduler as reminder_scheduler
+from .services.write_queue import WriteQueueTimeout, writer as write_queue
+from .services.jobs import runner as job_runner
+from .services.retention import start_maintenance
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+UPLOAD_DIR = Path(settings.UPLOAD_DIR)
 
-app = FastAPI(title="Kanban Board API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting up FastAPI application")
+    logger.debug(f"Database URL: {str(engine.url).replace(':password', ':***')}")
+    check_schema(engine, strict=settings.SCHEMA_CHECK_STRICT)
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    Path(settings.JOB_SPOOL_DIR).mkdir(exist_ok=True)
+    warm_up(app, engine)
+    invalidation_bus.start()
+    if settings.WRITE_QUEUE_ENABLED:
+        write_queue.start()
+    if settings.REMINDERS_ENABLED:
+        reminder_scheduler.start()
+    if settings.JOBS_ENABLED:
+        job_runner.start()
+        start_maintenance()
+    yield
+    job_runner.stop()
+    reminder_scheduler.stop()
+    write_queue.stop()
+    invalidation_bus.stop()
+
+app = FastAPI(title="Kanban Board API", lifespan=lifespan)
+
+# Throttle clients per user (and per IP for login/register). Added before CORS so
+# that 429 responses still carry CORS headers.
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=build_store(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_SQLITE_PATH),
+        read_limit=(settings.RATE_LIMIT_READ_PER_MINUTE, settings.RATE_LIMIT_READ_BURST),
+        write_limit=(settings.RATE_LIMIT_WRITE_PER_MINUTE, settings.RATE_LIMIT_WRITE_BURST),
+        auth_limit=(settings.RATE_LIMIT_AUTH_PER_MINUTE, settings.RATE_LIMIT_AUTH_BURST),
+    )
 
 # Configure CORS
 origins = [
@@ -32,12 +74,8 @@ app.add_middleware(
     max_age=3600,
 )
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-# Mount the uploads directory
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Mount the uploads directory (created by the lifespan)
+app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR, check_dir=False), name="uploads")
 
 # Add request logging middleware
 @app.middleware("http")
@@ -50,13 +88,41 @@ async def log_requests(request: Request, call_next):
     logger.debug(f"Response status: {response.status_code}")
     return response
 
+# Report SQL query counts per request (used by the bench/ suite)
+if settings.QUERY_COUNT_HEADER:
+    install_query_counter(engine)
+    if read_engine is not engine:
+        install_query_counter(read_engine)
+
+    @app.middleware("http")
+    async def count_queries(request: Request, call_next):
+        counter = start_query_count()
+        response = await call_next(request)
+        response.headers["X-Query-Count"] = str(counter[0])
+        return response
+
+# A versioned row changed between read and write in an endpoint without its own
+# conflict handling (see Task.version)
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    return JSONResponse(
+        status_code=409,
+        content={"detail": "The resource was modified concurrently; reload and retry"}
+    )
+
+@app.exception_handler(WriteQueueTimeout)
+async def write_queue_timeout_handler(request: Request, exc: WriteQueueTimeout):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The server is busy; retry the request"},
+        headers={"Retry-After": "1"}
+    )
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["tasks"])
 app.include_router(teams.router, prefix="/api/teams", tags=["teams"])
-
-@app.on_event("startup")
-@debug_log
-async def startup_event():
-    logger.info("Starting up FastAPI application")
-    logger.debug(f"Database URL: {str(engine.url).replace(':password', ':***')}") 
\ No newline at end of file
+app.include_router(me.router, prefix="/api/me", tags=["me"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(sync.router, prefix="/api/changes", tags=["sync"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
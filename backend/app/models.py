@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Boolean, JSON, Index, UniqueConstraint, false, text
+from sqlalchemy.orm import relationship, query_expression
 from sqlalchemy.sql import func
 import enum
 from .database import Base
@@ -8,22 +8,29 @@ from .database import Base
 task_labels = Table(
     'task_labels',
     Base.metadata,
-    Column('task_id', Integer, ForeignKey('tasks.id')),
-    Column('label_id', Integer, ForeignKey('labels.id'))
+    Column('task_id', Integer, ForeignKey('tasks.id', ondelete='CASCADE')),
+    Column('label_id', Integer, ForeignKey('labels.id', ondelete='CASCADE')),
+    # Labels of a task: relationship loads and the board clone's join
+    Index('ix_task_labels_task_id', 'task_id')
 )
 
 task_members = Table(
     'task_members',
     Base.metadata,
-    Column('task_id', Integer, ForeignKey('tasks.id')),
-    Column('user_id', Integer, ForeignKey('users.id'))
+    Column('task_id', Integer, ForeignKey('tasks.id', ondelete='CASCADE')),
+    Column('user_id', Integer, ForeignKey('users.id')),
+    # "Tasks assigned to a user" walks the first in task id order (keyset pages);
+    # it also keeps assignments unique
+    Index('ix_task_members_user_id_task_id', 'user_id', 'task_id', unique=True),
+    Index('ix_task_members_task_id', 'task_id')
 )
 
 class TeamMember(Base):
     __tablename__ = "team_members"
 
-    team_id = Column(Integer, ForeignKey("teams.id"), primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+    # Indexed on its own for "teams of a user"; the primary key covers (team_id, user_id)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
     role = Column(String, default='member')  # Can be 'admin' or 'member'
     joined_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -34,8 +41,8 @@ class TeamMember(Base):
 class BoardMember(Base):
     __tablename__ = "board_members"
 
-    board_id = Column(Integer, ForeignKey("boards.id"), primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
     role = Column(String, default='member')  # Can be 'admin' or 'member'
     joined_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -51,6 +58,12 @@ class Team(Base):
     description = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by_id = Column(Integer, ForeignKey("users.id"))
+    # Bumped whenever members join or leave; used for team listing ETags
+    membership_version = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Filled in by team listing queries with with_expression()
+    member_count = query_expression()
+    current_user_role = query_expression()
     
     # Relationships
     team_memberships = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan")
@@ -72,8 +85,11 @@ class Board(Base):
     description = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by_id = Column(Integer, ForeignKey("users.id"))
-    team_id = Column(Integer, ForeignKey("teams.id"))
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"))
     is_public = Column(Boolean, default=False)  # If true, visible to all team members
+    is_template = Column(Boolean, nullable=False, default=False, server_default=false())  # Meant to be cloned
+    # Set when deletion starts; the rows of large boards are removed in the background
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     board_memberships = relationship("BoardMember", back_populates="board", cascade="all, delete-orphan")
@@ -107,6 +123,8 @@ class User(Base):
     hashed_password = Column(String)
     full_name = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every team or board membership change; invalidates token capability claims
+    membership_epoch = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     created_tasks = relationship("Task", back_populates="creator")
@@ -134,6 +152,7 @@ class Label(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     color = Column(String)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0", index=True)
     
     # Relationships
     tasks = relationship("Task", secondary=task_labels, back_populates="labels")
@@ -147,21 +166,41 @@ class Task(Base):
     status = Column(String, default=TaskStatus.TODO)
     priority = Column(String, default=TaskPriority.LOW)
     position = Column(Integer, nullable=True)
-    due_date = Column(DateTime(timezone=True), nullable=True)
+    due_date = Column(DateTime(timezone=True), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     creator_id = Column(Integer, ForeignKey("users.id"))
-    board_id = Column(Integer, ForeignKey("boards.id"))
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"))
     is_archived = Column(Boolean, default=False)
+    archived_at = Column(DateTime(timezone=True), nullable=True)
     checklist = Column(JSON, default=list)
+    # Optimistic concurrency: every UPDATE/DELETE of a task checks and bumps this
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Delta sync: the change sequence of the last write (see services/sync.py)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # The task this one was copied from by a board clone (see services/cloning.py)
+    cloned_from_id = Column(Integer, nullable=True)
+    
+    # Active (non-archived) rows only: covers board listings, max(position) lookups
+    # and the position-shifting UPDATEs, which all filter on NOT is_archived
+    __table_args__ = (
+        Index(
+            "ix_tasks_active_board_status_position", "board_id", "status", "position",
+            sqlite_where=text("is_archived = 0"),
+            postgresql_where=text("NOT is_archived"),
+        ),
+        Index("ix_tasks_board_id_change_seq", "board_id", "change_seq"),
+    )
+    __mapper_args__ = {"version_id_col": version}
     
     # Relationships
     creator = relationship("User", back_populates="created_tasks")
     board = relationship("Board", back_populates="tasks")
     assigned_to = relationship("User", secondary=task_members, back_populates="assigned_tasks")
     labels = relationship("Label", secondary=task_labels, back_populates="tasks")
-    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan")
-    attachments = relationship("Attachment", back_populates="task", cascade="all, delete-orphan")
+    # The database cascades task deletes (see services/deletion.py); no need to load these first
+    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
+    attachments = relationship("Attachment", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
 
 class Comment(Base):
     __tablename__ = "comments"
@@ -170,8 +209,9 @@ class Comment(Base):
     content = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    task_id = Column(Integer, ForeignKey("tasks.id"))
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"))
     user_id = Column(Integer, ForeignKey("users.id"))
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0", index=True)
     
     # Relationships
     task = relationship("Task", back_populates="comments")
@@ -186,12 +226,121 @@ class Attachment(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String)
-    file_path = Column(String)
+    file_path = Column(String, index=True)  # Shared by the copies of cloned boards
     url = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    task_id = Column(Integer, ForeignKey("tasks.id"))
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0", index=True)
     
     # Relationships
     task = relationship("Task", back_populates="attachments")
-    user = relationship("User") 
\ No newline at end of file
+    user = relationship("User") 
+
+class ArchivedTask(Base):
+    """Cold storage for long-archived tasks, moved out of the hot tasks table.
+
+    Keeps the original task id; labels, checklist, comments and attachments are
+    stored as a JSON snapshot in ``data``.
+    """
+    __tablename__ = "archived_tasks"
+
+    id = Column(Integer, primary_key=True)
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"))
+    title = Column(String)
+    description = Column(String)
+    status = Column(String)
+    priority = Column(String)
+    due_date = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), nullable=True)
+    moved_at = Column(DateTime(timezone=True), server_default=func.now())
+    creator_id = Column(Integer, ForeignKey("users.id"))
+    data = Column(JSON, default=dict)
+
+    __table_args__ = (
+        Index("ix_archived_tasks_board_id_id", "board_id", "id"),
+    )
+
+class Tombstone(Base):
+    """A deleted task, comment or attachment, kept so delta sync can report it.
+
+    Compacted after a retention window; see ``SyncState.compacted_seq``.
+    """
+    __tablename__ = "tombstones"
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # 'task', 'comment' or 'attachment'
+    entity_id = Column(Integer, nullable=False)
+    board_id = Column(Integer)  # No foreign key: tombstones outlive their board
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_tombstones_board_id_change_seq", "board_id", "change_seq"),
+    )
+
+class SyncState(Base):
+    """Single row (id 1) holding the global change sequence."""
+    __tablename__ = "sync_state"
+
+    id = Column(Integer, primary_key=True)
+    last_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # Tombstones up to this sequence were compacted; older cursors must resync
+    compacted_seq = Column(Integer, nullable=False, default=0, server_default="0")
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(Base):
+    """A unit of background work, claimed and run by the workers in services/jobs.py."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, default=dict)
+    # Enqueueing a job with a key that already exists returns the existing job
+    key = Column(String, unique=True, nullable=True)
+    status = Column(String, nullable=False, default=JobStatus.QUEUED.value)
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # Not before; pushed back by retries
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_priority_run_at", "status", "priority", "run_at"),
+    )
+
+class NotificationKind(str, enum.Enum):
+    DUE_SOON = "due_soon"
+    OVERDUE = "overdue"
+
+class Notification(Base):
+    __tablename__ = "notifications"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"))
+    kind = Column(String)
+    due_date = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    read_at = Column(DateTime(timezone=True), nullable=True)
+
+    # The unique key makes firing idempotent across restarts and workers
+    __table_args__ = (
+        UniqueConstraint("user_id", "task_id", "kind", "due_date", name="uq_notifications_user_task_kind_due"),
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+    )
+
+    # Relationships
+    task = relationship("Task")
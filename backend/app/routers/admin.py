@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..config import settings
+from ..database import get_db
+from ..auth.deps import get_admin_user
+from ..services.board_documents import documents as board_documents
+from ..services.jobs import enqueue
+from ..services.onboarding import ProvisioningConflict, find_conflicts, provision_users
+from ..utils.logging import logger
+from ..utils.wire import NegotiatedRoute, dump_mode, negotiated_response
+
+router = APIRouter(
+    prefix="",
+    tags=["admin"],
+    route_class=NegotiatedRoute
+)
+
+# Upper bound on users per provisioning request
+MAX_BULK_USERS = 10000
+
+@router.post("/users/bulk", response_model=schemas.BulkUserResult)
+def bulk_create_users(
+    payload: schemas.BulkUserCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_admin_user)
+):
+    if len(payload.users) > MAX_BULK_USERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_USERS} users can be provisioned per request"
+        )
+    if payload.team_id is not None and db.get(models.Team, payload.team_id) is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+
+    # Reject the whole request up front if we can; users registering while the
+    # batches are written are reported with a 409 instead
+    conflicts = find_conflicts(db, payload.users)
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Emails or usernames already taken", "conflicts": conflicts[:100]}
+        )
+
+    logger.info(f"Admin {current_user.username} provisioning {len(payload.users)} users")
+    try:
+        user_ids = provision_users(
+            db,
+            payload.users,
+            team_id=payload.team_id,
+            hash_workers=settings.PASSWORD_HASH_WORKERS or None
+        )
+    except ProvisioningConflict as e:
+        # Batches are committed one by one, so say which users already exist
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Emails or usernames were taken while provisioning; the users created "
+                           "before the conflict were kept",
+                "conflicts": e.conflicts[:100],
+                "created_user_ids": e.user_ids,
+            }
+        )
+    return {"created": len(user_ids), "user_ids": user_ids}
+
+# Storage maintenance jobs an admin may start on demand (they also run every
+# MAINTENANCE_INTERVAL_HOURS); see services/retention.py
+MAINTENANCE_JOBS = ("gc_uploads", "purge_archived")
+
+@router.post("/maintenance/{kind}", status_code=202, response_model=schemas.Job)
+def run_maintenance(
+    kind: str,
+    dry_run: bool = Query(True, description="Only report what would be removed"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_admin_user)
+):
+    """Start a maintenance job; its report ends up in the job's ``result``."""
+    if kind not in MAINTENANCE_JOBS:
+        raise HTTPException(status_code=404, detail=f"Unknown maintenance job '{kind}'")
+    job = enqueue(db, kind, {"dry_run": dry_run}, max_attempts=1, created_by_id=current_user.id)
+    db.commit()
+    db.refresh(job)
+    logger.info(f"Admin {current_user.username} started {kind} (dry run: {dry_run})")
+    return negotiated_response(
+        schemas.Job.model_validate(job).model_dump(mode=dump_mode()),
+        status_code=202,
+        headers={"Location": f"/api/jobs/{job.id}"}
+    )
+
+@router.post("/board-documents/verify")
+def verify_board_documents(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_admin_user)
+):
+    """Check this process's cached board documents against the tables.
+
+    Documents that differ are evicted and listed with the differing task ids.
+    """
+    return board_documents.verify(db)
@@ -1,20 +1,23 @@
 from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 import logging
 
-from ..database import get_db
-from ..models import User, Team, Board, TeamMember, BoardMember
+from ..database import carry_stickiness, get_db
+from ..models import User
 from ..schemas import UserCreate, User as UserSchema
 from ..auth.utils import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..auth.capabilities import build_claims
+from ..auth.deps import get_current_user
+from ..services.onboarding import create_user_with_workspace
+from ..utils.invalidation import publish_after_commit
+from ..utils.wire import NegotiatedRoute
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 @router.post("/register", response_model=UserSchema)
 def register(user_data: UserCreate, db: Session = Depends(get_db)) -> Any:
@@ -34,64 +37,34 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)) -> Any:
             detail="Username already taken"
         )
     
-    # Create new user
-    user = User(
+    # Create the user with a personal team and board in one transaction
+    user = create_user_with_workspace(
+        db,
         email=user_data.email,
         username=user_data.username,
         full_name=user_data.full_name,
         hashed_password=get_password_hash(user_data.password)
     )
-    db.add(user)
+    publish_after_commit(db, "membership", user.id)
     db.commit()
-    db.refresh(user)
     logger.info(f"Created new user with ID: {user.id}")
     
-    # Create default team
-    default_team = Team(
-        name="My Team",
-        description="My personal team",
-        created_by_id=user.id
-    )
-    db.add(default_team)
-    db.commit()
-    db.refresh(default_team)
-    logger.info(f"Created default team with ID: {default_team.id}")
-    
-    # Add user as team admin
-    team_member = TeamMember(
-        team_id=default_team.id,
-        user_id=user.id,
-        role='admin'
-    )
-    db.add(team_member)
-    db.commit()
-    
-    # Create default board
-    default_board = Board(
-        name="My Board",
-        description="My personal board",
-        team_id=default_team.id,
-        created_by_id=user.id,
-        is_public=True
-    )
-    db.add(default_board)
-    db.commit()
-    db.refresh(default_board)
-    logger.info(f"Created default board with ID: {default_board.id}")
-    
-    # Add user as board admin
-    board_member = BoardMember(
-        board_id=default_board.id,
-        user_id=user.id,
-        role='admin'
-    )
-    db.add(board_member)
-    db.commit()
-    
     return user
 
+def _issue_token(db: Session, user: User) -> str:
+    data = {"sub": str(user.id)}
+    # Team and board roles let hot read paths authorize without the database
+    caps = build_claims(db, user)
+    if caps is not None:
+        data["caps"] = caps
+    return create_access_token(
+        data=data,
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
 @router.post("/login")
 def login(
+    request: Request,
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
@@ -112,13 +85,8 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=access_token_expires
-    )
-    
+    access_token = _issue_token(db, user)
+    carry_stickiness(request, access_token)
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -128,4 +96,15 @@ def login(
             "username": user.username,
             "full_name": user.full_name
         }
-    } 
\ No newline at end of file
+    }
+
+@router.post("/refresh")
+def refresh_token(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """Reissue the access token, e.g. to pick up capability claims after membership changes."""
+    access_token = _issue_token(db, current_user)
+    carry_stickiness(request, access_token)
+    return {"access_token": access_token, "token_type": "bearer"}
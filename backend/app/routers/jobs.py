@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..database import get_db
+from ..auth.deps import get_current_user
+from ..utils.wire import NegotiatedRoute
+
+router = APIRouter(
+    prefix="",
+    tags=["jobs"],
+    route_class=NegotiatedRoute
+)
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Jobs are only visible to whoever started them
+    job = db.query(models.Job).filter(
+        models.Job.id == job_id,
+        models.Job.created_by_id == current_user.id
+    ).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,102 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from typing import List, Optional
+from .. import models, schemas
+from ..database import get_db
+from ..auth.deps import get_current_user
+from ..auth.permissions import accessible_board_clause
+from ..utils.fieldsets import FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION, load_profile, select_fields
+from ..utils.wire import NegotiatedRoute, dump_mode, negotiated_response
+
+router = APIRouter(
+    prefix="",
+    tags=["me"],
+    route_class=NegotiatedRoute
+)
+
+@router.get("/notifications", response_model=List[schemas.Notification])
+def get_notifications(
+    unread_only: bool = False,
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Newest first, paginated by id over the (user_id, id) index
+    query = db.query(models.Notification).filter(models.Notification.user_id == current_user.id)
+    if unread_only:
+        query = query.filter(models.Notification.read_at.is_(None))
+    if before_id is not None:
+        query = query.filter(models.Notification.id < before_id)
+    query = query.options(*load_profile(schemas.Notification, models.Notification))
+    return query.order_by(models.Notification.id.desc()).limit(limit).all()
+
+@router.post("/notifications/{notification_id}/read", response_model=schemas.Notification)
+def mark_notification_read(
+    notification_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    notification = db.query(models.Notification).filter(
+        models.Notification.id == notification_id,
+        models.Notification.user_id == current_user.id
+    ).first()
+    if notification is None:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    
+    if notification.read_at is None:
+        notification.read_at = func.now()
+        db.commit()
+        db.refresh(notification)
+    return notification
+
+@router.get("/tasks", response_model=schemas.TaskPage)
+def get_my_tasks(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    include_archived: bool = False,
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Tasks assigned to the current user on every board they can still see, newest first."""
+    selection = select_fields(schemas.Task, models.Task, fields, include)
+    
+    # One query: walks the (user_id, task_id) index backwards, with the access
+    # check and filters applied per row
+    query = db.query(models.Task).join(
+        models.task_members, models.task_members.c.task_id == models.Task.id
+    ).join(models.Board, models.Board.id == models.Task.board_id).filter(
+        models.task_members.c.user_id == current_user.id,
+        accessible_board_clause(current_user.id)
+    )
+    if status is not None:
+        query = query.filter(models.Task.status == status)
+    if priority is not None:
+        query = query.filter(models.Task.priority == priority)
+    if due_after is not None:
+        query = query.filter(models.Task.due_date >= due_after)
+    if due_before is not None:
+        query = query.filter(models.Task.due_date < due_before)
+    if not include_archived:
+        query = query.filter(~models.Task.is_archived)
+    if before_id is not None:
+        query = query.filter(models.task_members.c.task_id < before_id)
+    query = query.options(*(selection.load_options if selection else load_profile(schemas.Task, models.Task)))
+    tasks = query.order_by(models.task_members.c.task_id.desc()).limit(limit).all()
+    next_before_id = tasks[-1].id if len(tasks) == limit else None
+    
+    if selection:
+        mode = dump_mode()
+        return negotiated_response({
+            "items": [selection.dump(task, mode) for task in tasks],
+            "next_before_id": next_before_id,
+        })
+    return schemas.TaskPage(items=tasks, next_before_id=next_before_id)
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..database import get_db
+from ..auth.deps import get_current_principal
+from ..auth.capabilities import Principal
+from ..auth.permissions import require_board_access
+from ..services.sync import current_seq
+from ..utils.fieldsets import select_fields
+from ..utils.wire import NegotiatedRoute, dump_mode, negotiated_response
+
+router = APIRouter(
+    prefix="",
+    tags=["sync"],
+    route_class=NegotiatedRoute
+)
+
+# What a delta carries per entity: tasks come with their label and assignee
+# links (relinking bumps the task), everything else as flat rows
+TASK_FIELDS = select_fields(schemas.Task, models.Task, None, "labels,assigned_to")
+COMMENT_FIELDS = select_fields(schemas.Comment, models.Comment, None, "")
+ATTACHMENT_FIELDS = select_fields(schemas.Attachment, models.Attachment, None, "")
+LABEL_FIELDS = select_fields(schemas.Label, models.Label, None, "")
+
+@router.get("/")
+def get_changes(
+    board_id: int,
+    since: int = Query(0, ge=0, description="seq of the previous response; 0 for a full sync"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Tasks, comments, attachments and labels of a board changed after ``since``,
+    plus the ids of deleted ones. Pass the returned ``seq`` as the next ``since``.
+    A deleted task implies its comments and attachments.
+    """
+    require_board_access(board_id, current_user, db)
+
+    seq, compacted_seq = current_seq(db)
+    if since > seq or 0 < since < compacted_seq:
+        raise HTTPException(
+            status_code=410,
+            detail="Changes since this point are no longer available; reload the board and sync from 0"
+        )
+
+    def changed(model, query):
+        # A full sync also returns rows written before sequences existed (change_seq 0)
+        query = query.filter(model.change_seq <= seq)
+        if since:
+            query = query.filter(model.change_seq > since)
+        return query.order_by(model.change_seq, model.id)
+
+    board_tasks = select(models.Task.id).where(models.Task.board_id == board_id)
+    tasks = changed(models.Task, db.query(models.Task).options(*TASK_FIELDS.load_options)
+                    .filter(models.Task.board_id == board_id)).all()
+    comments = changed(models.Comment, db.query(models.Comment).options(*COMMENT_FIELDS.load_options)
+                       .filter(models.Comment.task_id.in_(board_tasks))).all()
+    attachments = changed(models.Attachment, db.query(models.Attachment).options(*ATTACHMENT_FIELDS.load_options)
+                          .filter(models.Attachment.task_id.in_(board_tasks))).all()
+    labels = changed(models.Label, db.query(models.Label).options(*LABEL_FIELDS.load_options).filter(
+        models.Label.id.in_(
+            select(models.task_labels.c.label_id).where(models.task_labels.c.task_id.in_(board_tasks))
+        )
+    )).all()
+    deleted = []
+    if since:
+        deleted = db.query(models.Tombstone.entity, models.Tombstone.entity_id).filter(
+            models.Tombstone.board_id == board_id,
+            models.Tombstone.change_seq > since,
+            models.Tombstone.change_seq <= seq
+        ).order_by(models.Tombstone.change_seq, models.Tombstone.id).all()
+
+    mode = dump_mode()
+    return negotiated_response({
+        "board_id": board_id,
+        "since": since,
+        "seq": seq,
+        "tasks": [TASK_FIELDS.dump(task, mode) for task in tasks],
+        "comments": [COMMENT_FIELDS.dump(comment, mode) for comment in comments],
+        "attachments": [ATTACHMENT_FIELDS.dump(attachment, mode) for attachment in attachments],
+        "labels": [LABEL_FIELDS.dump(label, mode) for label in labels],
+        "deleted": [{"entity": entity, "id": entity_id} for entity, entity_id in deleted],
+    })
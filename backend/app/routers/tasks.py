@@ -1,60 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, Response, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.orm.exc import StaleDataError
+from typing import List, Optional
 import os
 import shutil
+import uuid
 from pathlib import Path
 from .. import models, schemas
 from ..database import get_db
-from ..auth.deps import get_current_user
-from sqlalchemy.orm import joinedload
+from ..config import settings
+from ..auth.deps import get_current_principal, get_current_user
+from ..auth.capabilities import Principal
+from ..auth.permissions import check_board_access, require_board_access, users_with_board_access
+from sqlalchemy.orm import selectinload
 from sqlalchemy import func
 from ..utils.logging import logger, debug_log
+from ..services.importer import BoardImporter, IMPORT_FORMATS, iter_cards, parse_status_map
+from ..services.exporter import EXPORT_FORMATS, MEDIA_TYPES, export_filename, stream_board_export
+from ..services.reminders import scheduler as reminder_scheduler
+from ..services.write_queue import run_write
+from ..services.board_documents import documents as board_documents
+from ..services.deletion import delete_tasks
+from ..services.sync import change_seq
+from ..services.jobs import enqueue
+from ..utils.invalidation import bus as invalidation_bus, publish_after_commit
+from ..utils.fieldsets import FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION, load_profile, load_relationship, select_fields
+from ..utils.wire import NegotiatedRoute, dump_mode, negotiated_response
 
 router = APIRouter(
     prefix="",
-    tags=["tasks"]
+    tags=["tasks"],
+    route_class=NegotiatedRoute
 )
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-def check_board_access(board_id: int, current_user: models.User, db: Session):
-    board = (
-        db.query(models.Board)
-        .filter(models.Board.id == board_id)
-        .options(
-            joinedload(models.Board.board_memberships).joinedload(models.BoardMember.user),
-            joinedload(models.Board.team)
-        )
-        .first()
+# Created at startup by the application lifespan
+UPLOAD_DIR = Path(settings.UPLOAD_DIR)
+SPOOL_DIR = Path(settings.JOB_SPOOL_DIR)
+
+def task_etag(task: models.Task) -> str:
+    return f'"{task.id}-{task.version}"'
+
+def _precondition_failed(task: models.Task) -> HTTPException:
+    # Ship the current state so the client can rebase and retry without another GET
+    return HTTPException(
+        status_code=412,
+        detail={
+            "message": "Task was modified by someone else",
+            "task": schemas.Task.model_validate(task).model_dump(mode="json"),
+        },
+        headers={"ETag": task_etag(task)}
     )
-    if not board:
-        raise HTTPException(status_code=404, detail="Board not found")
-    
-    # Check if user has access to the board
-    if not board.is_public:
-        # Check if user is a member of the board
-        is_board_member = any(
-            member.user_id == current_user.id 
-            for member in board.board_memberships
-        )
-        # Check if user is a member of the team
-        is_team_member = db.query(models.TeamMember).filter(
-            models.TeamMember.team_id == board.team_id,
-            models.TeamMember.user_id == current_user.id
-        ).first() is not None
-        
-        if not (is_board_member or is_team_member):
-            raise HTTPException(status_code=403, detail="Not authorized to access this board")
-    
-    return board
+
+def check_if_match(request: Request, task: models.Task) -> None:
+    if_match = request.headers.get("if-match")
+    if if_match is None or if_match.strip() == "*":
+        return
+    if task_etag(task) not in (tag.strip() for tag in if_match.split(",")):
+        raise _precondition_failed(task)
+
+def _lost_race(db: Session, task_id: int) -> HTTPException:
+    db.rollback()
+    current = db.query(models.Task).filter(models.Task.id == task_id).first()
+    if current is None:
+        return HTTPException(status_code=404, detail="Task not found")
+    return _precondition_failed(current)
+
+def commit_task_write(db: Session, task_id: int) -> None:
+    """Commit a task write, turning a lost version race into 412 with the winner's state."""
+    try:
+        db.commit()
+    except StaleDataError:
+        raise _lost_race(db, task_id)
+
+def _load_task(db: Session, task_id: int) -> models.Task:
+    """The task (fresh from the database) loaded for a full ``schemas.Task`` response."""
+    return db.get(models.Task, task_id, options=load_profile(schemas.Task, models.Task), populate_existing=True)
+
+def _load_task_children(db: Session, task_id: int, relationship, schema) -> models.Task:
+    """The task with one list of children loaded for ``schema``; 404 if missing."""
+    task = db.query(models.Task).filter(models.Task.id == task_id).options(
+        *load_relationship(relationship, schema)
+    ).first()
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
 
 @router.post("/", response_model=schemas.Task)
 def create_task(
     task: schemas.TaskCreate,
     board_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -64,7 +100,8 @@ def create_task(
     # Get the maximum position for tasks in the same status
     max_position = db.query(func.max(models.Task.position)).filter(
         models.Task.board_id == board_id,
-        models.Task.status == task.status
+        models.Task.status == task.status,
+        ~models.Task.is_archived
     ).scalar() or 0
     
     # Create task with position = max_position + 1
@@ -76,8 +113,11 @@ def create_task(
         position=max_position + 1
     )
     db.add(db_task)
+    publish_after_commit(db, "board", board_id)
     db.commit()
-    db.refresh(db_task)
+    db_task = _load_task(db, db_task.id)
+    reminder_scheduler.task_written(db_task.id, db_task.due_date)
+    response.headers["ETag"] = task_etag(db_task)
     return db_task
 
 @router.get("/", response_model=List[schemas.Task])
@@ -85,31 +125,92 @@ def read_tasks(
     board_id: int,
     skip: int = 0,
     limit: int = 100,
+    include_archived: bool = False,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    selection = select_fields(schemas.Task, models.Task, fields, include)
+
+    # Check board access
+    require_board_access(board_id, current_user, db)
+    
+    # The plain listing comes precomputed from the board's document
+    if (settings.BOARD_DOCUMENTS_ENABLED and selection is None and not include_archived
+            and skip >= 0 and limit >= 0 and dump_mode() == "json"):
+        body = board_documents.render(db, board_id, skip, limit)
+        if body is not None:
+            return Response(content=body, media_type="application/json")
+    
+    # Get tasks for this board; archived tasks are excluded unless asked for
+    query = db.query(models.Task).filter(models.Task.board_id == board_id)
+    if not include_archived:
+        query = query.filter(~models.Task.is_archived)
+    query = query.options(*(selection.load_options if selection else load_profile(schemas.Task, models.Task)))
+    tasks = query.order_by(models.Task.position.asc().nullsfirst(), models.Task.id).offset(skip).limit(limit).all()
+    if selection:
+        return selection.response(tasks)
+    return tasks
+
+@router.get("/archive", response_model=schemas.ArchivePage)
+def read_archive(
+    board_id: int,
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     # Check board access
-    board = check_board_access(board_id, current_user, db)
+    check_board_access(board_id, current_user, db)
+    
+    # Keyset pagination over the cold archive, newest first
+    query = db.query(models.ArchivedTask).filter(models.ArchivedTask.board_id == board_id)
+    if before_id is not None:
+        query = query.filter(models.ArchivedTask.id < before_id)
+    items = query.order_by(models.ArchivedTask.id.desc()).limit(limit).all()
+    next_before_id = items[-1].id if len(items) == limit else None
+    return schemas.ArchivePage(items=items, next_before_id=next_before_id)
+
+@router.get("/export")
+def export_tasks(
+    board_id: int,
+    format: str = Query("ndjson", enum=list(EXPORT_FORMATS)),
+    gzip: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Check board access
+    check_board_access(board_id, current_user, db)
     
-    # Get tasks for this board
-    tasks = db.query(models.Task).filter(
-        models.Task.board_id == board_id
-    ).order_by(models.Task.position).offset(skip).limit(limit).all()
-    return tasks
+    return StreamingResponse(
+        stream_board_export(board_id, format=format, compress=gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(board_id, format, gzip)}"'}
+    )
 
 @router.get("/{task_id}", response_model=schemas.Task)
 def read_task(
     task_id: int,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    selection = select_fields(schemas.Task, models.Task, fields, include, always=("board_id",))
+    query = db.query(models.Task).filter(models.Task.id == task_id)
+    query = query.options(*(selection.load_options if selection else load_profile(schemas.Task, models.Task)))
+    task = query.first()
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
     # Check board access
     check_board_access(task.board_id, current_user, db)
     
+    if selection:
+        return selection.response(task, headers={"ETag": task_etag(task)})
+    response.headers["ETag"] = task_etag(task)
     return task
 
 @router.put("/{task_id}", response_model=schemas.Task)
@@ -117,6 +218,8 @@ def read_task(
 async def update_task(
     task_id: int,
     task: schemas.TaskUpdate,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -132,6 +235,9 @@ async def update_task(
     # Check board access
     check_board_access(db_task.board_id, current_user, db)
     
+    # Reject writes based on a stale copy of the task
+    check_if_match(request, db_task)
+    
     update_data = task.model_dump(exclude_unset=True)
     
     # Handle position updates
@@ -151,15 +257,19 @@ async def update_task(
             db.query(models.Task).filter(
                 models.Task.board_id == db_task.board_id,
                 models.Task.status == old_status,
+                ~models.Task.is_archived,
                 models.Task.position > old_position
-            ).update({"position": models.Task.position - 1})
+            ).update({"position": models.Task.position - 1, "version": models.Task.version + 1,
+                      "change_seq": change_seq(db)})
             
             # Increase positions of tasks at and after the new position in the new status
             db.query(models.Task).filter(
                 models.Task.board_id == db_task.board_id,
                 models.Task.status == new_status,
+                ~models.Task.is_archived,
                 models.Task.position >= new_position
-            ).update({"position": models.Task.position + 1})
+            ).update({"position": models.Task.position + 1, "version": models.Task.version + 1,
+                      "change_seq": change_seq(db)})
         else:
             logger.debug("Moving within same status")
             # Moving within the same status
@@ -169,25 +279,50 @@ async def update_task(
                 db.query(models.Task).filter(
                     models.Task.board_id == db_task.board_id,
                     models.Task.status == old_status,
+                    ~models.Task.is_archived,
                     models.Task.position > old_position,
                     models.Task.position <= new_position
-                ).update({"position": models.Task.position - 1})
+                ).update({"position": models.Task.position - 1, "version": models.Task.version + 1,
+                          "change_seq": change_seq(db)})
             elif new_position < old_position:
                 logger.debug(f"Moving up: increasing positions between {new_position} and {old_position}")
                 # Moving up: increase positions of tasks between new and old position
                 db.query(models.Task).filter(
                     models.Task.board_id == db_task.board_id,
                     models.Task.status == old_status,
+                    ~models.Task.is_archived,
                     models.Task.position >= new_position,
                     models.Task.position < old_position
-                ).update({"position": models.Task.position + 1})
+                ).update({"position": models.Task.position + 1, "version": models.Task.version + 1,
+                          "change_seq": change_seq(db)})
+    
+    # Track when a task enters or leaves the archive
+    if 'is_archived' in update_data and update_data['is_archived'] != db_task.is_archived:
+        if update_data['is_archived']:
+            db_task.archived_at = func.now()
+        else:
+            db_task.archived_at = None
+            if 'position' not in update_data:
+                # Restored tasks go to the end of their column
+                update_data['position'] = (db.query(func.max(models.Task.position)).filter(
+                    models.Task.board_id == db_task.board_id,
+                    models.Task.status == update_data.get('status', db_task.status),
+                    ~models.Task.is_archived
+                ).scalar() or 0) + 1
     
     # Update the task with all changes
     for field, value in update_data.items():
         setattr(db_task, field, value)
     
-    db.commit()
-    db.refresh(db_task)
+    publish_after_commit(db, "board", db_task.board_id)
+    # The shifts above bump the version of every task they move, so a concurrent
+    # move that read this task before it was shifted fails here instead of
+    # writing positions computed from a stale snapshot
+    commit_task_write(db, task_id)
+    db_task = _load_task(db, task_id)
+    response.headers["ETag"] = task_etag(db_task)
+    if 'due_date' in update_data or 'is_archived' in update_data:
+        reminder_scheduler.task_written(db_task.id, db_task.due_date)
     
     logger.debug(f"Final task state: id={db_task.id}, status={db_task.status}, position={db_task.position}")
     return db_task
@@ -195,6 +330,7 @@ async def update_task(
 @router.delete("/{task_id}")
 def delete_task(
     task_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -204,11 +340,130 @@ def delete_task(
     
     # Check board access
     check_board_access(task.board_id, current_user, db)
-    
-    db.delete(task)
+    check_if_match(request, task)
+    
+    board_id, version = task.board_id, task.version
+    db.expunge(task)
+    # Only deletes the version checked above; a concurrent write wins with 412
+    if not delete_tasks(db, [task_id], version=version):
+        raise _lost_race(db, task_id)
+    publish_after_commit(db, "board", board_id)
     db.commit()
     return {"message": "Task deleted successfully"}
 
+@router.post("/import", response_model=schemas.ImportResult)
+def import_tasks(
+    board_id: int,
+    file: UploadFile = File(...),
+    format: str = Query("csv", enum=list(IMPORT_FORMATS)),
+    status_map: str = Query(None, description="List name to status overrides, e.g. 'Backlog=todo,Doing=in_progress'"),
+    background: bool = Query(False, description="Import in a background job and answer 202 with the job"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Check board access
+    check_board_access(board_id, current_user, db)
+    
+    if background:
+        try:
+            mapping = parse_status_map(status_map)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # The request's spooled upload is deleted with the request, so the job gets a copy
+        path = SPOOL_DIR / f"import-{uuid.uuid4().hex}"
+        with path.open("wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        job = enqueue(db, "import_board", {
+            "board_id": board_id,
+            "user_id": current_user.id,
+            "path": str(path.resolve()),
+            "format": format,
+            "status_map": mapping,
+        }, max_attempts=1, created_by_id=current_user.id)
+        db.commit()
+        return negotiated_response(
+            schemas.Job.model_validate(job).model_dump(mode=dump_mode()),
+            status_code=202,
+            headers={"Location": f"/api/jobs/{job.id}"}
+        )
+    
+    try:
+        mapping = parse_status_map(status_map)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    importer = BoardImporter(db, board_id, current_user.id, status_map=mapping)
+    try:
+        # The upload is spooled to disk, so cards are streamed from it chunk by chunk
+        stats = importer.run(
+            iter_cards(file.file, format),
+            progress=lambda stats: logger.info(f"Import into board {board_id}: {stats['tasks']} cards")
+        )
+    except ValueError as e:
+        # The message says how many cards were committed before the bad one
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if importer.stats["tasks"]:
+            # Bulk inserts bypass the per-task hooks, so reload the reminder window
+            reminder_scheduler.rescan()
+            # Chunks were committed by the importer itself
+            invalidation_bus.publish("board", board_id)
+    return schemas.ImportResult(board_id=board_id, **stats)
+
+@router.post("/assignments", response_model=schemas.AssignmentResult)
+def update_assignments(
+    update: schemas.AssignmentUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Assign and unassign users on several tasks at once; already (un)assigned pairs are skipped."""
+    task_ids = list(dict.fromkeys(update.task_ids))
+    assign = set(update.assign)
+    unassign = set(update.unassign)
+    if assign & unassign:
+        raise HTTPException(status_code=400, detail="A user cannot be assigned and unassigned at once")
+    
+    tasks = db.query(models.Task).options(selectinload(models.Task.assigned_to)).filter(
+        models.Task.id.in_(task_ids)
+    ).all()
+    missing = set(task_ids) - {task.id for task in tasks}
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Task {min(missing)} not found")
+    
+    # Check board access, once per board
+    boards = [check_board_access(board_id, current_user, db) for board_id in sorted({task.board_id for task in tasks})]
+    
+    users = {}
+    if assign:
+        users = {user.id: user for user in db.query(models.User).filter(models.User.id.in_(assign))}
+        unknown = assign - users.keys()
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"User {min(unknown)} not found")
+        # Assignees must be able to see the task
+        for board in boards:
+            outsiders = assign - users_with_board_access(db, board, assign)
+            if outsiders:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"User {min(outsiders)} has no access to board {board.id}"
+                )
+    
+    assigned = unassigned = 0
+    for task in tasks:
+        current = {user.id for user in task.assigned_to}
+        for user_id in sorted(assign - current):
+            task.assigned_to.append(users[user_id])
+            assigned += 1
+        for user in [user for user in task.assigned_to if user.id in unassign]:
+            task.assigned_to.remove(user)
+            unassigned += 1
+    
+    # The tasks themselves are bumped (version, change_seq) by the flush
+    for board in boards:
+        publish_after_commit(db, "board", board.id)
+    db.commit()
+    return schemas.AssignmentResult(task_ids=task_ids, assigned=assigned, unassigned=unassigned)
+
 @router.post("/{task_id}/labels/", response_model=schemas.Label)
 def add_label(task_id: int, label: schemas.LabelCreate, db: Session = Depends(get_db)):
     task = db.query(models.Task).filter(models.Task.id == task_id).first()
@@ -229,16 +484,14 @@ def add_label(task_id: int, label: schemas.LabelCreate, db: Session = Depends(ge
         db.flush()
         task.labels.append(new_label)
     
+    publish_after_commit(db, "board", task.board_id)
     db.commit()
     db.refresh(task)
     return task.labels[-1]
 
 @router.get("/{task_id}/labels/", response_model=List[schemas.Label])
 def get_task_labels(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return task.labels
+    return _load_task_children(db, task_id, models.Task.labels, schemas.Label).labels
 
 @router.delete("/{task_id}/labels/{label_id}")
 def remove_label(task_id: int, label_id: int, db: Session = Depends(get_db)):
@@ -251,6 +504,7 @@ def remove_label(task_id: int, label_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Label not found")
     
     task.labels.remove(label)
+    publish_after_commit(db, "board", task.board_id)
     db.commit()
     return {"message": "Label removed successfully"}
 
@@ -290,6 +544,7 @@ def add_attachment(
         )
         
         db.add(attachment)
+        publish_after_commit(db, "board", task.board_id)
         db.commit()
         db.refresh(attachment)
         
@@ -305,10 +560,7 @@ def add_attachment(
 
 @router.get("/{task_id}/attachments/", response_model=List[schemas.Attachment])
 def get_task_attachments(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return task.attachments
+    return _load_task_children(db, task_id, models.Task.attachments, schemas.Attachment).attachments
 
 @router.post("/{task_id}/comments/", response_model=schemas.Comment)
 def add_comment(
@@ -317,31 +569,33 @@ def add_comment(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    # Check if task exists
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    # Create comment
-    db_comment = models.Comment(
-        content=comment.content,
-        task_id=task_id,
-        user_id=current_user.id,
-        user=current_user  # Explicitly set the user relationship
-    )
-    
-    db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
-    
-    return db_comment
+    user_id = current_user.id
+
+    def write(db: Session) -> schemas.Comment:
+        # Check if task exists
+        task = db.query(models.Task).filter(models.Task.id == task_id).first()
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+        # Create comment
+        db_comment = models.Comment(
+            content=comment.content,
+            task_id=task_id,
+            user_id=user_id
+        )
+
+        db.add(db_comment)
+        publish_after_commit(db, "board", task.board_id)
+        db.flush()
+        db_comment = db.get(models.Comment, db_comment.id,
+                            options=load_profile(schemas.Comment, models.Comment), populate_existing=True)
+        return schemas.Comment.model_validate(db_comment)
+
+    return run_write(db, write)
 
 @router.get("/{task_id}/comments/", response_model=List[schemas.Comment])
 def get_task_comments(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    return task.comments
+    return _load_task_children(db, task_id, models.Task.comments, schemas.Comment).comments
 
 @router.delete("/{task_id}/comments/{comment_id}")
 def delete_comment(
@@ -369,6 +623,7 @@ def delete_comment(
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
     
     db.delete(comment)
+    publish_after_commit(db, "board", task.board_id)
     db.commit()
     return {"message": "Comment deleted successfully"}
 
@@ -378,36 +633,34 @@ def add_checklist_item(
     item: schemas.ChecklistItemCreate,
     db: Session = Depends(get_db)
 ):
-    # Check if task exists
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    # Get current checklist
-    current_checklist = task.checklist or []
-    
-    # Generate new ID (max ID + 1)
-    new_id = 1
-    if current_checklist:
-        new_id = max(item["id"] for item in current_checklist) + 1
-    
-    # Create new checklist item
-    new_item = {
-        "id": new_id,
-        "content": item.content,
-        "is_completed": False
-    }
-    
-    # Create a new list with all items
-    updated_checklist = current_checklist + [new_item]
-    
-    # Update task
-    task.checklist = updated_checklist
-    db.commit()
-    db.refresh(task)
-    
-    # Convert to schema and return
-    return schemas.Task.model_validate(task)
+    def write(db: Session) -> schemas.Task:
+        # Check if task exists
+        task = db.query(models.Task).filter(models.Task.id == task_id).first()
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+        # Get current checklist
+        current_checklist = task.checklist or []
+
+        # Generate new ID (max ID + 1)
+        new_id = 1
+        if current_checklist:
+            new_id = max(item["id"] for item in current_checklist) + 1
+
+        # Create new checklist item
+        new_item = {
+            "id": new_id,
+            "content": item.content,
+            "is_completed": False
+        }
+
+        # Update task with a new list so the change is detected
+        task.checklist = current_checklist + [new_item]
+        publish_after_commit(db, "board", task.board_id)
+        db.flush()
+        return schemas.Task.model_validate(_load_task(db, task_id))
+
+    return run_write(db, write)
 
 @router.put("/{task_id}/checklist/{item_id}/toggle/", response_model=schemas.Task)
 def toggle_checklist_item(
@@ -415,34 +668,29 @@ def toggle_checklist_item(
     item_id: int,
     db: Session = Depends(get_db)
 ):
-    # Check if task exists
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    # Get current checklist
-    current_checklist = task.checklist or []
-    
-    # Find and toggle the item
-    item_found = False
-    updated_checklist = []
-    for item in current_checklist:
-        if item["id"] == item_id:
-            # Create a new dictionary with the toggled state
+    def write(db: Session) -> schemas.Task:
+        # Check if task exists
+        task = db.query(models.Task).filter(models.Task.id == task_id).first()
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+        # Find and toggle the item
+        item_found = False
+        updated_checklist = []
+        for item in task.checklist or []:
             updated_item = dict(item)
-            updated_item["is_completed"] = not item["is_completed"]
+            if item["id"] == item_id:
+                updated_item["is_completed"] = not item["is_completed"]
+                item_found = True
             updated_checklist.append(updated_item)
-            item_found = True
-        else:
-            updated_checklist.append(dict(item))
-    
-    if not item_found:
-        raise HTTPException(status_code=404, detail="Checklist item not found")
-    
-    # Update task with the new checklist
-    task.checklist = updated_checklist
-    db.commit()
-    db.refresh(task)
-    
-    # Convert to schema and return
-    return schemas.Task.model_validate(task) 
\ No newline at end of file
+
+        if not item_found:
+            raise HTTPException(status_code=404, detail="Checklist item not found")
+
+        # Update task with the new checklist
+        task.checklist = updated_checklist
+        publish_after_commit(db, "board", task.board_id)
+        db.flush()
+        return schemas.Task.model_validate(_load_task(db, task_id))
+
+    return run_write(db, write)
@@ -1,19 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session, with_expression
+from typing import List, Optional
+import hashlib
 import logging
+from ..config import settings
 from ..database import get_db
 from .. import models, schemas
-from ..auth.deps import get_current_user
-from sqlalchemy.orm import joinedload
+from ..auth.deps import get_current_principal, get_current_user
+from ..auth.capabilities import Principal, membership_changed
+from ..auth.permissions import (
+    board_role, check_board_access, is_board_member, is_team_member, require_board_admin, require_team_member
+)
+from ..services.board_documents import documents as board_documents
+from ..services.cloning import clone_board
+from ..services.deletion import purge_board
+from ..services.jobs import enqueue
+from ..utils.fieldsets import FIELDS_DESCRIPTION, INCLUDE_DESCRIPTION, load_profile, select_fields
+from ..utils.invalidation import publish_after_commit
+from ..utils.wire import NegotiatedRoute, dump_mode, negotiated_response
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="",
-    tags=["teams"]
+    tags=["teams"],
+    route_class=NegotiatedRoute
 )
 
 # Team endpoints
@@ -32,106 +44,106 @@ def create_team(
     # Add creator as team admin
     team_member = models.TeamMember(team_id=db_team.id, user_id=current_user.id, role='admin')
     db.add(team_member)
+    publish_after_commit(db, "team", db_team.id)
+    membership_changed(db, current_user.id)
     db.commit()
     
     logger.info(f"Team created successfully with ID: {db_team.id}")
-    return db_team
+    return db.get(models.Team, db_team.id, options=load_profile(schemas.Team, models.Team), populate_existing=True)
+
+def _bump_membership_version(db: Session, team_id: int) -> None:
+    db.query(models.Team).filter(models.Team.id == team_id).update(
+        {models.Team.membership_version: models.Team.membership_version + 1},
+        synchronize_session=False
+    )
+
+def _etag(*parts) -> str:
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest()[:20] + '"'
 
-@router.get("/", response_model=List[schemas.Team])
+@router.get("/", response_model=List[schemas.TeamSummary])
 def get_user_teams(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    logger.info(f"Getting teams for user ID: {current_user.id}")
-    logger.info(f"Current user details: {current_user.email}, {current_user.username}")
-    try:
-        # First check if the user exists in the team_members table
-        team_member_exists = db.query(models.TeamMember).filter(
-            models.TeamMember.user_id == current_user.id
-        ).first()
-        
-        logger.info(f"Team member exists: {team_member_exists is not None}")
-        
-        # Get teams with relationships loaded
-        query = (
-            db.query(models.Team)
-            .join(models.TeamMember)
-            .filter(models.TeamMember.user_id == current_user.id)
-            .options(
-                joinedload(models.Team.team_memberships).joinedload(models.TeamMember.user),
-                joinedload(models.Team.created_by)
-            )
-        )
-        
-        # Log the SQL query
-        logger.info(f"SQL Query: {str(query)}")
-        
-        teams = query.all()
-        
-        if not teams:
-            logger.warning(f"No teams found for user {current_user.id}")
-            # Create a default team for the user
-            default_team = models.Team(
-                name="My Team",
-                description="My personal team",
-                created_by_id=current_user.id
-            )
-            db.add(default_team)
-            db.commit()
-            db.refresh(default_team)
-            
-            # Add user as team admin
-            team_member = models.TeamMember(
-                team_id=default_team.id,
-                user_id=current_user.id,
-                role='admin'
-            )
-            db.add(team_member)
-            db.commit()
-            
-            # Reload the team with all relationships
-            teams = [
-                db.query(models.Team)
-                .filter(models.Team.id == default_team.id)
-                .options(
-                    joinedload(models.Team.team_memberships).joinedload(models.TeamMember.user),
-                    joinedload(models.Team.created_by)
-                )
-                .first()
-            ]
-        
-        logger.info(f"Found {len(teams)} teams for user {current_user.id}")
-        for team in teams:
-            logger.info(f"Team: {team.id} - {team.name}")
-            logger.info(f"Team memberships: {len(team.team_memberships)}")
-            for member in team.team_memberships:
-                logger.info(f"  Member: {member.user.username} (role: {member.role})")
-        
-        return teams
-    except Exception as e:
-        logger.error(f"Error getting teams for user {current_user.id}: {str(e)}")
-        logger.exception(e)  # This will log the full stack trace
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error retrieving teams: {str(e)}"
+    # The listing only changes when the user's teams or their memberships change,
+    # so the ETag is derived from (team id, membership version) pairs alone
+    versions = (
+        db.query(models.Team.id, models.Team.membership_version)
+        .join(models.TeamMember, models.TeamMember.team_id == models.Team.id)
+        .filter(models.TeamMember.user_id == current_user.id)
+        .order_by(models.Team.id)
+        .all()
+    )
+    etag = _etag("teams", current_user.id, [tuple(row) for row in versions])
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    member_count = (
+        select(func.count())
+        .where(models.TeamMember.team_id == models.Team.id)
+        .correlate(models.Team)
+        .scalar_subquery()
+    )
+    return (
+        db.query(models.Team)
+        .join(models.TeamMember, models.TeamMember.team_id == models.Team.id)
+        .filter(models.TeamMember.user_id == current_user.id)
+        .options(
+            with_expression(models.Team.member_count, member_count),
+            with_expression(models.Team.current_user_role, models.TeamMember.role),
+            *load_profile(schemas.TeamSummary, models.Team)
         )
+        .order_by(models.Team.id)
+        .all()
+    )
+
+@router.get("/{team_id}/members", response_model=List[schemas.TeamMember])
+def get_team_members(
+    team_id: int,
+    request: Request,
+    response: Response,
+    after_user_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    require_team_member(db, team_id, current_user)
+    team = db.get(models.Team, team_id)
+
+    etag = _etag("members", team_id, team.membership_version, after_user_id, limit)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    # Keyset pagination over the (team_id, user_id) primary key
+    query = (
+        db.query(models.TeamMember)
+        .filter(models.TeamMember.team_id == team_id)
+        .options(*load_profile(schemas.TeamMember, models.TeamMember))
+    )
+    if after_user_id is not None:
+        query = query.filter(models.TeamMember.user_id > after_user_id)
+    return query.order_by(models.TeamMember.user_id).limit(limit).all()
 
 @router.get("/{team_id}", response_model=schemas.Team)
 def get_team(
     team_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     logger.info(f"Getting team {team_id} for user {current_user.id}")
-    team = db.query(models.Team).filter(models.Team.id == team_id).first()
-    if not team:
-        logger.warning(f"Team {team_id} not found")
-        raise HTTPException(status_code=404, detail="Team not found")
-    
-    # Check if user is a member of the team
-    if current_user not in team.members:
-        logger.warning(f"User {current_user.id} is not a member of team {team_id}")
-        raise HTTPException(status_code=403, detail="Not a member of this team")
+    selection = select_fields(schemas.Team, models.Team, fields, include)
+    require_team_member(db, team_id, current_user)
+    team = db.query(models.Team).filter(models.Team.id == team_id).options(
+        *(selection.load_options if selection else load_profile(schemas.Team, models.Team))
+    ).first()
+    if selection:
+        return selection.response(team)
     
     logger.info(f"Successfully retrieved team {team_id}")
     return team
@@ -143,30 +155,17 @@ def add_team_member(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    team = db.query(models.Team).filter(models.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-    
     # Check if current user is team admin
-    team_member = db.query(models.TeamMember).filter(
-        models.TeamMember.team_id == team_id,
-        models.TeamMember.user_id == current_user.id,
-        models.TeamMember.role == 'admin'
-    ).first()
-    if not team_member:
+    if require_team_member(db, team_id, current_user) != 'admin':
         raise HTTPException(status_code=403, detail="Only team admins can add members")
     
     # Check if user exists
-    user = db.query(models.User).filter(models.User.id == member.user_id).first()
+    user = db.get(models.User, member.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check if user is already a member
-    existing_member = db.query(models.TeamMember).filter(
-        models.TeamMember.team_id == team_id,
-        models.TeamMember.user_id == member.user_id
-    ).first()
-    if existing_member:
+    if is_team_member(db, team_id, member.user_id):
         raise HTTPException(status_code=400, detail="User is already a team member")
     
     db_member = models.TeamMember(
@@ -175,10 +174,13 @@ def add_team_member(
         role=member.role
     )
     db.add(db_member)
+    _bump_membership_version(db, team_id)
+    publish_after_commit(db, "team", team_id)
+    membership_changed(db, member.user_id)
     db.commit()
-    db.refresh(db_member)
     
-    return db_member
+    return db.get(models.TeamMember, (team_id, member.user_id),
+                  options=load_profile(schemas.TeamMember, models.TeamMember), populate_existing=True)
 
 @router.delete("/{team_id}/members/{user_id}")
 def remove_team_member(
@@ -187,17 +189,8 @@ def remove_team_member(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    team = db.query(models.Team).filter(models.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-    
     # Check if current user is team admin
-    team_member = db.query(models.TeamMember).filter(
-        models.TeamMember.team_id == team_id,
-        models.TeamMember.user_id == current_user.id,
-        models.TeamMember.role == 'admin'
-    ).first()
-    if not team_member:
+    if require_team_member(db, team_id, current_user) != 'admin':
         raise HTTPException(status_code=403, detail="Only team admins can remove members")
     
     # Cannot remove the last admin
@@ -217,10 +210,53 @@ def remove_team_member(
         raise HTTPException(status_code=404, detail="Member not found")
     
     db.delete(member_to_remove)
+    _bump_membership_version(db, team_id)
+    publish_after_commit(db, "team", team_id)
+    membership_changed(db, user_id)
     db.commit()
     
     return {"message": "Member removed successfully"}
 
+@router.delete("/{team_id}")
+def delete_team(
+    team_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Delete a team with its boards. The team and its memberships go at once;
+    the boards are hidden and detached right away and deleted by background jobs.
+    """
+    if require_team_member(db, team_id, current_user) != 'admin':
+        raise HTTPException(status_code=403, detail="Only team admins can delete the team")
+    
+    board_ids = db.execute(
+        select(models.Board.id).where(models.Board.team_id == team_id)
+    ).scalars().all()
+    # Everyone whose token may carry a role on the team or one of its boards
+    affected = set(db.execute(
+        select(models.TeamMember.user_id).where(models.TeamMember.team_id == team_id)
+        .union(select(models.BoardMember.user_id).where(models.BoardMember.board_id.in_(board_ids)))
+    ).scalars())
+    
+    db.execute(
+        update(models.Board)
+        .where(models.Board.team_id == team_id)
+        .values(team_id=None, deleted_at=func.coalesce(models.Board.deleted_at, func.now()))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(delete(models.TeamMember).where(models.TeamMember.team_id == team_id))
+    db.execute(delete(models.Team).where(models.Team.id == team_id))
+    for board_id in board_ids:
+        enqueue(db, "delete_board", {"board_id": board_id}, created_by_id=current_user.id)
+        publish_after_commit(db, "board", board_id)
+    publish_after_commit(db, "team", team_id)
+    for user_id in affected:
+        membership_changed(db, user_id)
+    db.commit()
+    
+    logger.info(f"Deleted team {team_id}; {len(board_ids)} boards queued for deletion")
+    return {"message": "Team deleted successfully"}
+
 # Board endpoints
 @router.post("/{team_id}/boards", response_model=schemas.Board)
 def create_board(
@@ -229,13 +265,8 @@ def create_board(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    team = db.query(models.Team).filter(models.Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-    
     # Check if user is a member of the team
-    if current_user not in team.members:
-        raise HTTPException(status_code=403, detail="Not a member of this team")
+    require_team_member(db, team_id, current_user)
     
     db_board = models.Board(**board.dict(), created_by_id=current_user.id)
     db.add(db_board)
@@ -245,42 +276,73 @@ def create_board(
     # Add creator as board admin
     board_member = models.BoardMember(board_id=db_board.id, user_id=current_user.id, role='admin')
     db.add(board_member)
+    publish_after_commit(db, "team", team_id)
+    publish_after_commit(db, "board", db_board.id)
+    membership_changed(db, current_user.id)
     db.commit()
     
-    return db_board
+    return db.get(models.Board, db_board.id, options=load_profile(schemas.Board, models.Board), populate_existing=True)
+
+@router.post("/{team_id}/boards/{board_id}/clone", response_model=schemas.Board)
+def clone_team_board(
+    team_id: int,
+    board_id: int,
+    clone: schemas.BoardClone,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Copy a board (e.g. a template) with its cards; see services/cloning.py."""
+    source = check_board_access(board_id, current_user, db)
+    if source.team_id != team_id:
+        raise HTTPException(status_code=404, detail="Board not found")
+    target_team_id = clone.team_id if clone.team_id is not None else team_id
+    require_team_member(db, target_team_id, current_user)
+    
+    board = clone_board(
+        db, source, current_user.id,
+        team_id=target_team_id,
+        name=clone.name,
+        is_template=clone.is_template,
+        include_members=clone.include_members,
+        include_archived=clone.include_archived,
+    )
+    db.commit()
+    logger.info(f"Cloned board {board_id} into board {board.id}")
+    return db.get(models.Board, board.id, options=load_profile(schemas.Board, models.Board), populate_existing=True)
 
 @router.get("/{team_id}/boards", response_model=List[schemas.Board])
 def get_team_boards(
     team_id: int,
+    is_template: Optional[bool] = Query(None, description="Only templates (true) or only regular boards (false)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     try:
         logger.info(f"Getting boards for team {team_id}")
-        team = (
-            db.query(models.Team)
-            .filter(models.Team.id == team_id)
-            .options(joinedload(models.Team.members))
-            .first()
-        )
-        if not team:
-            logger.warning(f"Team {team_id} not found")
-            raise HTTPException(status_code=404, detail="Team not found")
-        
+        selection = select_fields(schemas.Board, models.Board, fields, include)
         # Check if user is a member of the team
-        if current_user not in team.members:
-            logger.warning(f"User {current_user.id} is not a member of team {team_id}")
-            raise HTTPException(status_code=403, detail="Not a member of this team")
+        require_team_member(db, team_id, current_user)
+        
+        filters = [models.Board.team_id == team_id, models.Board.deleted_at.is_(None)]
+        if is_template is not None:
+            filters.append(models.Board.is_template.is_(is_template))
         
+        if selection:
+            boards = (
+                db.query(models.Board)
+                .filter(*filters)
+                .options(*selection.load_options)
+                .all()
+            )
+            return selection.response(boards)
+
         # Get boards with relationships loaded
         boards = (
             db.query(models.Board)
-            .filter(models.Board.team_id == team_id)
-            .options(
-                joinedload(models.Board.board_memberships).joinedload(models.BoardMember.user),
-                joinedload(models.Board.created_by),
-                joinedload(models.Board.team)
-            )
+            .filter(*filters)
+            .options(*load_profile(schemas.Board, models.Board))
             .all()
         )
         
@@ -306,21 +368,84 @@ def get_team_boards(
 def get_board(
     team_id: int,
     board_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    board = db.query(models.Board).filter(
+    selection = select_fields(schemas.Board, models.Board, fields, include, always=("is_public",))
+    query = db.query(models.Board).filter(
         models.Board.id == board_id,
-        models.Board.team_id == team_id
-    ).first()
+        models.Board.team_id == team_id,
+        models.Board.deleted_at.is_(None)
+    )
+    if selection:
+        query = query.options(*selection.load_options)
+    board = query.first()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     
     # Check if user has access to the board
-    if not board.is_public and current_user not in board.members:
+    if not board.is_public and not is_board_member(db, board_id, current_user):
         raise HTTPException(status_code=403, detail="Not authorized to access this board")
     
-    return board
+    if selection:
+        return selection.response(board)
+    if settings.BOARD_DOCUMENTS_ENABLED and dump_mode() == "json":
+        body = board_documents.board(db, board_id)
+        if body is not None:
+            return Response(content=body, media_type="application/json")
+    return db.get(models.Board, board_id, options=load_profile(schemas.Board, models.Board), populate_existing=True)
+
+@router.delete("/{team_id}/boards/{board_id}")
+def delete_board(
+    team_id: int,
+    board_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Delete a board with everything on it (board or team admins).
+
+    The board disappears at once. Boards with more than BOARD_DELETE_CHUNK_SIZE
+    tasks are then deleted by a background job, answering 202 with the job.
+    """
+    board = db.query(models.Board).filter(
+        models.Board.id == board_id,
+        models.Board.team_id == team_id,
+        models.Board.deleted_at.is_(None)
+    ).first()
+    if not board:
+        raise HTTPException(status_code=404, detail="Board not found")
+    if board_role(db, board_id, current_user.id) != 'admin' and \
+            require_team_member(db, team_id, current_user) != 'admin':
+        raise HTTPException(status_code=403, detail="Only board or team admins can delete the board")
+    
+    board.deleted_at = func.now()
+    publish_after_commit(db, "team", team_id)
+    publish_after_commit(db, "board", board_id)
+    for user_id in db.execute(
+        select(models.BoardMember.user_id).where(models.BoardMember.board_id == board_id)
+    ).scalars().all():
+        membership_changed(db, user_id)
+    
+    task_count = db.query(func.count(models.Task.id)).filter(models.Task.board_id == board_id).scalar()
+    if task_count > settings.BOARD_DELETE_CHUNK_SIZE:
+        # No idempotency key: SQLite reuses the ids of deleted boards, and
+        # deleted_at already keeps a second request from getting this far
+        job = enqueue(db, "delete_board", {"board_id": board_id}, created_by_id=current_user.id)
+        db.commit()
+        db.refresh(job)
+        return negotiated_response(
+            schemas.Job.model_validate(job).model_dump(mode=dump_mode()),
+            status_code=202,
+            headers={"Location": f"/api/jobs/{job.id}"}
+        )
+    
+    db.flush()
+    db.expunge(board)
+    purge_board(db, board_id)
+    logger.info(f"Deleted board {board_id} with {task_count} tasks")
+    return {"message": "Board deleted successfully"}
 
 @router.post("/{team_id}/boards/{board_id}/members", response_model=schemas.BoardMember)
 def add_board_member(
@@ -332,34 +457,21 @@ def add_board_member(
 ):
     board = db.query(models.Board).filter(
         models.Board.id == board_id,
-        models.Board.team_id == team_id
+        models.Board.team_id == team_id,
+        models.Board.deleted_at.is_(None)
     ).first()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     
     # Check if current user is board admin
-    board_member = db.query(models.BoardMember).filter(
-        models.BoardMember.board_id == board_id,
-        models.BoardMember.user_id == current_user.id,
-        models.BoardMember.role == 'admin'
-    ).first()
-    if not board_member:
-        raise HTTPException(status_code=403, detail="Only board admins can add members")
+    require_board_admin(db, board_id, current_user, "Only board admins can add members")
     
     # Check if user is a team member
-    team_member = db.query(models.TeamMember).filter(
-        models.TeamMember.team_id == team_id,
-        models.TeamMember.user_id == member.user_id
-    ).first()
-    if not team_member:
+    if not is_team_member(db, team_id, member.user_id):
         raise HTTPException(status_code=400, detail="User must be a team member first")
     
     # Check if user is already a board member
-    existing_member = db.query(models.BoardMember).filter(
-        models.BoardMember.board_id == board_id,
-        models.BoardMember.user_id == member.user_id
-    ).first()
-    if existing_member:
+    if board_role(db, board_id, member.user_id) is not None:
         raise HTTPException(status_code=400, detail="User is already a board member")
     
     db_member = models.BoardMember(
@@ -368,10 +480,12 @@ def add_board_member(
         role=member.role
     )
     db.add(db_member)
+    publish_after_commit(db, "board", board_id)
+    membership_changed(db, member.user_id)
     db.commit()
-    db.refresh(db_member)
     
-    return db_member
+    return db.get(models.BoardMember, (board_id, member.user_id),
+                  options=load_profile(schemas.BoardMember, models.BoardMember), populate_existing=True)
 
 @router.delete("/{team_id}/boards/{board_id}/members/{user_id}")
 def remove_board_member(
@@ -383,19 +497,14 @@ def remove_board_member(
 ):
     board = db.query(models.Board).filter(
         models.Board.id == board_id,
-        models.Board.team_id == team_id
+        models.Board.team_id == team_id,
+        models.Board.deleted_at.is_(None)
     ).first()
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
     
     # Check if current user is board admin
-    board_member = db.query(models.BoardMember).filter(
-        models.BoardMember.board_id == board_id,
-        models.BoardMember.user_id == current_user.id,
-        models.BoardMember.role == 'admin'
-    ).first()
-    if not board_member:
-        raise HTTPException(status_code=403, detail="Only board admins can remove members")
+    require_board_admin(db, board_id, current_user, "Only board admins can remove members")
     
     # Cannot remove the last admin
     admin_count = db.query(models.BoardMember).filter(
@@ -414,6 +523,8 @@ def remove_board_member(
         raise HTTPException(status_code=404, detail="Member not found")
     
     db.delete(member_to_remove)
+    publish_after_commit(db, "board", board_id)
+    membership_changed(db, user_id)
     db.commit()
     
     return {"message": "Member removed successfully"} 
\ No newline at end of file
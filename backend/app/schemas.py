@@ -15,7 +15,7 @@ class User(UserBase):
     id: int
     created_at: datetime
 
-    @field_serializer('created_at')
+    @field_serializer('created_at', when_used='json')
     def serialize_datetime(self, dt: datetime) -> str:
         return dt.isoformat()
 
@@ -54,7 +54,22 @@ class Team(TeamBase):
     team_memberships: List[TeamMember] = []
     created_by: User
 
-    @field_serializer('created_at')
+    @field_serializer('created_at', when_used='json')
+    def serialize_datetime(self, dt: datetime) -> str:
+        return dt.isoformat()
+
+    class Config:
+        from_attributes = True
+
+class TeamSummary(TeamBase):
+    id: int
+    created_at: datetime
+    created_by_id: int
+    created_by: User
+    member_count: int
+    current_user_role: str
+
+    @field_serializer('created_at', when_used='json')
     def serialize_datetime(self, dt: datetime) -> str:
         return dt.isoformat()
 
@@ -83,10 +98,18 @@ class BoardBase(BaseModel):
     name: str
     description: Optional[str] = None
     is_public: bool = False
+    is_template: bool = False
 
 class BoardCreate(BoardBase):
     team_id: int
 
+class BoardClone(BaseModel):
+    name: Optional[str] = None  # Defaults to the source name with " (copy)"
+    team_id: Optional[int] = None  # Target team; defaults to the source board's team
+    is_template: bool = False
+    include_members: bool = False  # Copy the board memberships as well
+    include_archived: bool = False
+
 class Board(BoardBase):
     id: int
     created_at: datetime
@@ -96,7 +119,7 @@ class Board(BoardBase):
     created_by: User
     team: Team
 
-    @field_serializer('created_at')
+    @field_serializer('created_at', when_used='json')
     def serialize_datetime(self, dt: datetime) -> str:
         return dt.isoformat()
 
@@ -130,7 +153,7 @@ class Comment(CommentBase):
     user_id: int
     user_name: str
 
-    @field_serializer('created_at', 'updated_at')
+    @field_serializer('created_at', 'updated_at', when_used='json')
     def serialize_datetime(self, dt: Optional[datetime]) -> Optional[str]:
         if dt is None:
             return None
@@ -153,7 +176,7 @@ class Attachment(AttachmentBase):
     task_id: int
     user_id: Optional[int] = None
 
-    @field_serializer('created_at')
+    @field_serializer('created_at', when_used='json')
     def serialize_datetime(self, dt: datetime) -> str:
         return dt.isoformat()
 
@@ -228,6 +251,8 @@ class Task(TaskBase):
     creator_id: Optional[int] = None
     board_id: int
     is_archived: bool = False
+    archived_at: Optional[datetime] = None
+    version: int = 1
     creator: Optional[User] = None
     board: Board
     assigned_to: List[User] = []
@@ -236,13 +261,13 @@ class Task(TaskBase):
     attachments: List[Attachment] = []
     checklist: List[ChecklistItem] = []
 
-    @field_serializer('due_date')
+    @field_serializer('due_date', when_used='json')
     def serialize_due_date(self, due_date: Optional[datetime]) -> Optional[str]:
         if due_date is None:
             return None
         return due_date.strftime('%Y-%m-%d')
 
-    @field_serializer('created_at', 'updated_at')
+    @field_serializer('created_at', 'updated_at', 'archived_at', when_used='json')
     def serialize_datetime(self, dt: Optional[datetime]) -> Optional[str]:
         if dt is None:
             return None
@@ -273,4 +298,106 @@ class TaskWithDetails(Task):
         "total": 0,
         "completed": 0,
         "percentage": 0
-    } 
\ No newline at end of file
+    } 
+
+class AssignmentUpdate(BaseModel):
+    task_ids: List[int]
+    assign: List[int] = []  # User ids to add to every task
+    unassign: List[int] = []  # User ids to remove from every task
+
+    @validator('task_ids')
+    def validate_task_ids(cls, v):
+        if not v:
+            raise ValueError('At least one task id is required')
+        if len(v) > 500:
+            raise ValueError('At most 500 tasks per request')
+        return v
+
+class AssignmentResult(BaseModel):
+    task_ids: List[int]
+    assigned: int  # Assignments created
+    unassigned: int  # Assignments removed
+
+class TaskPage(BaseModel):
+    items: List[Task]
+    next_before_id: Optional[int] = None
+
+class ArchivedTask(BaseModel):
+    id: int
+    board_id: int
+    title: str
+    description: Optional[str] = None
+    status: str
+    priority: Optional[str] = None
+    due_date: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+    moved_at: Optional[datetime] = None
+    creator_id: Optional[int] = None
+    data: Dict[str, Any] = {}
+
+    @field_serializer('due_date', 'created_at', 'archived_at', 'moved_at', when_used='json')
+    def serialize_datetime(self, dt: Optional[datetime]) -> Optional[str]:
+        if dt is None:
+            return None
+        return dt.isoformat()
+
+    class Config:
+        from_attributes = True
+
+class ArchivePage(BaseModel):
+    items: List[ArchivedTask]
+    next_before_id: Optional[int] = None
+
+class Notification(BaseModel):
+    id: int
+    task_id: int
+    kind: str
+    due_date: datetime
+    created_at: datetime
+    read_at: Optional[datetime] = None
+
+    @field_serializer('due_date', 'created_at', 'read_at', when_used='json')
+    def serialize_datetime(self, dt: Optional[datetime]) -> Optional[str]:
+        if dt is None:
+            return None
+        return dt.isoformat()
+
+    class Config:
+        from_attributes = True
+
+class ImportResult(BaseModel):
+    board_id: int
+    tasks: int
+    labels_created: int
+    attachments: int
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+
+    @field_serializer('run_at', 'created_at', 'finished_at', when_used='json')
+    def serialize_datetime(self, dt: Optional[datetime]) -> Optional[str]:
+        if dt is None:
+            return None
+        return dt.isoformat()
+
+    class Config:
+        from_attributes = True
+
+class BulkUserCreate(BaseModel):
+    users: List[UserCreate]
+    team_id: Optional[int] = None  # Existing team every new user joins as a member
+
+class BulkUserResult(BaseModel):
+    created: int
+    user_ids: List[int]
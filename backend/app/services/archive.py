@@ -0,0 +1,72 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..utils.logging import logger
+from .deletion import delete_tasks
+from .exporter import load_task_relations
+
+def move_to_cold_archive(db: Session, older_than: timedelta, board_id: Optional[int] = None,
+                         batch_size: int = 500) -> int:
+    """Move tasks archived for longer than ``older_than`` into ``archived_tasks``.
+
+    Each batch is snapshotted (labels, checklist, comments, attachments), copied
+    with one executemany insert, removed from the hot tables with set-based
+    DELETEs and committed, so the write lock is only held briefly per batch.
+    Returns the number of tasks moved.
+    """
+    cutoff = datetime.utcnow() - older_than
+    moved = 0
+    while True:
+        query = select(models.Task).where(
+            models.Task.is_archived.is_(True),
+            models.Task.archived_at < cutoff
+        )
+        if board_id is not None:
+            query = query.where(models.Task.board_id == board_id)
+        tasks = db.execute(query.order_by(models.Task.id).limit(batch_size)).scalars().all()
+        if not tasks:
+            break
+
+        task_ids = [task.id for task in tasks]
+        related = load_task_relations(db, task_ids)
+        attachments = defaultdict(list)
+        for task_id, filename, file_path, url in db.execute(
+            select(models.Attachment.task_id, models.Attachment.filename,
+                   models.Attachment.file_path, models.Attachment.url)
+            .where(models.Attachment.task_id.in_(task_ids))
+        ):
+            attachments[task_id].append({"filename": filename, "file_path": file_path, "url": url})
+
+        db.execute(insert(models.ArchivedTask), [
+            {
+                "id": task.id,
+                "board_id": task.board_id,
+                "title": task.title,
+                "description": task.description,
+                "status": task.status,
+                "priority": task.priority,
+                "due_date": task.due_date,
+                "created_at": task.created_at,
+                "archived_at": task.archived_at,
+                "creator_id": task.creator_id,
+                "data": {
+                    "labels": related["labels"].get(task.id, []),
+                    "checklist": task.checklist or [],
+                    "comments": related["comments"].get(task.id, []),
+                    "attachments": attachments.get(task.id, []),
+                },
+            }
+            for task in tasks
+        ])
+        delete_tasks(db, task_ids)
+        db.commit()
+        db.expunge_all()
+
+        moved += len(task_ids)
+        logger.info(f"Moved {moved} archived tasks to cold storage")
+    return moved
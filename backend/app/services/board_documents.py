@@ -0,0 +1,343 @@
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..config import settings
+from ..utils.fieldsets import select_fields
+from ..utils.invalidation import bus as invalidation_bus
+from ..utils.logging import logger
+from .sync import current_seq
+
+# Materialized board documents: the board's non-archived cards, each already
+# encoded as the JSON ``GET /api/tasks/?board_id=`` returns, plus the board
+# itself (memberships, team), which every card embeds. Documents live in a
+# per-process LRU bounded by their encoded size.
+#
+# A document remembers the change sequence (see services/sync.py) it reflects.
+# A read that finds a newer sequence re-renders only the cards written since,
+# found through the change_seq indexes: tasks, their comments, attachments and
+# relabelled labels, and task tombstones. That covers every writer, including
+# Core statements, the CLI and other processes. Membership and board changes
+# do not move the sequence; their "board" and "team" invalidations (and a TTL,
+# for other hosts) mark the board part for re-rendering instead.
+
+# The card: a task as the board listing returns it, minus the shared board
+CARD_FIELDS = select_fields(schemas.Task, models.Task, None, "creator,assigned_to,labels,comments,attachments")
+BOARD_FIELDS = select_fields(
+    schemas.Board, models.Board, None,
+    "board_memberships.user,created_by,team.team_memberships.user,team.created_by"
+)
+
+# Bookkeeping per card on top of its JSON, for the size limit
+CARD_OVERHEAD = 100
+
+def _encode(content: Any) -> bytes:
+    # Same encoding as starlette's JSONResponse
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def _sort_key(task: models.Task) -> Tuple[bool, int, int]:
+    # The listing's ORDER BY position NULLS FIRST, id
+    return (task.position is not None, task.position or 0, task.id)
+
+class BoardDocument:
+    def __init__(self, board_id: int, team_id: Optional[int], seq: int, board: bytes):
+        self.board_id = board_id
+        self.team_id = team_id
+        self.seq = seq
+        self.board = board
+        self.board_rendered = time.monotonic()
+        self.board_stale = False
+        # task id -> (sort key, encoded card)
+        self.cards: Dict[int, Tuple[Tuple[bool, int, int], bytes]] = {}
+        self.size = len(board)
+        self._ordered: Optional[List[bytes]] = None
+        self.lock = threading.Lock()
+
+    def put_card(self, task: models.Task) -> None:
+        card = _encode(CARD_FIELDS.dump(task, "json"))
+        self.remove_card(task.id)
+        self.cards[task.id] = (_sort_key(task), card)
+        self.size += len(card) + CARD_OVERHEAD
+        self._ordered = None
+
+    def remove_card(self, task_id: int) -> None:
+        entry = self.cards.pop(task_id, None)
+        if entry is not None:
+            self.size -= len(entry[1]) + CARD_OVERHEAD
+            self._ordered = None
+
+    def set_board(self, board: bytes, team_id: Optional[int]) -> None:
+        self.size += len(board) - len(self.board)
+        self.board = board
+        self.team_id = team_id
+        self.board_rendered = time.monotonic()
+
+    def body(self, skip: int, limit: int) -> bytes:
+        """The card listing, ``skip``/``limit`` applied, as a JSON array."""
+        if self._ordered is None:
+            self._ordered = [card for _, card in sorted(self.cards.values())]
+        parts = [b"["]
+        for n, card in enumerate(self._ordered[skip:skip + limit]):
+            if n:
+                parts.append(b",")
+            # Splice the shared board into the card's object
+            parts += (card[:-1], b',"board":', self.board, b"}")
+        parts.append(b"]")
+        return b"".join(parts)
+
+class BoardDocuments:
+    """LRU of board documents holding at most ``max_bytes`` of encoded JSON."""
+
+    def __init__(self, max_bytes: int, board_ttl: float, verify_rate: float = 0.0):
+        self.max_bytes = max_bytes
+        self.board_ttl = board_ttl
+        self.verify_rate = verify_rate
+        self._documents: "OrderedDict[int, BoardDocument]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    # -- Invalidation -------------------------------------------------------
+
+    def board_changed(self, board_id: str) -> None:
+        with self._lock:
+            document = self._documents.get(int(board_id))
+        if document is not None:
+            document.board_stale = True
+
+    def team_changed(self, team_id: str) -> None:
+        team_id = int(team_id)
+        with self._lock:
+            documents = [document for document in self._documents.values() if document.team_id == team_id]
+        for document in documents:
+            document.board_stale = True
+
+    def evict(self, board_id: int) -> None:
+        with self._lock:
+            document = self._documents.pop(board_id, None)
+            if document is not None:
+                self._size -= document.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._size = 0
+
+    # -- Reads --------------------------------------------------------------
+
+    def render(self, db: Session, board_id: int, skip: int = 0, limit: int = 100) -> Optional[bytes]:
+        """The board's card listing as JSON, or None if the board does not exist."""
+        document = self.document(db, board_id)
+        if document is None:
+            return None
+        with document.lock:
+            return document.body(skip, limit)
+
+    def board(self, db: Session, board_id: int) -> Optional[bytes]:
+        """The board itself as JSON, as embedded in its cards."""
+        document = self.document(db, board_id)
+        return document.board if document is not None else None
+
+    def document(self, db: Session, board_id: int) -> Optional[BoardDocument]:
+        """The up-to-date document of a board, built or patched as needed."""
+        seq, _ = current_seq(db)
+        with self._lock:
+            document = self._documents.get(board_id)
+            if document is not None:
+                self._documents.move_to_end(board_id)
+        if document is None:
+            document = self._build(db, board_id, seq)
+            if document is not None:
+                self._store(document)
+            return document
+
+        with document.lock:
+            before = document.size
+            # A reader on an older snapshot serves the newer document as it is
+            current = document.seq >= seq and not document.board_stale and \
+                time.monotonic() - document.board_rendered < self.board_ttl
+            if not current and not self._patch(db, document, seq):
+                document = None
+            elif self.verify_rate and random.random() < self.verify_rate:
+                if self._differences(db, document):
+                    document = None
+        if document is None:
+            self.evict(board_id)
+            document = self._build(db, board_id, seq)
+            if document is not None:
+                self._store(document)
+            return document
+        self._resize(board_id, document, before)
+        return document
+
+    # -- Building and patching ----------------------------------------------
+
+    def _render_board(self, db: Session, board_id: int) -> Optional[models.Board]:
+        return db.query(models.Board).options(*BOARD_FIELDS.load_options).filter(
+            models.Board.id == board_id,
+            models.Board.deleted_at.is_(None)
+        ).first()
+
+    def _cards(self, db: Session, board_id: int, task_ids: Optional[Iterable[int]] = None) -> List[models.Task]:
+        query = db.query(models.Task).options(*CARD_FIELDS.load_options).filter(
+            models.Task.board_id == board_id,
+            ~models.Task.is_archived
+        )
+        if task_ids is not None:
+            query = query.filter(models.Task.id.in_(list(task_ids)))
+        return query.all()
+
+    def _build(self, db: Session, board_id: int, seq: int) -> Optional[BoardDocument]:
+        board = self._render_board(db, board_id)
+        if board is None:
+            return None
+        document = BoardDocument(board_id, board.team_id, seq, _encode(BOARD_FIELDS.dump(board, "json")))
+        for task in self._cards(db, board_id):
+            document.put_card(task)
+        return document
+
+    def _changed_tasks(self, db: Session, board_id: int, since: int) -> Optional[Tuple[Set[int], Set[int]]]:
+        """Ids of the board's tasks written and deleted after ``since``; None if
+        a deleted comment or attachment means the whole board must be rebuilt."""
+        board_tasks = select(models.Task.id).where(models.Task.board_id == board_id)
+        changed = set(db.execute(
+            select(models.Task.id).where(models.Task.board_id == board_id, models.Task.change_seq > since)
+        ).scalars())
+        for model in (models.Comment, models.Attachment):
+            changed.update(db.execute(
+                select(model.task_id).where(model.change_seq > since, model.task_id.in_(board_tasks))
+            ).scalars())
+        changed.update(db.execute(
+            select(models.task_labels.c.task_id)
+            .join(models.Label, models.Label.id == models.task_labels.c.label_id)
+            .where(models.Label.change_seq > since, models.task_labels.c.task_id.in_(board_tasks))
+        ).scalars())
+        deleted = set()
+        for entity, entity_id in db.execute(
+            select(models.Tombstone.entity, models.Tombstone.entity_id)
+            .where(models.Tombstone.board_id == board_id, models.Tombstone.change_seq > since)
+        ):
+            if entity != "task":
+                # Tombstones of comments and attachments don't name their task
+                return None
+            deleted.add(entity_id)
+        return changed - deleted, deleted
+
+    def _patch(self, db: Session, document: BoardDocument, seq: int) -> bool:
+        """Bring a document up to ``seq``; False if it has to be rebuilt instead."""
+        if seq > document.seq:
+            changes = self._changed_tasks(db, document.board_id, document.seq)
+            if changes is None:
+                return False
+            changed, deleted = changes
+            for task_id in deleted:
+                document.remove_card(task_id)
+            if changed:
+                found = {task.id: task for task in self._cards(db, document.board_id, changed)}
+                for task_id in changed:
+                    if task_id in found:
+                        document.put_card(found[task_id])
+                    else:
+                        # Archived, or deleted without a tombstone
+                        document.remove_card(task_id)
+            document.seq = seq
+        if document.board_stale or time.monotonic() - document.board_rendered >= self.board_ttl:
+            # Cleared first: a change arriving while this renders marks it again
+            document.board_stale = False
+            board = self._render_board(db, document.board_id)
+            if board is None:
+                return False
+            document.set_board(_encode(BOARD_FIELDS.dump(board, "json")), board.team_id)
+        return True
+
+    def _store(self, document: BoardDocument) -> None:
+        if document.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._documents.pop(document.board_id, None)
+            if previous is not None:
+                self._size -= previous.size
+            self._documents[document.board_id] = document
+            self._size += document.size
+            self._evict_to_fit()
+
+    def _resize(self, board_id: int, document: BoardDocument, before: int) -> None:
+        if document.size == before:
+            return
+        with self._lock:
+            if self._documents.get(board_id) is not document:
+                return
+            self._size += document.size - before
+            if document.size > self.max_bytes:
+                del self._documents[board_id]
+                self._size -= document.size
+            self._evict_to_fit()
+
+    def _evict_to_fit(self) -> None:
+        # Called with the lock held; least recently read first
+        while self._size > self.max_bytes and self._documents:
+            _, evicted = self._documents.popitem(last=False)
+            self._size -= evicted.size
+
+    # -- Consistency checks -------------------------------------------------
+
+    def _differences(self, db: Session, document: BoardDocument) -> Dict[str, Any]:
+        """Compare a document against the normalized tables (in ``db``'s snapshot)."""
+        fresh = self._build(db, document.board_id, document.seq)
+        if fresh is None:
+            return {"board": "deleted"}
+        differences: Dict[str, Any] = {}
+        missing = sorted(fresh.cards.keys() - document.cards.keys())
+        extra = sorted(document.cards.keys() - fresh.cards.keys())
+        stale = sorted(
+            task_id for task_id in fresh.cards.keys() & document.cards.keys()
+            if fresh.cards[task_id] != document.cards[task_id]
+        )
+        if missing:
+            differences["missing"] = missing
+        if extra:
+            differences["extra"] = extra
+        if stale:
+            differences["stale"] = stale
+        if fresh.board != document.board:
+            differences["board"] = "stale"
+        if differences:
+            logger.warning(f"Board document {document.board_id} at change {document.seq} "
+                           f"differs from the tables: {differences}")
+        return differences
+
+    def verify(self, db: Session) -> Dict[str, Any]:
+        """Check every cached document against the tables, evicting those that differ."""
+        with self._lock:
+            board_ids = list(self._documents)
+        report = {"checked": 0, "size": self._size, "inconsistent": {}}
+        for board_id in board_ids:
+            seq, _ = current_seq(db)
+            with self._lock:
+                document = self._documents.get(board_id)
+            if document is None:
+                continue
+            with document.lock:
+                if not self._patch(db, document, seq):
+                    self.evict(board_id)
+                    continue
+                differences = self._differences(db, document)
+            report["checked"] += 1
+            if differences:
+                report["inconsistent"][str(board_id)] = differences
+                self.evict(board_id)
+        return report
+
+documents = BoardDocuments(
+    settings.BOARD_DOCUMENT_CACHE_BYTES,
+    settings.BOARD_DOCUMENT_BOARD_TTL_SECONDS,
+    settings.BOARD_DOCUMENT_VERIFY_RATE,
+)
+invalidation_bus.subscribe("board", documents.board_changed)
+invalidation_bus.subscribe("team", documents.team_changed)
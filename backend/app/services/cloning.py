@@ -0,0 +1,89 @@
+from typing import Optional
+
+from sqlalchemy import and_, insert, literal, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..auth.capabilities import membership_changed
+from ..utils.invalidation import publish_after_commit
+from .sync import change_seq
+
+def clone_board(
+    db: Session,
+    source: models.Board,
+    user_id: int,
+    *,
+    team_id: Optional[int] = None,
+    name: Optional[str] = None,
+    is_template: bool = False,
+    include_members: bool = False,
+    include_archived: bool = False,
+) -> models.Board:
+    """Copy a board with its tasks, checklists, labels and attachments.
+
+    Rows are copied server-side with one INSERT ... SELECT per table, so the
+    cost does not grow with per-card round trips. Copied tasks record their
+    source in ``cloned_from_id``, which the following statements join on to
+    link labels and attachments to the copies. Attachments are shared by
+    reference: the new rows point at the same files. Comments and assignees
+    are not copied. The caller commits.
+    """
+    board = models.Board(
+        name=name or f"{source.name} (copy)",
+        description=source.description,
+        is_public=source.is_public,
+        is_template=is_template,
+        team_id=team_id if team_id is not None else source.team_id,
+        created_by_id=user_id,
+    )
+    db.add(board)
+    db.flush()
+    seq = change_seq(db)
+
+    tasks = models.Task.__table__
+    source_tasks = tasks.c.board_id == source.id
+    if not include_archived:
+        source_tasks = and_(source_tasks, ~tasks.c.is_archived)
+    copied = [
+        "title", "description", "status", "priority", "position", "due_date",
+        "is_archived", "archived_at", "checklist",
+    ]
+    db.execute(insert(tasks).from_select(
+        copied + ["board_id", "creator_id", "change_seq", "cloned_from_id"],
+        select(
+            *(tasks.c[column] for column in copied),
+            literal(board.id), literal(user_id), literal(seq), tasks.c.id,
+        ).where(source_tasks).order_by(tasks.c.id)
+    ))
+
+    copies = select(tasks.c.id, tasks.c.cloned_from_id).where(tasks.c.board_id == board.id).subquery()
+    task_labels = models.task_labels
+    db.execute(insert(task_labels).from_select(
+        ["task_id", "label_id"],
+        select(copies.c.id, task_labels.c.label_id)
+        .join(copies, copies.c.cloned_from_id == task_labels.c.task_id)
+    ))
+    attachments = models.Attachment.__table__
+    db.execute(insert(attachments).from_select(
+        ["filename", "file_path", "url", "task_id", "user_id", "change_seq"],
+        select(
+            attachments.c.filename, attachments.c.file_path, attachments.c.url,
+            copies.c.id, attachments.c.user_id, literal(seq),
+        ).join(copies, copies.c.cloned_from_id == attachments.c.task_id)
+    ))
+
+    members = models.BoardMember.__table__
+    if include_members:
+        db.execute(insert(members).from_select(
+            ["board_id", "user_id", "role"],
+            select(literal(board.id), members.c.user_id, members.c.role)
+            .where(members.c.board_id == source.id, members.c.user_id != user_id)
+        ))
+    # The cloner administers the copy
+    db.execute(insert(members).values(board_id=board.id, user_id=user_id, role="admin"))
+    for member_id in db.execute(select(members.c.user_id).where(members.c.board_id == board.id)).scalars():
+        membership_changed(db, member_id)
+
+    publish_after_commit(db, "team", board.team_id)
+    publish_after_commit(db, "board", board.id)
+    return board
@@ -0,0 +1,81 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..utils.invalidation import publish_after_commit
+from ..utils.logging import logger
+from .jobs import job_handler
+from .sync import record_tombstones
+
+# Deletes are set-based: one DELETE per table, children before parents, instead
+# of loading every comment and attachment through the ORM cascade. The foreign
+# keys also cascade in the database (see the d2a7c5e9f013 migration), which
+# covers anything deleted some other way.
+
+def delete_tasks(db: Session, task_ids: Iterable[int], *, version: Optional[int] = None,
+                 tombstones: bool = True) -> int:
+    """Delete tasks with their notifications, label and assignee links, comments
+    and attachments. Returns the number of tasks deleted.
+
+    With ``version`` (for a single task), nothing is deleted in the end unless the
+    task is still at that version; the caller rolls back when this returns 0.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return 0
+    db.execute(delete(models.Notification).where(models.Notification.task_id.in_(task_ids)))
+    db.execute(delete(models.task_labels).where(models.task_labels.c.task_id.in_(task_ids)))
+    db.execute(delete(models.task_members).where(models.task_members.c.task_id.in_(task_ids)))
+    db.execute(delete(models.Comment).where(models.Comment.task_id.in_(task_ids)))
+    db.execute(delete(models.Attachment).where(models.Attachment.task_id.in_(task_ids)))
+    statement = delete(models.Task).where(models.Task.id.in_(task_ids))
+    if version is not None:
+        statement = statement.where(models.Task.version == version)
+    deleted = db.execute(
+        statement.returning(models.Task.id, models.Task.board_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if tombstones:
+        # To delta-sync clients the task is gone; its comments and attachments go with it
+        record_tombstones(db, "task", deleted)
+    return len(deleted)
+
+def purge_board(db: Session, board_id: int, chunk_size: int = settings.BOARD_DELETE_CHUNK_SIZE) -> int:
+    """Delete a board and everything on it, committing after every ``chunk_size`` tasks.
+
+    The board should already be hidden (``deleted_at`` set) so nobody writes to
+    it in between. Safe to run again after a failure. Returns the number of tasks deleted.
+    """
+    deleted = 0
+    while True:
+        task_ids = db.execute(
+            select(models.Task.id).where(models.Task.board_id == board_id)
+            .order_by(models.Task.id).limit(chunk_size)
+        ).scalars().all()
+        if not task_ids:
+            break
+        # The board goes away as a whole; delta sync answers 404 for it from now on
+        deleted += delete_tasks(db, task_ids, tombstones=False)
+        db.commit()
+        logger.info(f"Deleted {deleted} tasks of board {board_id}")
+    while True:
+        archived_ids = select(models.ArchivedTask.id).where(
+            models.ArchivedTask.board_id == board_id
+        ).limit(chunk_size).scalar_subquery()
+        if not db.execute(delete(models.ArchivedTask).where(models.ArchivedTask.id.in_(archived_ids))).rowcount:
+            break
+        db.commit()
+    db.execute(delete(models.Tombstone).where(models.Tombstone.board_id == board_id))
+    db.execute(delete(models.BoardMember).where(models.BoardMember.board_id == board_id))
+    db.execute(delete(models.Board).where(models.Board.id == board_id))
+    publish_after_commit(db, "board", board_id)
+    db.commit()
+    return deleted
+
+@job_handler("delete_board")
+def delete_board_job(db: Session, payload: dict) -> dict:
+    """Background deletion of a board too large to delete within the request."""
+    return {"tasks": purge_board(db, payload["board_id"])}
@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import ReadSessionLocal
+
+EXPORT_FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Column order for CSV exports; the layout is accepted back by the CSV importer
+CSV_COLUMNS = [
+    "id", "title", "description", "status", "priority", "position", "due_date",
+    "created_at", "updated_at", "is_archived", "creator_id",
+    "labels", "checklist", "comments", "attachments", "storage",
+]
+
+# Flush encoded output in chunks of roughly this many bytes
+FLUSH_SIZE = 64 * 1024
+
+TASK_COLUMNS = [
+    models.Task.id, models.Task.title, models.Task.description, models.Task.status,
+    models.Task.priority, models.Task.position, models.Task.due_date, models.Task.created_at,
+    models.Task.updated_at, models.Task.is_archived, models.Task.creator_id, models.Task.checklist,
+]
+
+COLD_TASK_COLUMNS = [
+    models.ArchivedTask.id, models.ArchivedTask.title, models.ArchivedTask.description,
+    models.ArchivedTask.status, models.ArchivedTask.priority, models.ArchivedTask.due_date,
+    models.ArchivedTask.created_at, models.ArchivedTask.creator_id, models.ArchivedTask.data,
+]
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def load_task_relations(db: Session, task_ids: List[int]) -> Dict[str, Dict[int, list]]:
+    """Load labels, comments and attachments for one batch of tasks, one query each."""
+    related = {"labels": defaultdict(list), "comments": defaultdict(list), "attachments": defaultdict(list)}
+    for task_id, name, color in db.execute(
+        select(models.task_labels.c.task_id, models.Label.name, models.Label.color)
+        .join(models.Label, models.Label.id == models.task_labels.c.label_id)
+        .where(models.task_labels.c.task_id.in_(task_ids))
+    ):
+        related["labels"][task_id].append({"name": name, "color": color})
+    for task_id, comment_id, user_id, content, created_at in db.execute(
+        select(models.Comment.task_id, models.Comment.id, models.Comment.user_id,
+               models.Comment.content, models.Comment.created_at)
+        .where(models.Comment.task_id.in_(task_ids))
+        .order_by(models.Comment.task_id, models.Comment.id)
+    ):
+        related["comments"][task_id].append({
+            "id": comment_id, "user_id": user_id, "content": content, "created_at": _isoformat(created_at),
+        })
+    for task_id, filename, url in db.execute(
+        select(models.Attachment.task_id, models.Attachment.filename, models.Attachment.url)
+        .where(models.Attachment.task_id.in_(task_ids))
+        .order_by(models.Attachment.task_id, models.Attachment.id)
+    ):
+        related["attachments"][task_id].append({"filename": filename, "url": url})
+    return related
+
+def iter_board_records(db: Session, board_id: int, batch_size: int = 500,
+                       include_cold: bool = True) -> Iterator[dict]:
+    """Yield one self-contained record per task of a board.
+
+    Tasks are read through a server-side cursor in batches of ``batch_size``; the
+    related rows of each batch are fetched with one query per relationship, so
+    memory use is bounded by the batch size rather than the board size. Tasks
+    moved to the cold archive follow in a second pass, marked ``"archived": "cold"``.
+    """
+    result = db.execute(
+        select(*TASK_COLUMNS)
+        .where(models.Task.board_id == board_id)
+        .order_by(models.Task.status, models.Task.position, models.Task.id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for batch in result.partitions():
+        related = load_task_relations(db, [row.id for row in batch])
+        for row in batch:
+            yield {
+                "id": row.id,
+                "title": row.title,
+                "description": row.description,
+                "status": row.status,
+                "priority": row.priority,
+                "position": row.position,
+                "due_date": _isoformat(row.due_date),
+                "created_at": _isoformat(row.created_at),
+                "updated_at": _isoformat(row.updated_at),
+                "is_archived": bool(row.is_archived),
+                "creator_id": row.creator_id,
+                "labels": related["labels"].get(row.id, []),
+                "checklist": row.checklist or [],
+                "comments": related["comments"].get(row.id, []),
+                "attachments": related["attachments"].get(row.id, []),
+            }
+    if include_cold:
+        yield from iter_cold_records(db, board_id, batch_size=batch_size)
+
+def iter_cold_records(db: Session, board_id: int, batch_size: int = 500) -> Iterator[dict]:
+    """Yield the cold-archived tasks of a board as export records, built from their snapshots."""
+    result = db.execute(
+        select(*COLD_TASK_COLUMNS)
+        .where(models.ArchivedTask.board_id == board_id)
+        .order_by(models.ArchivedTask.id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for task in result:
+        data = task.data or {}
+        yield {
+            "id": task.id,
+            "title": task.title,
+            "description": task.description,
+            "status": task.status,
+            "priority": task.priority,
+            "position": None,
+            "due_date": _isoformat(task.due_date),
+            "created_at": _isoformat(task.created_at),
+            "updated_at": None,
+            "is_archived": True,
+            "creator_id": task.creator_id,
+            "labels": data.get("labels", []),
+            "checklist": data.get("checklist", []),
+            "comments": data.get("comments", []),
+            # The snapshot also records where uploads are stored on disk, which exports leave out
+            "attachments": [
+                {"filename": attachment.get("filename"), "url": attachment.get("url")}
+                for attachment in data.get("attachments", [])
+            ],
+            "archived": "cold",
+        }
+
+def encode_ndjson(records: Iterable[dict]) -> Iterator[bytes]:
+    buffer = []
+    size = 0
+    for record in records:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_SIZE:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+def _csv_row(record: dict) -> list:
+    return [
+        record["id"], record["title"], record["description"], record["status"], record["priority"],
+        record["position"], record["due_date"], record["created_at"], record["updated_at"],
+        record["is_archived"], record["creator_id"],
+        ", ".join(f"{label['name']} ({label['color']})" for label in record["labels"]),
+        "; ".join(f"[{'x' if item.get('is_completed') else ' '}] {item.get('content')}" for item in record["checklist"]),
+        " | ".join(f"{comment['user_id']}: {comment['content']}" for comment in record["comments"]),
+        " ".join(attachment["url"] for attachment in record["attachments"] if attachment["url"]),
+        record.get("archived", ""),
+    ]
+
+def encode_csv(records: Iterable[dict]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for record in records:
+        writer.writerow(_csv_row(record))
+        if buffer.tell() >= FLUSH_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream on the fly into a single gzip member."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def stream_board_export(board_id: int, format: str = "ndjson", compress: bool = False,
+                        batch_size: int = 500) -> Iterator[bytes]:
+    """Encode a board export as a byte stream.
+
+    The generator owns its own session so it stays valid while a response is
+    being streamed after the request handler has returned.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{format}'")
+    db = ReadSessionLocal()
+    try:
+        records = iter_board_records(db, board_id, batch_size=batch_size)
+        chunks = encode_ndjson(records) if format == "ndjson" else encode_csv(records)
+        if compress:
+            chunks = gzip_stream(chunks)
+        yield from chunks
+    finally:
+        db.close()
+
+def export_filename(board_id: int, format: str, compress: bool) -> str:
+    return f"board-{board_id}.{format}" + (".gz" if compress else "")
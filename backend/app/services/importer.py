@@ -0,0 +1,422 @@
+import csv
+import io
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..utils.logging import logger
+from ..utils.invalidation import bus as invalidation_bus
+from .jobs import JobFailed, job_handler
+from .reminders import scheduler as reminder_scheduler
+from .sync import change_seq
+
+try:
+    import ijson  # In requirements.txt: lets Trello JSON exports be parsed without loading them whole
+except ImportError:
+    ijson = None
+
+IMPORT_FORMATS = ("csv", "trello", "ndjson")
+
+# Keywords used to map list (column) names onto task statuses, checked in order
+STATUS_KEYWORDS = [
+    (models.TaskStatus.DONE.value, ("done", "complete", "finished", "closed", "shipped")),
+    (models.TaskStatus.IN_PROGRESS.value, ("progress", "doing", "review", "active", "started")),
+]
+
+def parse_status_map(value: Optional[str]) -> Dict[str, str]:
+    """Parse ``"Backlog=todo,Doing=in_progress"`` into a list-name -> status mapping."""
+    mapping = {}
+    if not value:
+        return mapping
+    valid = {status.value for status in models.TaskStatus}
+    for pair in value.split(","):
+        if not pair.strip():
+            continue
+        list_name, _, status = pair.partition("=")
+        status = status.strip()
+        if status not in valid:
+            raise ValueError(f"Unknown status '{status}' for list '{list_name.strip()}'")
+        mapping[list_name.strip().lower()] = status
+    return mapping
+
+def status_for_list(list_name: Optional[str], status_map: Dict[str, str]) -> str:
+    name = (list_name or "").strip().lower()
+    if name in status_map:
+        return status_map[name]
+    if name in {status.value for status in models.TaskStatus}:
+        return name
+    for status, keywords in STATUS_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return status
+    return models.TaskStatus.TODO.value
+
+def _parse_due(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("true", "1", "yes")
+
+def _parse_csv_labels(value: str) -> List[Tuple[str, str]]:
+    """Parse Trello CSV labels (``"bug (red), ui (blue)"``) or ``"bug:red;ui:blue"``."""
+    labels = []
+    for part in value.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if part.endswith(")") and "(" in part:
+            name, _, color = part[:-1].rpartition("(")
+        else:
+            name, _, color = part.partition(":")
+        labels.append((name.strip(), color.strip() or "gray"))
+    return labels
+
+def _malformed(where: str, error: Exception) -> ValueError:
+    detail = f"missing {error}" if isinstance(error, KeyError) else str(error)
+    return ValueError(f"{where} is malformed: {detail}")
+
+def iter_csv_cards(fp: BinaryIO) -> Iterator[dict]:
+    """Yield normalized cards from a CSV export (Trello column names or plain ones)."""
+    reader = csv.DictReader(io.TextIOWrapper(fp, encoding="utf-8-sig", newline=""))
+    rows = iter(reader)
+    while True:
+        try:
+            row = next(rows, None)
+        except csv.Error as e:
+            raise ValueError(f"Line {reader.line_num} is not valid CSV: {e}") from None
+        if row is None:
+            break
+        row = {key.strip().lower(): (value or "") for key, value in row.items() if key}
+        title = row.get("card name") or row.get("title") or row.get("name")
+        if not title:
+            continue
+        checklist = []
+        for item in (row.get("checklist") or "").split(";"):
+            item = item.strip()
+            completed = item.lower().startswith("[x]")
+            if item.startswith("[") and "]" in item:
+                item = item.split("]", 1)[1].strip()
+            if item:
+                checklist.append((item, completed))
+        yield {
+            "title": title,
+            "description": row.get("card description") or row.get("description") or None,
+            "list": row.get("list name") or row.get("list") or row.get("status"),
+            "labels": _parse_csv_labels(row.get("labels", "")),
+            "due_date": _parse_due(row.get("due date") or row.get("due_date")),
+            "archived": _parse_bool(row.get("archived")),
+            "checklist": checklist,
+            "attachments": [
+                (url.rsplit("/", 1)[-1], url)
+                for url in (row.get("attachment links") or row.get("attachments") or "").split()
+            ],
+        }
+
+class _ChecklistStore:
+    """Checklist items of a Trello export by card id, spilled to a temporary SQLite file."""
+
+    def __init__(self):
+        # An empty name opens a private on-disk database that is deleted on close
+        self._db = sqlite3.connect("")
+        self._db.execute("CREATE TABLE items (card TEXT, name TEXT, complete INTEGER)")
+
+    def add(self, card_id: Optional[str], items: Iterable[Tuple[str, bool]]) -> None:
+        self._db.executemany("INSERT INTO items VALUES (?, ?, ?)",
+                             ((card_id, name, complete) for name, complete in items))
+
+    def finish(self) -> None:
+        # Indexing once after loading is cheaper than maintaining the index per insert
+        self._db.execute("CREATE INDEX items_card ON items (card)")
+        self._db.commit()
+
+    def items(self, card_id: Optional[str]) -> List[Tuple[str, bool]]:
+        return [(name, bool(complete)) for name, complete in self._db.execute(
+            "SELECT name, complete FROM items WHERE card = ? ORDER BY rowid", (card_id,)
+        )]
+
+    def close(self) -> None:
+        self._db.close()
+
+def _normalize_trello_card(card: dict, lists: Dict[str, str], labels: Dict[str, Tuple[str, str]],
+                           checklists: _ChecklistStore) -> dict:
+    card_labels = [(label.get("name") or label.get("color") or "label", label.get("color") or "gray")
+                   for label in card.get("labels") or []]
+    if not card_labels:
+        card_labels = [labels[label_id] for label_id in card.get("idLabels") or [] if label_id in labels]
+    return {
+        "title": card.get("name") or "Untitled",
+        "description": card.get("desc") or None,
+        "list": lists.get(card.get("idList"), ""),
+        "labels": card_labels,
+        "due_date": _parse_due(card.get("due")),
+        "archived": bool(card.get("closed")),
+        "checklist": checklists.items(card.get("id")),
+        "attachments": [
+            (attachment.get("name") or attachment.get("url", "").rsplit("/", 1)[-1], attachment.get("url"))
+            for attachment in card.get("attachments") or []
+            if attachment.get("url")
+        ],
+    }
+
+def iter_trello_cards(fp: BinaryIO) -> Iterator[dict]:
+    """Yield normalized cards from a Trello board JSON export.
+
+    The file is read with ``ijson`` in streaming passes: lists and labels, then
+    checklists, which are spilled to a temporary SQLite file keyed by card id,
+    then cards. Memory grows with the number of lists and labels, not cards.
+    Installs without ijson fall back to loading the whole document.
+    """
+    if ijson is None:
+        logger.warning("ijson is not installed; loading the whole Trello export into memory")
+        try:
+            data = json.load(fp)
+        except ValueError as e:
+            raise ValueError(f"Invalid Trello export: {e}") from None
+        if not isinstance(data, dict):
+            raise ValueError("Invalid Trello export: expected a JSON object")
+        sections = {key: data.get(key) or [] for key in ("lists", "labels", "checklists", "cards")}
+
+        def read(key):
+            if not isinstance(sections[key], list):
+                raise ValueError(f"Invalid Trello export: '{key}' is not a list")
+            return enumerate(sections[key], start=1)
+    else:
+        def read(key):
+            fp.seek(0)
+            try:
+                yield from enumerate(ijson.items(fp, f"{key}.item"), start=1)
+            except ijson.JSONError as e:
+                # ijson's errors are not ValueErrors; the parser's message spans several lines
+                raise ValueError(f"Invalid Trello export: {str(e).splitlines()[0]}") from None
+
+    lists: Dict[str, str] = {}
+    labels: Dict[str, Tuple[str, str]] = {}
+    for key, section in (("lists", lists), ("labels", labels)):
+        for number, item in read(key):
+            try:
+                section[item["id"]] = (
+                    item.get("name", "") if key == "lists"
+                    else (item.get("name") or item.get("color") or "label", item.get("color") or "gray")
+                )
+            except (AttributeError, KeyError, TypeError) as e:
+                raise _malformed(f"Trello {key[:-1]} {number}", e) from None
+
+    checklists = _ChecklistStore()
+    try:
+        for number, checklist in read("checklists"):
+            try:
+                checklists.add(checklist.get("idCard"), [
+                    (item.get("name", ""), item.get("state") == "complete")
+                    for item in checklist.get("checkItems") or []
+                ])
+            except (AttributeError, KeyError, TypeError) as e:
+                raise _malformed(f"Trello checklist {number}", e) from None
+        checklists.finish()
+
+        for number, card in read("cards"):
+            try:
+                normalized = _normalize_trello_card(card, lists, labels, checklists)
+            except (AttributeError, KeyError, TypeError) as e:
+                raise _malformed(f"Trello card {number}", e) from None
+            yield normalized
+    finally:
+        checklists.close()
+
+def iter_ndjson_cards(fp: BinaryIO) -> Iterator[dict]:
+    """Yield cards from newline-delimited JSON, one already-normalized card per line."""
+    for number, line in enumerate(fp, start=1):
+        if not line.strip():
+            continue
+        try:
+            card = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {number} is not valid JSON: {e}") from None
+        try:
+            normalized = {
+                "title": card.get("title") or "Untitled",
+                "description": card.get("description"),
+                "list": card.get("list") or card.get("status"),
+                "labels": [(label["name"], label.get("color") or "gray") for label in card.get("labels") or []],
+                "due_date": _parse_due(card.get("due_date")),
+                "archived": _parse_bool(card.get("is_archived")),
+                "checklist": [(item["content"], bool(item.get("is_completed"))) for item in card.get("checklist") or []],
+                "attachments": [(item.get("filename"), item["url"]) for item in card.get("attachments") or []],
+            }
+        except (AttributeError, KeyError, TypeError) as e:
+            raise _malformed(f"Line {number}", e) from None
+        yield normalized
+
+def iter_cards(fp: BinaryIO, format: str) -> Iterator[dict]:
+    if format == "csv":
+        return iter_csv_cards(fp)
+    if format == "trello":
+        return iter_trello_cards(fp)
+    if format == "ndjson":
+        return iter_ndjson_cards(fp)
+    raise ValueError(f"Unsupported import format '{format}'")
+
+class BoardImporter:
+    """Import normalized cards into a board using batched inserts.
+
+    Positions are precomputed from one ``max(position)`` query per status, labels
+    are deduplicated against the global label table with a per-import cache, and
+    each chunk of cards is inserted with a handful of executemany statements and
+    committed on its own so memory stays flat regardless of the import size.
+    Chunks committed before an invalid card stay imported; the ``ValueError``
+    raised for it says how many cards that is.
+    """
+
+    def __init__(self, db: Session, board_id: int, creator_id: int,
+                 status_map: Optional[Dict[str, str]] = None, chunk_size: int = 1000):
+        self.db = db
+        self.board_id = board_id
+        self.creator_id = creator_id
+        self.status_map = status_map or {}
+        self.chunk_size = chunk_size
+        self.label_ids: Dict[Tuple[str, str], int] = {}
+        self.stats = {"tasks": 0, "labels_created": 0, "attachments": 0}
+        self.positions = dict(
+            db.query(models.Task.status, func.max(models.Task.position))
+            .filter(models.Task.board_id == board_id, ~models.Task.is_archived)
+            .group_by(models.Task.status)
+            .all()
+        )
+
+    def run(self, cards: Iterable[dict], progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+        chunk = []
+        cards = iter(cards)
+        while True:
+            try:
+                card = next(cards, None)
+            except ValueError as e:
+                if self.stats["tasks"]:
+                    raise ValueError(f"{e}. The {self.stats['tasks']} cards before it were already "
+                                     "imported and were kept") from None
+                raise
+            if card is None:
+                break
+            chunk.append(card)
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+                if progress:
+                    progress(self.stats)
+        if chunk:
+            self._import_chunk(chunk)
+            if progress:
+                progress(self.stats)
+        return self.stats
+
+    def _resolve_labels(self, chunk: List[dict]) -> None:
+        wanted = {label for card in chunk for label in card["labels"]} - self.label_ids.keys()
+        if not wanted:
+            return
+        names = {name for name, _ in wanted}
+        for label_id, name, color in (
+            self.db.query(models.Label.id, models.Label.name, models.Label.color)
+            .filter(models.Label.name.in_(names))
+        ):
+            self.label_ids.setdefault((name, color), label_id)
+        missing = [
+            {"name": name, "color": color, "change_seq": change_seq(self.db)}
+            for name, color in wanted if (name, color) not in self.label_ids
+        ]
+        if missing:
+            created = self.db.execute(
+                insert(models.Label).returning(models.Label.id, sort_by_parameter_order=True), missing
+            ).scalars().all()
+            for row, label_id in zip(missing, created):
+                self.label_ids[(row["name"], row["color"])] = label_id
+            self.stats["labels_created"] += len(missing)
+
+    def _import_chunk(self, chunk: List[dict]) -> None:
+        self._resolve_labels(chunk)
+
+        task_rows = []
+        now = datetime.utcnow()
+        seq = change_seq(self.db)
+        for card in chunk:
+            status = status_for_list(card["list"], self.status_map)
+            if card["archived"]:
+                # Archived cards do not take a slot in the active column ordering
+                position = None
+            else:
+                position = (self.positions.get(status) or 0) + 1
+                self.positions[status] = position
+            task_rows.append({
+                "title": card["title"],
+                "description": card["description"],
+                "status": status,
+                "priority": models.TaskPriority.LOW.value,
+                "position": position,
+                "due_date": card["due_date"],
+                "board_id": self.board_id,
+                "creator_id": self.creator_id,
+                "is_archived": card["archived"],
+                "archived_at": now if card["archived"] else None,
+                "change_seq": seq,
+                "checklist": [
+                    {"id": item_id, "content": content, "is_completed": completed}
+                    for item_id, (content, completed) in enumerate(card["checklist"], start=1)
+                ],
+            })
+        task_ids = self.db.execute(
+            insert(models.Task).returning(models.Task.id, sort_by_parameter_order=True), task_rows
+        ).scalars().all()
+
+        label_links = []
+        attachment_rows = []
+        for task_id, card in zip(task_ids, chunk):
+            for label_id in {self.label_ids[label] for label in card["labels"]}:
+                label_links.append({"task_id": task_id, "label_id": label_id})
+            for filename, url in card["attachments"]:
+                # Attachments are imported by reference; the files stay where they are
+                attachment_rows.append({
+                    "filename": filename,
+                    "file_path": None,
+                    "url": url,
+                    "task_id": task_id,
+                    "user_id": self.creator_id,
+                    "change_seq": seq,
+                })
+        if label_links:
+            self.db.execute(insert(models.task_labels), label_links)
+        if attachment_rows:
+            self.db.execute(insert(models.Attachment), attachment_rows)
+        self.db.commit()
+
+        self.stats["tasks"] += len(task_ids)
+        self.stats["attachments"] += len(attachment_rows)
+
+@job_handler("import_board")
+def import_board_job(db: Session, payload: dict) -> dict:
+    """Background import of a spooled upload; the file is removed afterwards.
+
+    Chunks are committed as they go, so these jobs are never retried.
+    """
+    path = Path(payload["path"])
+    try:
+        importer = BoardImporter(db, payload["board_id"], payload["user_id"],
+                                 status_map=payload.get("status_map") or {})
+        with path.open("rb") as fp:
+            stats = importer.run(iter_cards(fp, payload["format"]))
+    except ValueError as e:
+        raise JobFailed(str(e))
+    finally:
+        path.unlink(missing_ok=True)
+        # Whatever was committed bypassed the per-task hooks
+        reminder_scheduler.rescan()
+        invalidation_bus.publish("board", payload["board_id"])
+    return {"board_id": payload["board_id"], **stats}
@@ -0,0 +1,242 @@
+import os
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from ..utils.invalidation import bus as invalidation_bus, publish_after_commit
+from ..utils.logging import logger
+
+Handler = Callable[[Session, Dict[str, Any]], Optional[Dict[str, Any]]]
+
+# Job kind -> handler(db, payload) returning a JSON-able result
+HANDLERS: Dict[str, Handler] = {}
+
+class JobFailed(Exception):
+    """Raised by a handler to fail its job without further retries."""
+
+def job_handler(kind: str) -> Callable[[Handler], Handler]:
+    def register(func: Handler) -> Handler:
+        HANDLERS[kind] = func
+        return func
+    return register
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    key: Optional[str] = None,
+    priority: int = 0,
+    max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+    run_at: Optional[datetime] = None,
+    created_by_id: Optional[int] = None,
+) -> models.Job:
+    """Add a job to the session's transaction; it becomes runnable when that commits.
+
+    With a ``key``, enqueueing the same work twice returns the job from the first call.
+    """
+    if key is not None:
+        existing = db.query(models.Job).filter(models.Job.key == key).first()
+        if existing is not None:
+            return existing
+    job = models.Job(
+        kind=kind,
+        payload=payload or {},
+        key=key,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=run_at or datetime.utcnow(),
+        created_by_id=created_by_id,
+    )
+    try:
+        with db.begin_nested():
+            db.add(job)
+    except IntegrityError:
+        # Lost a race for the key
+        return db.query(models.Job).filter(models.Job.key == key).one()
+    publish_after_commit(db, "jobs", kind)
+    return job
+
+def retry_delay(attempts: int) -> timedelta:
+    seconds = settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.JOB_RETRY_MAX_SECONDS))
+
+class JobQueue:
+    """Pool of worker threads running jobs from the ``jobs`` table.
+
+    Workers claim the runnable job with the highest priority (oldest first) with
+    a conditional UPDATE, so any number of threads and processes can share the
+    table. Committed enqueues wake the workers over the invalidation bus; polling
+    every ``poll_interval`` covers anything missed. While a handler runs, its
+    worker renews the claim every third of ``lease``; a job whose claim has not
+    been renewed for ``lease`` is assumed to belong to a dead worker and is
+    claimed again, as long as it has attempts left. Failures are retried with
+    exponential backoff up to the job's ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        workers: int = settings.JOB_WORKERS,
+        poll_interval: float = settings.JOB_POLL_SECONDS,
+        lease: timedelta = timedelta(seconds=settings.JOB_LEASE_SECONDS),
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._wakeup = threading.Condition()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._identity = f"{socket.gethostname()}:{os.getpid()}"
+        invalidation_bus.subscribe("jobs", lambda kind: self.notify())
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopped.clear()
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(f"{self._identity}:{n}",),
+                                      name=f"job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    def stop(self) -> None:
+        if not self._threads:
+            return
+        self._stopped.set()
+        self.notify()
+        for thread in self._threads:
+            thread.join(timeout=10)
+        self._threads = []
+
+    def notify(self) -> None:
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _run(self, worker: str) -> None:
+        while not self._stopped.is_set():
+            try:
+                job = self._claim(worker)
+            except Exception as e:
+                logger.error(f"Claiming a job failed: {str(e)}")
+                job = None
+            if job is not None:
+                self._execute(job, worker)
+                continue
+            with self._wakeup:
+                self._wakeup.wait(self.poll_interval)
+
+    def _claim(self, worker: str) -> Optional[models.Job]:
+        now = datetime.utcnow()
+        claimable = or_(
+            and_(models.Job.status == models.JobStatus.QUEUED.value, models.Job.run_at <= now),
+            and_(models.Job.status == models.JobStatus.RUNNING.value, models.Job.locked_at < now - self.lease),
+        )
+        db = self.session_factory()
+        try:
+            while True:
+                job_id = db.execute(
+                    select(models.Job.id).where(claimable)
+                    .order_by(models.Job.priority.desc(), models.Job.run_at, models.Job.id)
+                    .limit(1)
+                ).scalar()
+                if job_id is None:
+                    return None
+                # Another worker may take the same row first; then look for the next one
+                claimed = db.execute(
+                    update(models.Job)
+                    .where(models.Job.id == job_id, claimable)
+                    .values(status=models.JobStatus.RUNNING.value, locked_by=worker, locked_at=now,
+                            attempts=models.Job.attempts + 1)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                if claimed:
+                    job = db.get(models.Job, job_id)
+                    db.expunge(job)
+                    return job
+        finally:
+            db.close()
+
+    def _finish(self, db: Session, job: models.Job, worker: str, **values) -> None:
+        # Only the worker holding the claim may record the outcome
+        db.execute(
+            update(models.Job)
+            .where(models.Job.id == job.id, models.Job.locked_by == worker,
+                   models.Job.status == models.JobStatus.RUNNING.value)
+            .values(locked_by=None, locked_at=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    def _renew(self, job: models.Job, worker: str, done: threading.Event) -> None:
+        # Keeps the claim of a long-running handler from expiring under it
+        interval = self.lease.total_seconds() / 3
+        while not done.wait(interval):
+            db = self.session_factory()
+            try:
+                db.execute(
+                    update(models.Job)
+                    .where(models.Job.id == job.id, models.Job.locked_by == worker,
+                           models.Job.status == models.JobStatus.RUNNING.value)
+                    .values(locked_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+            except Exception as e:
+                # The next beat tries again; one missed beat still leaves two thirds of the lease
+                logger.warning(f"Renewing the claim on job {job.id} failed: {str(e)}")
+            finally:
+                db.close()
+
+    def _execute(self, job: models.Job, worker: str) -> None:
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._renew, args=(job, worker, done),
+                                     name=f"job-heartbeat-{job.id}", daemon=True)
+        heartbeat.start()
+        db = self.session_factory()
+        try:
+            try:
+                if job.attempts > job.max_attempts:
+                    raise JobFailed("Abandoned by its worker with no attempts left")
+                handler = HANDLERS.get(job.kind)
+                if handler is None:
+                    raise JobFailed(f"No handler for job kind '{job.kind}'")
+                result = handler(db, dict(job.payload or {}))
+            except Exception as e:
+                db.rollback()
+                error = str(e) or type(e).__name__
+                if isinstance(e, JobFailed) or job.attempts >= job.max_attempts:
+                    logger.error(f"Job {job.id} ({job.kind}) failed: {error}")
+                    if not isinstance(e, JobFailed):
+                        logger.debug(traceback.format_exc())
+                    self._finish(db, job, worker, status=models.JobStatus.FAILED.value,
+                                 last_error=error, finished_at=datetime.utcnow())
+                else:
+                    delay = retry_delay(job.attempts)
+                    logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed, "
+                                   f"retrying in {delay.total_seconds():.0f}s: {error}")
+                    self._finish(db, job, worker, status=models.JobStatus.QUEUED.value,
+                                 last_error=error, run_at=datetime.utcnow() + delay)
+                return
+            # Work the handler left uncommitted lands together with the status
+            self._finish(db, job, worker, status=models.JobStatus.SUCCEEDED.value,
+                         result=result, last_error=None, finished_at=datetime.utcnow())
+        except Exception as e:
+            logger.error(f"Recording the outcome of job {job.id} failed: {str(e)}")
+        finally:
+            done.set()
+            db.close()
+
+runner = JobQueue()
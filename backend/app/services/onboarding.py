@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..auth.utils import get_password_hash
+from ..utils.invalidation import publish_after_commit
+from ..utils.logging import logger
+
+class ProvisioningConflict(Exception):
+    """A batch hit a unique email or username registered after the up-front check.
+
+    Earlier batches are already committed; their users are in ``user_ids``.
+    """
+
+    def __init__(self, user_ids: List[int], conflicts: List[str]):
+        super().__init__(f"Provisioning stopped after {len(user_ids)} users")
+        self.user_ids = user_ids
+        self.conflicts = conflicts
+
+def create_user_with_workspace(db: Session, email: str, username: str, full_name: Optional[str],
+                               hashed_password: str) -> models.User:
+    """Add a user with a personal team and board, both administered by that user.
+
+    Ids are assigned with flushes, so the whole workspace is written in the
+    caller's transaction and becomes visible with a single commit.
+    """
+    user = models.User(email=email, username=username, full_name=full_name, hashed_password=hashed_password)
+    db.add(user)
+    db.flush()
+
+    team = models.Team(name="My Team", description="My personal team", created_by_id=user.id)
+    db.add(team)
+    db.flush()
+
+    board = models.Board(
+        name="My Board",
+        description="My personal board",
+        team_id=team.id,
+        created_by_id=user.id,
+        is_public=True
+    )
+    db.add(board)
+    db.flush()
+
+    db.add_all([
+        models.TeamMember(team_id=team.id, user_id=user.id, role='admin'),
+        models.BoardMember(board_id=board.id, user_id=user.id, role='admin'),
+    ])
+    return user
+
+def find_conflicts(db: Session, users: Sequence, batch_size: int = 500) -> List[str]:
+    """Emails and usernames that repeat within ``users`` or are already registered."""
+    conflicts = []
+    seen = set()
+    for user in users:
+        for value in (user.email, user.username):
+            if value in seen:
+                conflicts.append(value)
+            seen.add(value)
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        emails = {user.email for user in batch}
+        usernames = {user.username for user in batch}
+        for email, username in db.execute(
+            select(models.User.email, models.User.username)
+            .where(or_(models.User.email.in_(emails), models.User.username.in_(usernames)))
+        ):
+            if email in emails:
+                conflicts.append(email)
+            if username in usernames:
+                conflicts.append(username)
+    return sorted(set(conflicts))
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def provision_users(db: Session, users: Sequence, team_id: Optional[int] = None, batch_size: int = 500,
+                    hash_workers: Optional[int] = None) -> List[int]:
+    """Create many users, each with a personal workspace, using batched inserts.
+
+    Passwords are hashed on a thread pool (bcrypt releases the GIL) while earlier
+    batches are being written. Each batch of users is inserted together with its
+    teams, boards and memberships in one transaction, so no user is ever left
+    without a workspace. Users are also added to ``team_id`` when given.
+    Returns the new user ids in input order.
+
+    Raises ``ProvisioningConflict`` if a batch collides with a user registered
+    concurrently; that batch is rolled back, the ones before it stay.
+    """
+    user_ids: List[int] = []
+    with ThreadPoolExecutor(max_workers=hash_workers or os.cpu_count() or 1) as pool:
+        hashes = pool.map(get_password_hash, (user.password for user in users))
+        for batch in _batches(zip(users, hashes), batch_size):
+            try:
+                user_ids.extend(_insert_batch(db, batch, team_id))
+            except IntegrityError:
+                db.rollback()
+                # Don't hash the passwords of users that will not be created
+                pool.shutdown(cancel_futures=True)
+                raise ProvisioningConflict(user_ids, find_conflicts(db, [user for user, _ in batch])) from None
+            logger.info(f"Provisioned {len(user_ids)} of {len(users)} users")
+    return user_ids
+
+def _insert_batch(db: Session, batch: list, team_id: Optional[int]) -> List[int]:
+    user_ids = db.execute(
+        insert(models.User).returning(models.User.id, sort_by_parameter_order=True),
+        [
+            {"email": user.email, "username": user.username, "full_name": user.full_name,
+             "hashed_password": hashed_password}
+            for user, hashed_password in batch
+        ]
+    ).scalars().all()
+    team_ids = db.execute(
+        insert(models.Team).returning(models.Team.id, sort_by_parameter_order=True),
+        [{"name": "My Team", "description": "My personal team", "created_by_id": user_id} for user_id in user_ids]
+    ).scalars().all()
+    board_ids = db.execute(
+        insert(models.Board).returning(models.Board.id, sort_by_parameter_order=True),
+        [
+            {"name": "My Board", "description": "My personal board", "team_id": personal_team_id,
+             "created_by_id": user_id, "is_public": True}
+            for user_id, personal_team_id in zip(user_ids, team_ids)
+        ]
+    ).scalars().all()
+
+    team_members: List[Dict] = [
+        {"team_id": personal_team_id, "user_id": user_id, "role": "admin"}
+        for user_id, personal_team_id in zip(user_ids, team_ids)
+    ]
+    if team_id is not None:
+        team_members.extend({"team_id": team_id, "user_id": user_id, "role": "member"} for user_id in user_ids)
+    db.execute(insert(models.TeamMember), team_members)
+    db.execute(insert(models.BoardMember), [
+        {"board_id": board_id, "user_id": user_id, "role": "admin"}
+        for user_id, board_id in zip(user_ids, board_ids)
+    ])
+    if team_id is not None:
+        db.execute(
+            update(models.Team).where(models.Team.id == team_id)
+            .values(membership_version=models.Team.membership_version + 1)
+        )
+        publish_after_commit(db, "team", team_id)
+    db.commit()
+    return user_ids
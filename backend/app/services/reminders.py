@@ -0,0 +1,213 @@
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from ..utils.logging import logger
+
+# (fire_at, task_id, kind, due_date)
+Event = Tuple[datetime, int, str, datetime]
+
+def _naive_utc(dt: datetime) -> datetime:
+    """Due dates are stored without a timezone; treat them all as naive UTC."""
+    if dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def insert_ignoring_duplicates(db: Session, table, rows: List[dict]) -> None:
+    """INSERT rows, silently skipping ones that violate a unique constraint."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(table), [row])
+            except IntegrityError:
+                pass
+        return
+    db.execute(dialect_insert(table).on_conflict_do_nothing(), rows)
+
+class ReminderScheduler:
+    """Fire "due soon" and "overdue" notifications from an in-memory timer queue.
+
+    Only tasks due within a sliding window are kept in a min-heap; the window is
+    filled with range scans on the ``due_date`` index as it advances, and task
+    writes push their new events in directly, so the tasks table is never scanned
+    as a whole. Heap entries are validated against the current task row when they
+    fire, which makes stale entries (moved due dates, archived or deleted tasks)
+    harmless. Notifications are inserted with a unique key, so restarts replaying
+    the catch-up window and several workers running schedulers do not duplicate them.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        lead: timedelta = timedelta(hours=settings.REMINDER_LEAD_HOURS),
+        window: timedelta = timedelta(hours=settings.REMINDER_WINDOW_HOURS),
+        catchup: timedelta = timedelta(hours=settings.REMINDER_CATCHUP_HOURS),
+        max_sleep: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.lead = lead
+        self.window = window
+        self.catchup = catchup
+        self.max_sleep = max_sleep
+        self._heap: List[Event] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Every task with a due date in (_covered_from, _covered_until] has its events in the heap
+        self._covered_from: Optional[datetime] = None
+        self._covered_until: Optional[datetime] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        now = datetime.utcnow()
+        self._covered_from = self._covered_until = now - self.catchup
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Reminder scheduler started")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _events_for(self, task_id: int, due_date: datetime) -> List[Event]:
+        due_date = _naive_utc(due_date)
+        return [
+            (due_date - self.lead, task_id, models.NotificationKind.DUE_SOON.value, due_date),
+            (due_date, task_id, models.NotificationKind.OVERDUE.value, due_date),
+        ]
+
+    def task_written(self, task_id: int, due_date: Optional[datetime]) -> None:
+        """Incrementally refresh the queue after a task was created or updated."""
+        if due_date is None or self._covered_until is None:
+            return
+        due_date = _naive_utc(due_date)
+        with self._lock:
+            # Beyond the loaded window the next range scan will pick the task up
+            if due_date > self._covered_until:
+                return
+            head = self._heap[0][0] if self._heap else None
+            for event in self._events_for(task_id, due_date):
+                heapq.heappush(self._heap, event)
+        if head is None or due_date - self.lead < head:
+            self._wakeup.set()
+
+    def rescan(self) -> None:
+        """Reload the current window, e.g. after rows were bulk-inserted behind the ORM."""
+        with self._lock:
+            self._covered_until = self._covered_from
+        self._wakeup.set()
+
+    def _extend_window(self, db: Session, now: datetime) -> None:
+        until = now + self.window + self.lead
+        with self._lock:
+            start = self._covered_until
+        if start is not None and start >= now + self.lead + self.window / 2:
+            return
+        rows = db.execute(
+            select(models.Task.id, models.Task.due_date).where(
+                models.Task.due_date > start,
+                models.Task.due_date <= until,
+                ~models.Task.is_archived,
+            )
+        ).all()
+        with self._lock:
+            for task_id, due_date in rows:
+                for event in self._events_for(task_id, due_date):
+                    heapq.heappush(self._heap, event)
+            self._covered_until = until
+
+    def _pop_due(self, now: datetime) -> List[Event]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap))
+        return due
+
+    def _fire(self, db: Session, events: List[Event]) -> int:
+        task_ids = {task_id for _, task_id, _, _ in events}
+        tasks = {
+            task.id: task
+            for task in db.execute(
+                select(models.Task.id, models.Task.due_date, models.Task.status,
+                       models.Task.is_archived, models.Task.creator_id)
+                .where(models.Task.id.in_(task_ids))
+            )
+        }
+        assignees: Dict[int, Set[int]] = defaultdict(set)
+        for task_id, user_id in db.execute(
+            select(models.task_members.c.task_id, models.task_members.c.user_id)
+            .where(models.task_members.c.task_id.in_(task_ids))
+        ):
+            assignees[task_id].add(user_id)
+
+        rows = []
+        seen = set()
+        for _, task_id, kind, due_date in events:
+            task = tasks.get(task_id)
+            # Skip stale entries: task gone, archived, finished or rescheduled
+            if task is None or task.is_archived or task.status == models.TaskStatus.DONE.value:
+                continue
+            if task.due_date is None or _naive_utc(task.due_date) != due_date:
+                continue
+            for user_id in assignees.get(task_id) or {task.creator_id}:
+                key = (user_id, task_id, kind, due_date)
+                if user_id is None or key in seen:
+                    continue
+                seen.add(key)
+                rows.append({"user_id": user_id, "task_id": task_id, "kind": kind, "due_date": due_date})
+        if rows:
+            insert_ignoring_duplicates(db, models.Notification.__table__, rows)
+            db.commit()
+        return len(rows)
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """Advance the window and fire everything that is due; returns notifications written."""
+        now = now or datetime.utcnow()
+        db = self.session_factory()
+        try:
+            self._extend_window(db, now)
+            events = self._pop_due(now)
+            return self._fire(db, events) if events else 0
+        finally:
+            db.close()
+
+    def _seconds_until_next(self) -> float:
+        now = datetime.utcnow()
+        with self._lock:
+            head = self._heap[0][0] if self._heap else None
+        if head is None:
+            return self.max_sleep
+        return min(self.max_sleep, max(0.0, (head - now).total_seconds()))
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Reminder scheduler error: {str(e)}")
+            self._wakeup.wait(self._seconds_until_next())
+            self._wakeup.clear()
+
+scheduler = ReminderScheduler()
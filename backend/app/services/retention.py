@@ -0,0 +1,252 @@
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from ..utils.logging import logger
+from .deletion import delete_tasks
+from .jobs import JobFailed, enqueue, job_handler
+
+# Storage maintenance, run as background jobs: a garbage collector for upload
+# files no attachment refers to any more, and the retention purge of archived
+# tasks. Both work in batches, commit as they go and can be re-run at any time;
+# with dry_run they only report what they would remove.
+
+UPLOAD_DIR = Path(settings.UPLOAD_DIR)
+
+# How many orphaned file names a report lists
+REPORT_SAMPLE = 100
+
+class _Throttle:
+    """Spaces calls to ``wait`` at least 1/``per_second`` seconds apart."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = time.monotonic()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next > now:
+            time.sleep(self._next - now)
+        self._next = max(self._next, now) + self.interval
+
+def _upload_batches(directory: Path, batch_size: int) -> Iterator[List[os.DirEntry]]:
+    # scandir streams the directory instead of listing it whole
+    batch = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+def _cold_archive_files(db: Session, prefix: str) -> Set[str]:
+    """File paths still referenced by attachments kept in the cold archive."""
+    paths = set()
+    result = db.execute(
+        select(models.ArchivedTask.data).execution_options(stream_results=True, yield_per=1000)
+    )
+    for data, in result:
+        for attachment in (data or {}).get("attachments", []):
+            path = attachment.get("file_path")
+            if not path:
+                continue
+            if not path.startswith(prefix):
+                raise JobFailed(f"Archived attachment path {path!r} is outside {prefix!r}; not collecting")
+            paths.add(path)
+    return paths
+
+def collect_orphaned_files(
+    db: Session,
+    *,
+    dry_run: bool = False,
+    directory: Path = UPLOAD_DIR,
+    batch_size: int = settings.GC_BATCH_SIZE,
+    grace: timedelta = timedelta(hours=settings.GC_GRACE_HOURS),
+    deletes_per_second: float = settings.GC_DELETES_PER_SECOND,
+) -> Dict[str, Any]:
+    """Delete upload files that no attachment, live or cold-archived, refers to.
+
+    The directory is read in batches of ``batch_size`` files, each checked with
+    one indexed lookup on ``attachments.file_path`` (clones share files, so a
+    file is live while any row names it). Paths referenced from the cold archive
+    are collected once up front. Files modified within ``grace`` are skipped.
+    """
+    if not directory.is_dir():
+        return {"dry_run": dry_run, "scanned": 0, "orphaned": 0, "deleted": 0, "bytes": 0, "orphans": []}
+    # Paths are compared as add_attachment stores them; if UPLOAD_DIR was changed
+    # since, nothing would match and every file would look orphaned
+    prefix = os.path.join(str(directory), "")
+    stray = db.execute(
+        select(models.Attachment.file_path).where(
+            models.Attachment.file_path.isnot(None),
+            ~models.Attachment.file_path.startswith(prefix, autoescape=True)
+        ).limit(1)
+    ).scalar()
+    if stray is not None:
+        raise JobFailed(f"Attachment path {stray!r} is outside {prefix!r}; not collecting")
+    archived = _cold_archive_files(db, prefix)
+
+    cutoff = time.time() - grace.total_seconds()
+    throttle = _Throttle(deletes_per_second)
+    report = {"dry_run": dry_run, "scanned": 0, "orphaned": 0, "deleted": 0, "bytes": 0, "orphans": []}
+    for batch in _upload_batches(directory, batch_size):
+        report["scanned"] += len(batch)
+        paths = {str(directory / entry.name): entry for entry in batch}
+        live = set(db.execute(
+            select(models.Attachment.file_path).where(models.Attachment.file_path.in_(paths))
+        ).scalars())
+        # Don't keep a read transaction open while deleting files
+        db.rollback()
+        for path, entry in paths.items():
+            if path in live or path in archived:
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime > cutoff:
+                continue
+            report["orphaned"] += 1
+            report["bytes"] += stat.st_size
+            if len(report["orphans"]) < REPORT_SAMPLE:
+                report["orphans"].append(entry.name)
+            if dry_run:
+                continue
+            throttle.wait()
+            try:
+                os.unlink(entry.path)
+                report["deleted"] += 1
+            except FileNotFoundError:
+                pass
+    logger.info(f"Upload GC{' (dry run)' if dry_run else ''}: {report['orphaned']} of "
+                f"{report['scanned']} files orphaned, {report['bytes']} bytes")
+    return report
+
+def retention_clause(model, now: Optional[datetime] = None):
+    """SQL condition on ``models.Task`` or ``models.ArchivedTask`` matching rows
+    archived longer than their board's retention, or None if nothing expires."""
+    now = now or datetime.utcnow()
+    overrides = {int(board_id): int(days) for board_id, days in settings.RETENTION_BOARD_DAYS.items()}
+    clauses = []
+    if settings.RETENTION_ARCHIVED_DAYS:
+        default = model.archived_at < now - timedelta(days=settings.RETENTION_ARCHIVED_DAYS)
+        if overrides:
+            default = and_(default, or_(model.board_id.is_(None), model.board_id.notin_(overrides)))
+        clauses.append(default)
+    for board_id, days in overrides.items():
+        if days:
+            clauses.append(and_(model.board_id == board_id, model.archived_at < now - timedelta(days=days)))
+    if not clauses:
+        return None
+    return or_(*clauses)
+
+def purge_archived(
+    db: Session,
+    *,
+    dry_run: bool = False,
+    batch_size: int = settings.RETENTION_BATCH_SIZE,
+    pause: float = settings.RETENTION_BATCH_PAUSE_SECONDS,
+) -> Dict[str, Any]:
+    """Delete archived tasks, hot and cold, past their retention period.
+
+    Works ``batch_size`` tasks per transaction and sleeps ``pause`` seconds in
+    between, leaving room for other writers. Their upload files are left to the
+    next garbage collection. The report counts the matching tasks per board up
+    front; ``deleted`` holds what the batches actually removed.
+    """
+    report = {"dry_run": dry_run, "tasks": 0, "archived_tasks": 0, "boards": {},
+              "deleted": {"tasks": 0, "archived_tasks": 0}}
+    now = datetime.utcnow()
+    hot = retention_clause(models.Task, now)
+    cold = retention_clause(models.ArchivedTask, now)
+    if hot is None:
+        return report
+    hot = and_(models.Task.is_archived.is_(True), hot)
+
+    for key, model, clause in (("tasks", models.Task, hot), ("archived_tasks", models.ArchivedTask, cold)):
+        for board_id, count in db.execute(
+            select(model.board_id, func.count(model.id)).where(clause).group_by(model.board_id)
+        ):
+            report["boards"].setdefault(str(board_id), {"tasks": 0, "archived_tasks": 0})[key] = count
+            report[key] += count
+    db.rollback()
+    if dry_run:
+        return report
+
+    while True:
+        task_ids = db.execute(
+            select(models.Task.id).where(hot).order_by(models.Task.id).limit(batch_size)
+        ).scalars().all()
+        if not task_ids:
+            break
+        report["deleted"]["tasks"] += delete_tasks(db, task_ids)
+        db.commit()
+        time.sleep(pause)
+    while True:
+        archived_ids = (
+            select(models.ArchivedTask.id).where(cold)
+            .order_by(models.ArchivedTask.id).limit(batch_size).scalar_subquery()
+        )
+        deleted = db.execute(delete(models.ArchivedTask).where(models.ArchivedTask.id.in_(archived_ids))).rowcount
+        if not deleted:
+            break
+        report["deleted"]["archived_tasks"] += deleted
+        db.commit()
+        time.sleep(pause)
+    db.commit()
+    logger.info(f"Purged {report['deleted']['tasks']} archived tasks and "
+                f"{report['deleted']['archived_tasks']} cold-archived tasks")
+    return report
+
+# Scheduled runs: one job per kind and interval, keyed by the interval's number,
+# so every app process can schedule without creating duplicates. Purging first
+# lets the collection that follows pick up the purged tasks' files.
+MAINTENANCE_JOBS = (("purge_archived", -1), ("gc_uploads", -2))
+
+def schedule_maintenance(db: Session, ahead: int = 0) -> None:
+    """Enqueue the maintenance jobs of the current interval (``ahead`` = 1: the next one)."""
+    if settings.MAINTENANCE_INTERVAL_HOURS <= 0:
+        return
+    interval = settings.MAINTENANCE_INTERVAL_HOURS * 3600
+    period = int(time.time() // interval) + ahead
+    run_at = datetime.utcfromtimestamp(period * interval) if ahead else None
+    for kind, priority in MAINTENANCE_JOBS:
+        enqueue(db, kind, {"scheduled": True}, key=f"{kind}:{period}", priority=priority, run_at=run_at)
+
+def start_maintenance() -> None:
+    """Make sure this interval's maintenance jobs exist; each run schedules the next."""
+    db = SessionLocal()
+    try:
+        schedule_maintenance(db)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Scheduling maintenance jobs failed: {str(e)}")
+    finally:
+        db.close()
+
+@job_handler("purge_archived")
+def purge_archived_job(db: Session, payload: dict) -> dict:
+    report = purge_archived(db, dry_run=payload.get("dry_run", False))
+    if payload.get("scheduled"):
+        schedule_maintenance(db, ahead=1)
+    return report
+
+@job_handler("gc_uploads")
+def gc_uploads_job(db: Session, payload: dict) -> dict:
+    report = collect_orphaned_files(db, dry_run=payload.get("dry_run", False))
+    if payload.get("scheduled"):
+        schedule_maintenance(db, ahead=1)
+    return report
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..utils.logging import logger
+
+# Delta sync. Every transaction that writes a task, comment, label or attachment
+# takes the next value of one global change sequence (the single sync_state row)
+# and stamps it on the rows it writes; deletes leave a tombstone carrying it.
+# Because the counter row stays locked until the transaction ends, sequences
+# become visible in order, so "everything above my cursor" never skips a write
+# that commits late. Writes made through the ORM are stamped by the before_flush
+# hook below; Core statements must stamp ``change_seq(db)`` themselves.
+
+TRACKED = {
+    models.Task: "task",
+    models.Comment: "comment",
+    models.Label: "label",
+    models.Attachment: "attachment",
+}
+
+def change_seq(db: Session) -> int:
+    """The change sequence of the session's current transaction, allocated on first use."""
+    seq = db.info.get("change_seq")
+    if seq is None:
+        seq = db.execute(
+            update(models.SyncState)
+            .where(models.SyncState.id == 1)
+            .values(last_seq=models.SyncState.last_seq + 1)
+            .returning(models.SyncState.last_seq)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if seq is None:
+            # Databases created with create_all start without the row
+            seq = 1
+            db.execute(insert(models.SyncState).values(id=1, last_seq=seq, compacted_seq=0))
+        db.info["change_seq"] = seq
+    return seq
+
+def current_seq(db: Session) -> Tuple[int, int]:
+    """The last committed change sequence and the compaction horizon."""
+    row = db.execute(select(models.SyncState.last_seq, models.SyncState.compacted_seq)
+                     .where(models.SyncState.id == 1)).first()
+    return (row.last_seq, row.compacted_seq) if row else (0, 0)
+
+def record_tombstones(db: Session, entity: str, rows: Iterable[Tuple[int, Optional[int]]]) -> None:
+    """Tombstone rows removed with Core DELETEs, given as (id, board_id) pairs."""
+    seq = change_seq(db)
+    values = [
+        {"entity": entity, "entity_id": entity_id, "board_id": board_id, "change_seq": seq}
+        for entity_id, board_id in rows
+    ]
+    if values:
+        db.execute(insert(models.Tombstone), values)
+
+def _board_id(session: Session, obj) -> Optional[int]:
+    if isinstance(obj, models.Task):
+        return obj.board_id
+    task = session.get(models.Task, obj.task_id) if obj.task_id is not None else None
+    return task.board_id if task is not None else None
+
+@event.listens_for(Session, "before_flush")
+def _stamp_changes(session: Session, flush_context, instances) -> None:
+    for obj in session.new:
+        if type(obj) in TRACKED:
+            obj.change_seq = change_seq(session)
+    for obj in session.dirty:
+        # Collection changes count too, so relinking labels or assignees bumps the task
+        if type(obj) in TRACKED and session.is_modified(obj):
+            obj.change_seq = change_seq(session)
+    deleted = [obj for obj in session.deleted if type(obj) in TRACKED]
+    # A task tombstone stands for its comments and attachments as well
+    deleted_tasks = {obj.id for obj in deleted if isinstance(obj, models.Task)}
+    for obj in deleted:
+        entity = TRACKED[type(obj)]
+        if entity == "label" or (entity != "task" and obj.task_id in deleted_tasks):
+            continue
+        session.add(models.Tombstone(
+            entity=entity,
+            entity_id=obj.id,
+            board_id=_board_id(session, obj),
+            change_seq=change_seq(session),
+        ))
+
+@event.listens_for(Session, "after_commit")
+def _reset_seq(session: Session) -> None:
+    session.info.pop("change_seq", None)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_seq(session: Session, previous_transaction) -> None:
+    # Also on savepoint rollbacks: the counter increment may have been undone with it
+    session.info.pop("change_seq", None)
+
+def compact_tombstones(db: Session, older_than: timedelta) -> int:
+    """Drop tombstones older than ``older_than`` and raise the compaction horizon.
+
+    Deletes by sequence rather than by time so that every tombstone above the
+    horizon is still present. Returns the number of tombstones removed.
+    """
+    cutoff = datetime.utcnow() - older_than
+    horizon = db.query(func.max(models.Tombstone.change_seq)).filter(
+        models.Tombstone.deleted_at < cutoff
+    ).scalar()
+    if horizon is None:
+        return 0
+    removed = db.execute(
+        delete(models.Tombstone).where(models.Tombstone.change_seq <= horizon)
+    ).rowcount
+    db.execute(
+        update(models.SyncState)
+        .where(models.SyncState.id == 1, models.SyncState.compacted_seq < horizon)
+        .values(compacted_seq=horizon)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    logger.info(f"Compacted {removed} tombstones up to change {horizon}")
+    return removed
@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..utils.logging import logger
+
+T = TypeVar("T")
+Job = Callable[[Session], T]
+
+class WriteQueueTimeout(Exception):
+    """A write waited longer than ``WRITE_QUEUE_TIMEOUT_SECONDS`` for the writer."""
+
+class WriteQueue:
+    """Single writer that group-commits small write transactions.
+
+    SQLite allows one writer at a time, so request threads committing on their
+    own mostly wait on the database lock and pay one journal sync each. Jobs
+    submitted here are run by one thread instead: every job that arrives within
+    ``window`` seconds of the first (up to ``max_batch``) runs in its own
+    SAVEPOINT inside one shared transaction, which is committed once. A job that
+    raises only rolls back its savepoint and fails its own future.
+
+    Jobs receive the writer's session and must return plain values (e.g. schema
+    objects built after a flush), as ORM instances expire on commit.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        window: float = settings.WRITE_QUEUE_WINDOW_MS / 1000,
+        max_batch: int = settings.WRITE_QUEUE_MAX_BATCH,
+    ):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[Tuple[Future, Job]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self._thread.start()
+        logger.info("Write queue started")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        # Jobs queued before the sentinel are still committed
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._thread = None
+        # Anything left (submitted after the sentinel, or behind a writer that did
+        # not finish in time) would otherwise keep its caller waiting
+        stopped = RuntimeError("Write queue stopped")
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[0].set_running_or_notify_cancel():
+                item[0].set_exception(stopped)
+
+    def submit(self, job: Job) -> "Future[T]":
+        future: Future = Future()
+        self._queue.put((future, job))
+        return future
+
+    def _next_batch(self) -> Tuple[List[Tuple[Future, Job]], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._commit_batch(batch)
+
+    def _commit_batch(self, batch: List[Tuple[Future, Job]]) -> None:
+        db = self.session_factory()
+        done: List[Tuple[Future, object]] = []
+        try:
+            if db.get_bind().dialect.name == "sqlite":
+                # pysqlite defers BEGIN until the first DML statement, which would let the
+                # first SAVEPOINT open (and its RELEASE commit) a transaction of its own
+                db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            for future, job in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # Invalidations registered by a job whose savepoint rolls back must not
+                # be published when the rest of the batch commits
+                pending = set(db.info.get("invalidations", ()))
+                try:
+                    with db.begin_nested():
+                        result = job(db)
+                except Exception as e:
+                    db.info["invalidations"] = pending
+                    future.set_exception(e)
+                else:
+                    done.append((future, result))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Write queue batch of {len(batch)} failed: {str(e)}")
+            db.rollback()
+            for future, _ in done:
+                future.set_exception(e)
+            for future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            db.close()
+        for future, result in done:
+            future.set_result(result)
+
+writer = WriteQueue()
+
+def run_write(db: Session, job: Job) -> T:
+    """Run a write job through the shared writer when it is enabled, else in ``db``."""
+    if writer.running:
+        # End the request's transaction to hand its connection back to the pool while
+        # waiting; with many requests queued behind the writer it would otherwise
+        # have none to use. Committing (rather than rolling back) keeps the
+        # session's after-commit hooks, such as read stickiness, firing.
+        db.commit()
+        future = writer.submit(job)
+        try:
+            return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT_SECONDS)
+        except TimeoutError:
+            # A job the writer has not started is dropped; one it is running may
+            # still commit, so the caller cannot assume the write did not happen
+            future.cancel()
+            raise WriteQueueTimeout() from None
+    result = job(db)
+    db.commit()
+    return result
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from .logging import logger
+
+# Messages are "topic:key" lines, several per datagram
+MAX_DATAGRAM = 8192
+PEER_REFRESH_SECONDS = 1.0
+
+Handler = Callable[[str], None]
+
+class InvalidationBus:
+    """Broadcast cache invalidations between the worker processes of one host.
+
+    Every worker binds a Unix datagram socket in a shared directory; publishing
+    delivers to local subscribers and sends one datagram to each peer socket
+    found there. Sockets left behind by dead workers are removed when a send to
+    them fails. Without Unix socket support the bus only dispatches locally.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._sock: Optional[socket.socket] = None
+        self._path: Optional[Path] = None
+        self._thread: Optional[threading.Thread] = None
+        self._peers: List[str] = []
+        self._peers_checked = 0.0
+        self._send_lock = threading.Lock()
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers[topic].append(handler)
+
+    def start(self) -> None:
+        if self._sock is not None or not hasattr(socket, "AF_UNIX"):
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path = self.directory / f"{os.getpid()}.sock"
+        if self._path.exists():
+            self._path.unlink()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(str(self._path))
+        # Lets the receiver thread notice stop() without a message arriving
+        self._sock.settimeout(1.0)
+        self._thread = threading.Thread(target=self._receive, name="invalidation-bus", daemon=True)
+        self._thread.start()
+        logger.info(f"Invalidation bus listening on {self._path}")
+
+    def stop(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is None:
+            return
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        sock.close()
+        if self._path is not None:
+            self._path.unlink(missing_ok=True)
+
+    def publish(self, topic: str, key) -> None:
+        self.publish_many([(topic, str(key))])
+
+    def publish_many(self, messages: Iterable[Tuple[str, str]]) -> None:
+        messages = list(messages)
+        self._dispatch(messages)
+        sock = self._sock
+        if sock is not None:
+            self._broadcast(sock, messages)
+
+    def _dispatch(self, messages: Iterable[Tuple[str, str]]) -> None:
+        for topic, key in messages:
+            for handler in self._handlers.get(topic, ()):
+                try:
+                    handler(key)
+                except Exception as e:
+                    logger.error(f"Invalidation handler for {topic} failed: {str(e)}")
+
+    def _peer_paths(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_checked > PEER_REFRESH_SECONDS:
+            own = self._path.name if self._path else None
+            self._peers = [str(path) for path in self.directory.glob("*.sock") if path.name != own]
+            self._peers_checked = now
+        return self._peers
+
+    def _encode(self, messages: List[Tuple[str, str]]) -> List[bytes]:
+        datagrams = []
+        current = b""
+        for topic, key in messages:
+            line = f"{topic}:{key}\n".encode()
+            if current and len(current) + len(line) > MAX_DATAGRAM:
+                datagrams.append(current)
+                current = b""
+            current += line
+        if current:
+            datagrams.append(current)
+        return datagrams
+
+    def _broadcast(self, sock: socket.socket, messages: List[Tuple[str, str]]) -> None:
+        datagrams = self._encode(messages)
+        with self._send_lock:
+            for peer in self._peer_paths():
+                for datagram in datagrams:
+                    try:
+                        sock.sendto(datagram, peer)
+                    except (ConnectionRefusedError, FileNotFoundError):
+                        # The worker behind this socket is gone
+                        Path(peer).unlink(missing_ok=True)
+                        self._peers_checked = 0.0
+                        break
+                    except (BlockingIOError, OSError) as e:
+                        logger.warning(f"Dropped invalidation to {peer}: {str(e)}")
+                        break
+
+    def _receive(self) -> None:
+        sock = self._sock
+        while self._sock is not None:
+            try:
+                data = sock.recv(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            messages = []
+            for line in data.decode().splitlines():
+                topic, _, key = line.partition(":")
+                messages.append((topic, key))
+            self._dispatch(messages)
+
+def _default_directory() -> str:
+    # Workers serving the same database share a directory
+    digest = hashlib.sha1(settings.DATABASE_URL.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"kanban-bus-{digest}")
+
+bus = InvalidationBus(settings.INVALIDATION_BUS_DIR or _default_directory())
+
+def publish_after_commit(db: Session, topic: str, key) -> None:
+    """Queue an invalidation that is broadcast only if the session's transaction commits."""
+    db.info.setdefault("invalidations", set()).add((topic, str(key)))
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    pending = session.info.pop("invalidations", None)
+    if pending:
+        bus.publish_many(pending)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop("invalidations", None)
@@ -0,0 +1,24 @@
+import contextvars
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Mutable counter for the current request. A list is used so that increments made
+# in threadpool workers (sync endpoints) are visible to the middleware.
+_query_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "query_counter", default=None
+)
+
+def install_query_counter(engine: Engine) -> None:
+    """Count every statement executed on the engine against the active request."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        counter = _query_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+def start_query_count() -> List[int]:
+    """Start counting queries for the current context and return the counter."""
+    counter = [0]
+    _query_counter.set(counter)
+    return counter
@@ -0,0 +1,184 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+
+from ..auth.utils import ALGORITHM, SECRET_KEY
+
+READ_METHODS = {"GET", "HEAD"}
+AUTH_PATHS = {"/api/auth/login", "/api/auth/register"}
+
+class InMemoryBucketStore:
+    """Token buckets held in this process; suitable for a single worker."""
+
+    # Cheap enough to call on the event loop
+    blocking = False
+
+    # Drop idle buckets once this many keys are tracked
+    MAX_KEYS = 100_000
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        """Consume one token. Returns 0 if allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                if len(self._buckets) > self.MAX_KEYS:
+                    self._evict_idle(now, rate, capacity)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def _evict_idle(self, now: float, rate: float, capacity: float) -> None:
+        # A bucket that would have refilled completely carries no state worth keeping
+        idle = [key for key, (tokens, updated) in self._buckets.items()
+                if tokens + (now - updated) * rate >= capacity]
+        for key in idle:
+            del self._buckets[key]
+
+class SQLiteBucketStore:
+    """Token buckets in a local SQLite file shared by every worker on the host."""
+
+    # Waits up to a second for the file lock, so it is called from the threadpool
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, rate: float, capacity: float) -> float:
+        # Wall-clock time: monotonic clocks are not comparable across processes
+        now = time.time()
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+            conn.execute(
+                "INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Fail open: a busy limiter store must not take the API down
+            return 0.0
+        return retry_after
+
+@lru_cache(maxsize=4096)
+def _user_id_from_token(token: str) -> Optional[str]:
+    # Only the signature matters for keying; expiry is enforced by the auth layer
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-user and per-IP token buckets.
+
+    Authenticated API requests are keyed by the user id in their bearer token,
+    with separate budgets for read and write methods; login and registration
+    are keyed by client IP. Rejected requests get ``429`` with ``Retry-After``.
+    """
+
+    def __init__(self, app, store, read_limit: Tuple[int, int], write_limit: Tuple[int, int],
+                 auth_limit: Tuple[int, int]):
+        self.app = app
+        self.store = store
+        # (tokens per second, bucket capacity) from (requests per minute, burst)
+        self.budgets = {
+            name: (per_minute / 60.0, float(burst))
+            for name, (per_minute, burst) in
+            (("read", read_limit), ("write", write_limit), ("auth", auth_limit))
+        }
+
+    def _bucket(self, scope) -> Optional[Tuple[str, str]]:
+        path = scope["path"]
+        method = scope["method"]
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        if path in AUTH_PATHS:
+            return f"auth:ip:{client_ip}", "auth"
+        if method == "OPTIONS" or not path.startswith("/api/"):
+            return None
+        budget = "read" if method in READ_METHODS else "write"
+        user_id = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    user_id = _user_id_from_token(token)
+                break
+        if user_id is not None:
+            return f"{budget}:user:{user_id}", budget
+        return f"{budget}:ip:{client_ip}", budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        bucket = self._bucket(scope)
+        if bucket is not None:
+            key, budget = bucket
+            rate, capacity = self.budgets[budget]
+            if self.store.blocking:
+                retry_after = await run_in_threadpool(self.store.take, key, rate, capacity)
+            else:
+                retry_after = self.store.take(key, rate, capacity)
+            if retry_after > 0:
+                body = json.dumps({"detail": "Too many requests"}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 429,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"retry-after", str(math.ceil(retry_after)).encode()),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        await self.app(scope, receive, send)
+
+def build_store(backend: str, path: str):
+    if backend == "memory":
+        return InMemoryBucketStore()
+    if backend == "sqlite":
+        return SQLiteBucketStore(path)
+    raise ValueError(f"Unknown rate limit backend '{backend}'")
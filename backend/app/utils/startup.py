@@ -0,0 +1,82 @@
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import configure_mappers
+
+from .. import models  # noqa: F401  (registers every table on Base.metadata)
+from ..database import Base
+from .logging import logger
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent.parent / "alembic"
+
+# The schema of databases created by create_all before startup checked revisions
+BASELINE_REVISION = "0f9401067cde"
+
+def _script_directory():
+    # Imported here: alembic is only needed once, during startup
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return ScriptDirectory.from_config(config)
+
+def head_revision() -> Optional[str]:
+    return _script_directory().get_current_head()
+
+def stamp_head(connection: Connection) -> None:
+    """Record the Alembic head as applied, for a schema created from the models."""
+    from alembic.runtime.migration import MigrationContext
+
+    MigrationContext.configure(connection).stamp(_script_directory(), "heads")
+
+def check_schema(engine: Engine, strict: bool = True) -> None:
+    """Compare the database against the Alembic head instead of running ``create_all``.
+
+    An empty database is created from the models and stamped with the head
+    revision. A database at any other revision is refused (or, unless
+    ``strict``, only reported) so that migrations are applied first.
+    """
+    from alembic.runtime.migration import MigrationContext
+
+    head = head_revision()
+    with engine.begin() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+        if current == head:
+            return
+        if current is None and not inspect(connection).get_table_names():
+            logger.info(f"Empty database, creating schema at revision {head}")
+            Base.metadata.create_all(bind=connection)
+            stamp_head(connection)
+            return
+
+    if current is None:
+        # Created with create_all before migrations were tracked, i.e. at the
+        # baseline schema; upgrading needs to know where to start from
+        message = (
+            f"Database has tables but no Alembic revision; the code expects {head}. "
+            f"Run 'alembic stamp {BASELINE_REVISION}' and then 'alembic upgrade head'"
+        )
+    else:
+        message = (
+            f"Database schema is at revision {current} but the code expects {head}; "
+            f"run 'alembic upgrade head'"
+        )
+    if strict:
+        raise RuntimeError(message)
+    logger.warning(message)
+
+def warm_up(app, engine: Engine) -> None:
+    """Do the work that would otherwise land on the first requests after a cold start."""
+    # Resolve relationships and compile mapper state for every model
+    configure_mappers()
+    # Generate and cache the OpenAPI document, which walks every route's schemas
+    app.openapi()
+    # Load the bcrypt backend without paying for a hash
+    from ..auth.utils import pwd_context
+    pwd_context.handler().get_backend()
+    # Open the first pooled connection
+    with engine.connect():
+        pass
@@ -0,0 +1,143 @@
+import contextvars
+import copy
+import enum
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import msgpack  # In requirements.txt; without it every response falls back to JSON
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+# MessagePack as an alternative wire format. Clients opt in per request with
+# ``Accept: application/msgpack`` and may send bodies with that Content-Type.
+# Responses then carry the same fields as the JSON ones, except that datetimes
+# are MessagePack timestamps instead of ISO strings (the schemas only stringify
+# them for JSON). Enum values stay their short string values. Error responses
+# are always JSON.
+
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# The format chosen for the current request, for endpoints that build their own responses
+response_format: contextvars.ContextVar[str] = contextvars.ContextVar("response_format", default="json")
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Stored timestamps are naive UTC
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_encode_default, use_bin_type=True)
+
+def unpackb(data: bytes) -> Any:
+    # Timestamps decode to aware datetimes, which pydantic accepts for datetime fields
+    return msgpack.unpackb(data, raw=False, timestamp=3)
+
+def _media_type(value: Optional[str]) -> str:
+    return (value or "").split(";", 1)[0].strip().lower()
+
+def wants_msgpack(request: Request) -> bool:
+    """Whether the Accept header prefers MessagePack over JSON."""
+    if msgpack is None:
+        return False
+    best_msgpack = best_json = 0.0
+    for part in request.headers.get("accept", "").split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        if media_type in MSGPACK_TYPES:
+            best_msgpack = max(best_msgpack, quality)
+        elif media_type in ("application/json", "application/*", "*/*"):
+            best_json = max(best_json, quality)
+    return best_msgpack > 0 and best_msgpack >= best_json
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+def negotiated_response(content: Any, headers: Optional[Dict[str, str]] = None, status_code: int = 200) -> Response:
+    """A response in the current request's format; ``content`` must come from a
+    ``model_dump`` in the mode given by ``dump_mode()``."""
+    if response_format.get() == "msgpack":
+        return MsgpackResponse(content=content, status_code=status_code, headers=headers)
+    return JSONResponse(content=content, status_code=status_code, headers=headers)
+
+def dump_mode() -> str:
+    return "python" if response_format.get() == "msgpack" else "json"
+
+class MsgpackRequest(Request):
+    """A request with a MessagePack body, decoded where FastAPI reads JSON bodies."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                self._json = unpackb(await self.body())
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid MessagePack body")
+        return self._json
+
+class _PythonModeField:
+    """A response field that serializes in python mode, keeping datetimes for packb."""
+
+    def __init__(self, field):
+        self._field = field
+
+    def __getattr__(self, name):
+        return getattr(self._field, name)
+
+    def serialize(self, value, **kwargs):
+        kwargs["mode"] = "python"
+        return self._field.serialize(value, **kwargs)
+
+class NegotiatedRoute(APIRoute):
+    """Route that answers in MessagePack when asked to and accepts MessagePack bodies."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        json_handler = super().get_route_handler()
+        if msgpack is None:
+            return json_handler
+
+        packed = copy.copy(self)
+        packed.response_class = MsgpackResponse
+        if self.secure_cloned_response_field is not None:
+            packed.secure_cloned_response_field = _PythonModeField(self.secure_cloned_response_field)
+        msgpack_handler = APIRoute.get_route_handler(packed)
+
+        async def handler(request: Request) -> Response:
+            if _media_type(request.headers.get("content-type")) in MSGPACK_TYPES:
+                # FastAPI parses bodies without a declared type with request.json()
+                scope = dict(request.scope)
+                scope["headers"] = [(k, v) for k, v in scope["headers"] if k != b"content-type"]
+                request = MsgpackRequest(scope, request.receive)
+            if not wants_msgpack(request):
+                return await json_handler(request)
+            token = response_format.set("msgpack")
+            try:
+                return await msgpack_handler(request)
+            finally:
+                response_format.reset(token)
+
+        return handler
@@ -0,0 +1,137 @@
+"""Concurrent-move stress check for optimistic concurrency on tasks.
+
+Starts a multi-worker server and has several clients drag cards around the same
+board at once. Every move is a read-modify-write guarded by ``If-Match``; on
+``412`` the client rebases on the task state returned with the conflict and
+retries. Each successful write also stamps a unique marker into the task
+description. Afterwards the board must have:
+
+* no duplicate positions within any column, and
+* no lost updates: every task's description is the marker of the last write
+  acknowledged for it (the acknowledged write with the highest version).
+
+    python -m bench.concurrency --workers 4 --clients 8 --moves 200
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine
+
+from .datagen import Dataset, generate
+from .scenarios import Client
+from .server import serve
+
+class Mover:
+    def __init__(self, port: int, token: str):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        self.token = token
+
+    def call(self, method: str, path: str, body=None, if_match: Optional[str] = None) -> Tuple[int, Dict, Dict]:
+        headers = {"Authorization": f"Bearer {self.token}"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        if if_match:
+            headers["If-Match"] = if_match
+        try:
+            self.conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (ConnectionError, http.client.HTTPException):
+            self.conn.close()
+            return 599, {}, {}
+        return response.status, {"etag": response.getheader("ETag")}, json.loads(data) if data else {}
+
+def run(port: int, ds: Dataset, board_id: int, clients: int, moves: int, seed: int) -> Dict:
+    task_ids = ds.tasks_of_board(board_id)
+    team_id = ds.team_of_board(board_id)
+    members = list(range((team_id - 1) * ds.members_per_team + 1, team_id * ds.members_per_team + 1))
+    acknowledged: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+    stats = Counter()
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        login = Client("127.0.0.1", port, [])
+        login.login(ds, members[index % len(members)])
+        login.close()
+        mover = Mover(port, login.token)
+        for sequence in range(moves):
+            task_id = rng.choice(task_ids)
+            status, headers, task = mover.call("GET", f"/api/tasks/{task_id}")
+            if status != 200:
+                with lock:
+                    stats[f"get_{status}"] += 1
+                continue
+            marker = f"client{index}-move{sequence}"
+            update = {
+                "status": rng.choice(["todo", "in_progress", "done"]),
+                "position": rng.randint(1, max(1, len(task_ids) // 3)),
+                "description": marker,
+            }
+            etag = headers["etag"]
+            for _ in range(10):
+                status, headers, body = mover.call("PUT", f"/api/tasks/{task_id}", body=update, if_match=etag)
+                with lock:
+                    stats[status] += 1
+                if status == 200:
+                    with lock:
+                        acknowledged[task_id].append((body["version"], marker))
+                    break
+                if status != 412:
+                    break
+                # Rebase on the state that won and try again
+                etag = headers["etag"]
+        mover.conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    checker = Client("127.0.0.1", port, [])
+    checker.login(ds, members[0])
+    tasks = checker.request("GET", f"/api/tasks/?board_id={board_id}&limit={len(task_ids)}")
+    checker.close()
+
+    positions = Counter((task["status"], task["position"]) for task in tasks)
+    duplicates = {f"{status}@{position}": count for (status, position), count in positions.items() if count > 1}
+    by_id = {task["id"]: task for task in tasks}
+    lost = [
+        task_id for task_id, writes in acknowledged.items()
+        if by_id[task_id]["description"] != max(writes)[1]
+    ]
+    return {"responses": dict(stats), "duplicate_positions": duplicates, "lost_updates": lost}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check task moves under concurrency")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--moves", type=int, default=100, help="moves per client")
+    parser.add_argument("--tasks-per-board", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=Dataset.seed)
+    args = parser.parse_args()
+
+    ds = Dataset(teams=1, boards_per_team=1, members_per_team=max(1, args.clients),
+                 tasks_per_board=args.tasks_per_board, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        generate(create_engine(database_url), ds)
+        with serve(database_url, workers=args.workers) as port:
+            result = run(port, ds, 1, args.clients, args.moves, args.seed)
+
+    print(json.dumps(result, indent=2))
+    ok = not result["duplicate_positions"] and not result["lost_updates"]
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Deterministic synthetic data generator for the benchmark suite.
+
+The same parameters and seed always produce the same rows (ids, timestamps and
+contents), so results from different commits are measured on identical data.
+Rows are bulk-inserted with Core ``insert()`` executemany in chunks, bypassing
+the ORM unit of work.
+"""
+import argparse
+import random
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+from app import models
+from app.auth.utils import get_password_hash
+from app.utils.startup import stamp_head
+
+BENCH_PASSWORD = "benchmark"
+BASE_TIME = datetime(2024, 1, 1, 9, 0, 0)
+STATUSES = [models.TaskStatus.TODO.value, models.TaskStatus.IN_PROGRESS.value, models.TaskStatus.DONE.value]
+PRIORITIES = [models.TaskPriority.LOW.value, models.TaskPriority.MEDIUM.value, models.TaskPriority.HIGH.value]
+LABEL_COLORS = ["red", "orange", "yellow", "green", "blue", "purple"]
+WORDS = (
+    "api auth board card column deploy design docs fix frontend backend login "
+    "migrate perf query refactor release review schema search sync test ui update"
+).split()
+
+@dataclass
+class Dataset:
+    """Shape of a generated dataset; ids are laid out contiguously from 1."""
+    teams: int = 10
+    boards_per_team: int = 3
+    tasks_per_board: int = 200
+    members_per_team: int = 5
+    labels: int = 30
+    comments_per_task: int = 2
+    attachments_per_task: int = 1
+    checklist_items_per_task: int = 3
+    seed: int = 42
+
+    @property
+    def users(self) -> int:
+        return self.teams * self.members_per_team
+
+    @property
+    def boards(self) -> int:
+        return self.teams * self.boards_per_team
+
+    @property
+    def tasks(self) -> int:
+        return self.boards * self.tasks_per_board
+
+    def username(self, user_id: int) -> str:
+        return f"user{user_id}"
+
+    def team_of_user(self, user_id: int) -> int:
+        return (user_id - 1) // self.members_per_team + 1
+
+    def boards_of_team(self, team_id: int) -> List[int]:
+        first = (team_id - 1) * self.boards_per_team + 1
+        return list(range(first, first + self.boards_per_team))
+
+    def team_of_board(self, board_id: int) -> int:
+        return (board_id - 1) // self.boards_per_team + 1
+
+    def tasks_of_board(self, board_id: int) -> List[int]:
+        first = (board_id - 1) * self.tasks_per_board + 1
+        return list(range(first, first + self.tasks_per_board))
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def _chunked(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _users(ds: Dataset, hashed_password: str):
+    for user_id in range(1, ds.users + 1):
+        yield {
+            "id": user_id,
+            "email": f"{ds.username(user_id)}@bench.example.com",
+            "username": ds.username(user_id),
+            "full_name": f"Bench User {user_id}",
+            "hashed_password": hashed_password,
+            "created_at": BASE_TIME,
+        }
+
+def _teams(ds: Dataset):
+    for team_id in range(1, ds.teams + 1):
+        yield {
+            "id": team_id,
+            "name": f"Team {team_id}",
+            "description": f"Benchmark team {team_id}",
+            "created_by_id": (team_id - 1) * ds.members_per_team + 1,
+            "created_at": BASE_TIME,
+        }
+
+def _team_members(ds: Dataset):
+    for user_id in range(1, ds.users + 1):
+        team_id = ds.team_of_user(user_id)
+        yield {
+            "team_id": team_id,
+            "user_id": user_id,
+            "role": "admin" if (user_id - 1) % ds.members_per_team == 0 else "member",
+            "joined_at": BASE_TIME,
+        }
+
+def _boards(ds: Dataset):
+    for board_id in range(1, ds.boards + 1):
+        team_id = ds.team_of_board(board_id)
+        yield {
+            "id": board_id,
+            "name": f"Board {board_id}",
+            "description": f"Benchmark board {board_id}",
+            "team_id": team_id,
+            "created_by_id": (team_id - 1) * ds.members_per_team + 1,
+            "is_public": board_id % 2 == 0,
+            "created_at": BASE_TIME,
+        }
+
+def _board_members(ds: Dataset):
+    for board_id in range(1, ds.boards + 1):
+        team_id = ds.team_of_board(board_id)
+        first_user = (team_id - 1) * ds.members_per_team + 1
+        for offset in range(ds.members_per_team):
+            yield {
+                "board_id": board_id,
+                "user_id": first_user + offset,
+                "role": "admin" if offset == 0 else "member",
+                "joined_at": BASE_TIME,
+            }
+
+def _labels(ds: Dataset):
+    for label_id in range(1, ds.labels + 1):
+        yield {
+            "id": label_id,
+            "name": f"{WORDS[label_id % len(WORDS)]}-{label_id}",
+            "color": LABEL_COLORS[label_id % len(LABEL_COLORS)],
+        }
+
+def _tasks(ds: Dataset, rng: random.Random):
+    for board_id in range(1, ds.boards + 1):
+        team_id = ds.team_of_board(board_id)
+        first_user = (team_id - 1) * ds.members_per_team + 1
+        positions = {status: 0 for status in STATUSES}
+        for task_id in ds.tasks_of_board(board_id):
+            status = rng.choice(STATUSES)
+            positions[status] += 1
+            checklist = [
+                {"id": item_id, "content": _sentence(rng, 3), "is_completed": rng.random() < 0.5}
+                for item_id in range(1, ds.checklist_items_per_task + 1)
+            ]
+            yield {
+                "id": task_id,
+                "title": _sentence(rng, 4),
+                "description": _sentence(rng, 20),
+                "status": status,
+                "priority": rng.choice(PRIORITIES),
+                "position": positions[status],
+                "due_date": BASE_TIME + timedelta(days=rng.randint(0, 365)) if rng.random() < 0.6 else None,
+                "created_at": BASE_TIME + timedelta(minutes=task_id),
+                "creator_id": first_user + rng.randrange(ds.members_per_team),
+                "board_id": board_id,
+                "is_archived": False,
+                "checklist": checklist,
+            }
+
+def _task_labels(ds: Dataset, rng: random.Random):
+    for task_id in range(1, ds.tasks + 1):
+        for label_id in rng.sample(range(1, ds.labels + 1), k=min(ds.labels, rng.randint(0, 3))):
+            yield {"task_id": task_id, "label_id": label_id}
+
+def _comments(ds: Dataset, rng: random.Random):
+    comment_id = 0
+    for task_id in range(1, ds.tasks + 1):
+        team_id = ds.team_of_board((task_id - 1) // ds.tasks_per_board + 1)
+        first_user = (team_id - 1) * ds.members_per_team + 1
+        for _ in range(ds.comments_per_task):
+            comment_id += 1
+            yield {
+                "id": comment_id,
+                "content": _sentence(rng, 12),
+                "created_at": BASE_TIME + timedelta(minutes=task_id, seconds=comment_id % 60),
+                "task_id": task_id,
+                "user_id": first_user + rng.randrange(ds.members_per_team),
+            }
+
+def _attachments(ds: Dataset):
+    attachment_id = 0
+    for task_id in range(1, ds.tasks + 1):
+        for n in range(ds.attachments_per_task):
+            attachment_id += 1
+            filename = f"bench_{task_id}_{n}.txt"
+            yield {
+                "id": attachment_id,
+                "filename": filename,
+                "file_path": f"uploads/{filename}",
+                "url": f"http://localhost/uploads/{filename}",
+                "created_at": BASE_TIME,
+                "task_id": task_id,
+                "user_id": 1,
+            }
+
+def generate(engine: Engine, ds: Dataset, chunk_size: int = 5000) -> Dict[str, int]:
+    """Create the schema and bulk-insert the dataset. Returns row counts per table."""
+    with engine.begin() as conn:
+        Base.metadata.create_all(bind=conn)
+        # Stamped so the server's schema check accepts the database
+        stamp_head(conn)
+    # Every user shares one hash: bcrypt is deliberately slow and would dominate setup
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    rng = random.Random(ds.seed)
+
+    plan = [
+        (models.User.__table__, _users(ds, hashed_password)),
+        (models.Team.__table__, _teams(ds)),
+        (models.TeamMember.__table__, _team_members(ds)),
+        (models.Board.__table__, _boards(ds)),
+        (models.BoardMember.__table__, _board_members(ds)),
+        (models.Label.__table__, _labels(ds)),
+        (models.Task.__table__, _tasks(ds, rng)),
+        (models.task_labels, _task_labels(ds, rng)),
+        (models.Comment.__table__, _comments(ds, rng)),
+        (models.Attachment.__table__, _attachments(ds)),
+    ]
+    counts = {}
+    with engine.begin() as conn:
+        for table, rows in plan:
+            total = 0
+            for chunk in _chunked(rows, chunk_size):
+                conn.execute(insert(table), chunk)
+                total += len(chunk)
+            counts[table.name] = total
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic benchmark dataset")
+    parser.add_argument("database_url", help="e.g. sqlite:///./bench.db (must be empty)")
+    parser.add_argument("--teams", type=int, default=Dataset.teams)
+    parser.add_argument("--boards-per-team", type=int, default=Dataset.boards_per_team)
+    parser.add_argument("--tasks-per-board", type=int, default=Dataset.tasks_per_board)
+    parser.add_argument("--members-per-team", type=int, default=Dataset.members_per_team)
+    parser.add_argument("--seed", type=int, default=Dataset.seed)
+    args = parser.parse_args()
+
+    ds = Dataset(
+        teams=args.teams,
+        boards_per_team=args.boards_per_team,
+        tasks_per_board=args.tasks_per_board,
+        members_per_team=args.members_per_team,
+        seed=args.seed,
+    )
+    counts = generate(create_engine(args.database_url), ds)
+    for table, count in counts.items():
+        print(f"{table}: {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Multi-process checks for the cross-worker invalidation bus.
+
+The bus check spawns several worker processes sharing one bus directory. Each
+worker publishes one invalidation per round, and every worker must receive each
+message from its peers exactly once. It also reports publish-to-delivery latency.
+
+The server check starts a multi-worker uvicorn with cache lifetimes of an hour,
+so only the bus can explain a fresh read. It joins the bus as one more peer.
+Writes through the tasks, teams and auth routers must be broadcast, and only
+once committed. Reads on every worker must then miss the stale entries:
+
+* removing a team member drops the member's cached membership epoch, so the
+  team role carried in their token stops being honoured everywhere;
+* removing a board member drops the board part of every cached board document.
+
+    python -m bench.invalidation --workers 4 --rounds 200
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+def _worker(index, directory, workers, rounds, ready, start, results):
+    from app.utils.invalidation import InvalidationBus
+
+    received = []
+    bus = InvalidationBus(directory)
+    bus.subscribe("board", lambda key: received.append((key, time.time())))
+    bus.start()
+    ready.wait()
+    start.wait()
+    for round_number in range(rounds):
+        bus.publish("board", f"{index}-{round_number}-{time.time()}")
+        time.sleep(0.001)
+    # Allow in-flight datagrams from slower peers to arrive
+    deadline = time.time() + 5
+    expected = workers * rounds
+    while len(received) < expected and time.time() < deadline:
+        time.sleep(0.01)
+    bus.stop()
+    results.put((index, received))
+
+def check_bus(args) -> bool:
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Barrier(args.workers + 1)
+    start = ctx.Barrier(args.workers + 1)
+    results = ctx.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        processes = [
+            ctx.Process(target=_worker, args=(i, directory, args.workers, args.rounds, ready, start, results))
+            for i in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        ready.wait()
+        # Workers refresh their peer list periodically; make sure all sockets are visible
+        time.sleep(1.1)
+        start.wait()
+        collected = [results.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join()
+
+    ok = True
+    latencies = []
+    for index, received in sorted(collected):
+        keys = [key for key, _ in received]
+        duplicates = len(keys) - len(set(keys))
+        missing = args.workers * args.rounds - len(set(keys))
+        latencies.extend(at - float(key.rsplit("-", 1)[1]) for key, at in received)
+        print(f"worker {index}: received {len(keys)} (missing {missing}, duplicates {duplicates})")
+        ok = ok and missing == 0 and duplicates == 0
+    if latencies:
+        latencies.sort()
+        print(f"delivery latency p50 {statistics.median(latencies) * 1000:.3f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.3f} ms")
+    return ok
+
+def _call(port: int, method: str, path: str, token: Optional[str] = None,
+          body=None, form: Optional[dict] = None) -> Tuple[int, object]:
+    # A new connection per request, so requests spread over the workers
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    payload = None
+    if form is not None:
+        payload = urlencode(form)
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    elif body is not None:
+        payload = json.dumps(body)
+        headers["Content-Type"] = "application/json"
+    try:
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+    finally:
+        conn.close()
+    return response.status, json.loads(data) if data else None
+
+class _Listener:
+    """Joins the bus and records each message with what the database showed on arrival."""
+
+    def __init__(self, directory: str, database: str):
+        from app.utils.invalidation import InvalidationBus
+
+        self.bus = InvalidationBus(directory)
+        self.database = database
+        self.probe: Optional[Callable[[sqlite3.Connection], object]] = None
+        self.received: List[Tuple[str, str, object]] = []
+        self._lock = threading.Lock()
+        for topic in ("board", "team", "membership"):
+            self.bus.subscribe(topic, lambda key, topic=topic: self._record(topic, key))
+
+    def _record(self, topic: str, key: str) -> None:
+        seen = None
+        if self.probe is not None:
+            conn = sqlite3.connect(self.database)
+            try:
+                seen = self.probe(conn)
+            finally:
+                conn.close()
+        with self._lock:
+            self.received.append((topic, key, seen))
+
+    def expect(self, topic: str, key, probe: Callable[[sqlite3.Connection], object], write: Callable[[], int]):
+        """Run ``write``; return its status and what the probe saw when (topic, key) arrived."""
+        with self._lock:
+            self.received.clear()
+        self.probe = probe
+        status = write()
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            with self._lock:
+                for message in self.received:
+                    if message[:2] == (topic, str(key)):
+                        return status, message[2]
+            time.sleep(0.01)
+        return status, None
+
+def check_server(args) -> bool:
+    from sqlalchemy import create_engine
+
+    from .datagen import BENCH_PASSWORD, Dataset, generate
+    from .server import serve
+
+    # user1 administers team 1 and board 1; user2 and user3 are members of both
+    ds = Dataset(teams=1, boards_per_team=1, members_per_team=3, tasks_per_board=5,
+                 comments_per_task=0, attachments_per_task=0)
+    reads = 10 * args.workers
+    ok = True
+
+    def report(name: str, passed: bool, detail: str = "") -> None:
+        nonlocal ok
+        ok = ok and passed
+        print(f"{'ok  ' if passed else 'FAIL'} {name}{': ' + detail if detail else ''}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = str(Path(tmp) / "bench.db")
+        bus_dir = str(Path(tmp) / "bus")
+        generate(create_engine(f"sqlite:///{database}"), ds)
+        env = {
+            "INVALIDATION_BUS_DIR": bus_dir,
+            "MEMBERSHIP_EPOCH_CACHE_SECONDS": "3600",
+            "BOARD_DOCUMENT_BOARD_TTL_SECONDS": "3600",
+            "JOBS_ENABLED": "false",
+            "MAINTENANCE_INTERVAL_HOURS": "0",
+        }
+        with serve(f"sqlite:///{database}", workers=args.workers, env=env) as port:
+            deadline = time.time() + 30
+            while len(list(Path(bus_dir).glob("*.sock"))) < args.workers and time.time() < deadline:
+                time.sleep(0.05)
+            report("workers joined the bus", len(list(Path(bus_dir).glob("*.sock"))) >= args.workers)
+            listener = _Listener(bus_dir, database)
+            listener.bus.start()
+            # Workers pick up new peers when they next refresh their peer list
+            time.sleep(1.1)
+
+            tokens = {}
+            for user_id in (1, 2, 3):
+                status, body = _call(port, "POST", "/api/auth/login",
+                                     form={"username": ds.username(user_id), "password": BENCH_PASSWORD})
+                tokens[user_id] = body["access_token"]
+
+            # Warm every worker's caches: user3's epoch, board 1's document
+            warm = [_call(port, "GET", "/api/teams/1/boards", tokens[3])[0] for _ in range(reads)]
+            warm += [_call(port, "GET", "/api/teams/1/boards/1", tokens[1])[0] for _ in range(reads)]
+            report("warm-up reads", set(warm) == {200}, str(sorted(set(warm))))
+
+            # tasks router
+            task_id = ds.tasks_of_board(1)[0]
+            status, seen = listener.expect(
+                "board", 1,
+                lambda conn: conn.execute("SELECT title FROM tasks WHERE id = ?", (task_id,)).fetchone()[0],
+                lambda: _call(port, "PUT", f"/api/tasks/{task_id}", tokens[1], body={"title": "renamed"})[0],
+            )
+            report("task update broadcast after commit", status == 200 and seen == "renamed", f"saw {seen!r}")
+            titles = {
+                next(task["title"] for task in _call(port, "GET", "/api/tasks/?board_id=1", tokens[1])[1]
+                     if task["id"] == task_id)
+                for _ in range(reads)
+            }
+            report("every worker lists the renamed task", titles == {"renamed"}, str(titles))
+
+            # teams router: board membership
+            status, seen = listener.expect(
+                "board", 1,
+                lambda conn: conn.execute(
+                    "SELECT count(*) FROM board_members WHERE board_id = 1 AND user_id = 2").fetchone()[0],
+                lambda: _call(port, "DELETE", "/api/teams/1/boards/1/members/2", tokens[1])[0],
+            )
+            report("board member removal broadcast after commit", status == 200 and seen == 0, f"saw {seen!r}")
+            stale = sum(
+                any(member["user"]["id"] == 2 for member in _call(port, "GET", "/api/teams/1/boards/1", tokens[1])[1]
+                    ["board_memberships"])
+                for _ in range(reads)
+            )
+            report("every worker drops the board document's memberships", stale == 0,
+                   f"{stale} of {reads} reads stale")
+
+            # teams router: team membership revokes the claims in user3's token
+            status, seen = listener.expect(
+                "membership", 3,
+                lambda conn: conn.execute(
+                    "SELECT count(*) FROM team_members WHERE team_id = 1 AND user_id = 3").fetchone()[0],
+                lambda: _call(port, "DELETE", "/api/teams/1/members/3", tokens[1])[0],
+            )
+            report("team member removal broadcast after commit", status == 200 and seen == 0, f"saw {seen!r}")
+            statuses = [_call(port, "GET", "/api/teams/1/boards", tokens[3])[0] for _ in range(reads)]
+            report("every worker rejects the revoked token", set(statuses) == {403}, str(sorted(set(statuses))))
+
+            # auth router
+            status, seen = listener.expect(
+                "membership", ds.users + 1,
+                lambda conn: conn.execute(
+                    "SELECT count(*) FROM users WHERE id = ?", (ds.users + 1,)).fetchone()[0],
+                lambda: _call(port, "POST", "/api/auth/register", body={
+                    "email": "new@bench.example.com", "username": "newcomer", "password": BENCH_PASSWORD,
+                })[0],
+            )
+            report("registration broadcast after commit", status == 200 and seen == 1, f"saw {seen!r}")
+            listener.bus.stop()
+    return ok
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check invalidation delivery across processes")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--skip-server", action="store_true", help="only check the bus itself")
+    args = parser.parse_args()
+
+    ok = check_bus(args)
+    if not args.skip_server:
+        ok = check_server(args) and ok
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Run the benchmark suite and report per-scenario latency, throughput and query counts.
+
+Usage (from ``backend/``)::
+
+    python -m bench.run --output results.json
+    python -m bench.run --scenarios board_open,drag_storm --compare baseline.json
+    python -m bench.run --scenarios comment_burst --env WRITE_QUEUE_ENABLED=true
+
+Every run generates a fresh database from the same seed, so results stored as
+JSON can be compared across commits.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+
+from .datagen import Dataset, generate
+from .scenarios import SCENARIOS, Sample, run_scenario
+from .server import BACKEND_DIR, serve
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample.status >= 400),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "queries_total": sum(queries) if queries else None,
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_report(report: Dict, baseline: Dict = None) -> None:
+    print(f"commit {report['commit']}  dataset {report['dataset']}")
+    header = f"{'scenario':<15}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}{'errors':>8}"
+    print(header)
+    for name, result in report["scenarios"].items():
+        line = (
+            f"{name:<15}{result['throughput_rps']:>10}{result['p50_ms']:>10}"
+            f"{result['p95_ms']:>10}{result['p99_ms']:>10}"
+            f"{str(result['queries_per_request']):>8}{result['errors']:>8}"
+        )
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous and previous["p95_ms"]:
+            change = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"   p95 {change:+.1f}% vs {baseline['commit']}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Kanban backend load-test harness")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--operations", type=int, default=500, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--teams", type=int, default=Dataset.teams)
+    parser.add_argument("--boards-per-team", type=int, default=Dataset.boards_per_team)
+    parser.add_argument("--tasks-per-board", type=int, default=Dataset.tasks_per_board)
+    parser.add_argument("--members-per-team", type=int, default=Dataset.members_per_team)
+    parser.add_argument("--seed", type=int, default=Dataset.seed)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra server setting, e.g. WRITE_QUEUE_ENABLED=true (repeatable)")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="previous JSON report to compare against")
+    args = parser.parse_args()
+    server_env = dict(item.split("=", 1) for item in args.env)
+
+    ds = Dataset(
+        teams=args.teams,
+        boards_per_team=args.boards_per_team,
+        tasks_per_board=args.tasks_per_board,
+        members_per_team=args.members_per_team,
+        seed=args.seed,
+    )
+    report = {
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "dataset": ds.to_dict(),
+        "operations": args.operations,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "env": server_env,
+        "scenarios": {},
+    }
+
+    for name in args.scenarios.split(","):
+        # Each scenario gets a fresh copy of the data so writes do not skew later runs
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+            generate(create_engine(database_url), ds)
+            with serve(database_url, workers=args.workers, env=server_env) as port:
+                start = time.perf_counter()
+                samples = run_scenario(name, ds, "127.0.0.1", port, args.concurrency, args.operations, args.seed)
+                report["scenarios"][name] = summarize(samples, time.perf_counter() - start)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(report, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Scripted workload scenarios run against a live server.
+
+Each scenario is a function ``(client, ds, rng) -> None`` that issues one logical
+operation; the runner calls it repeatedly from several worker threads and records
+latency, status and the ``X-Query-Count`` header of every request.
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+from .datagen import BENCH_PASSWORD, Dataset
+
+class Sample:
+    __slots__ = ("latency", "status", "queries")
+
+    def __init__(self, latency: float, status: int, queries: Optional[int]):
+        self.latency = latency
+        self.status = status
+        self.queries = queries
+
+class Client:
+    """Keep-alive HTTP client for one worker thread, logged in as one bench user."""
+
+    def __init__(self, host: str, port: int, samples: List[Sample]):
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+        self.samples = samples
+        self.token: Optional[str] = None
+        self.user_id: Optional[int] = None
+
+    def request(self, method: str, path: str, body=None, form: Optional[dict] = None) -> Dict:
+        headers = {}
+        payload = None
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if form is not None:
+            payload = urlencode(form)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+
+        start = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (ConnectionError, http.client.HTTPException):
+            # The server dropped the connection (e.g. an unhandled error); count it and reconnect
+            self.samples.append(Sample(time.perf_counter() - start, 599, None))
+            self.conn.close()
+            return {}
+        latency = time.perf_counter() - start
+
+        queries = response.getheader("X-Query-Count")
+        self.samples.append(Sample(latency, response.status, int(queries) if queries else None))
+        if response.status >= 400 or not data:
+            return {}
+        return json.loads(data)
+
+    def login(self, ds: Dataset, user_id: int) -> None:
+        self.token = None
+        result = self.request(
+            "POST", "/api/auth/login",
+            form={"username": ds.username(user_id), "password": BENCH_PASSWORD},
+        )
+        self.token = result.get("access_token")
+        self.user_id = user_id
+
+    def close(self) -> None:
+        self.conn.close()
+
+def _random_board(client: Client, ds: Dataset, rng: random.Random) -> int:
+    return rng.choice(ds.boards_of_team(ds.team_of_user(client.user_id)))
+
+def board_open(client: Client, ds: Dataset, rng: random.Random) -> None:
+    """Open a board: board metadata followed by its task list."""
+    board_id = _random_board(client, ds, rng)
+    team_id = ds.team_of_board(board_id)
+    client.request("GET", f"/api/teams/{team_id}/boards/{board_id}")
+    client.request("GET", f"/api/tasks/?board_id={board_id}&limit={ds.tasks_per_board}")
+
+def drag_storm(client: Client, ds: Dataset, rng: random.Random) -> None:
+    """Move a random card to a random column and position."""
+    board_id = _random_board(client, ds, rng)
+    task_id = rng.choice(ds.tasks_of_board(board_id))
+    client.request("PUT", f"/api/tasks/{task_id}", body={
+        "status": rng.choice(["todo", "in_progress", "done"]),
+        "position": rng.randint(1, max(1, ds.tasks_per_board // 3)),
+    })
+
+def comment_burst(client: Client, ds: Dataset, rng: random.Random) -> None:
+    """Post a comment on a random card."""
+    board_id = _random_board(client, ds, rng)
+    task_id = rng.choice(ds.tasks_of_board(board_id))
+    client.request("POST", f"/api/tasks/{task_id}/comments/", body={
+        "content": f"bench comment {rng.random():.6f}",
+        "task_id": task_id,
+    })
+
+def checklist_toggle(client: Client, ds: Dataset, rng: random.Random) -> None:
+    """Tick or untick a random checklist item on a random card."""
+    board_id = _random_board(client, ds, rng)
+    task_id = rng.choice(ds.tasks_of_board(board_id))
+    item_id = rng.randint(1, ds.checklist_items_per_task)
+    client.request("PUT", f"/api/tasks/{task_id}/checklist/{item_id}/toggle/")
+
+def login_storm(client: Client, ds: Dataset, rng: random.Random) -> None:
+    """Log in as a random user."""
+    client.login(ds, rng.randint(1, ds.users))
+
+SCENARIOS: Dict[str, Callable[[Client, Dataset, random.Random], None]] = {
+    "board_open": board_open,
+    "drag_storm": drag_storm,
+    "comment_burst": comment_burst,
+    "checklist_toggle": checklist_toggle,
+    "login_storm": login_storm,
+}
+
+def run_scenario(
+    name: str,
+    ds: Dataset,
+    host: str,
+    port: int,
+    concurrency: int,
+    operations: int,
+    seed: int,
+) -> List[Sample]:
+    """Run ``operations`` iterations of a scenario split across ``concurrency`` workers.
+
+    Logins performed to set up each worker are not included in the samples.
+    """
+    scenario = SCENARIOS[name]
+    per_worker = [operations // concurrency + (1 if i < operations % concurrency else 0) for i in range(concurrency)]
+    results: List[List[Sample]] = [[] for _ in range(concurrency)]
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        setup: List[Sample] = []
+        client = Client(host, port, setup)
+        try:
+            client.login(ds, rng.randint(1, ds.users))
+            client.samples = results[index]
+            for _ in range(per_worker[index]):
+                scenario(client, ds, rng)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [sample for worker_samples in results for sample in worker_samples]
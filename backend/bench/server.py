@@ -0,0 +1,69 @@
+"""Launch a local uvicorn server for benchmarking."""
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_ready(port: int, timeout: float = 30.0) -> float:
+    """Poll the OpenAPI endpoint until the server answers; returns the elapsed seconds."""
+    start = time.perf_counter()
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1):
+                return time.perf_counter() - start
+        except OSError:
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+            time.sleep(0.02)
+
+@contextlib.contextmanager
+def serve(
+    database_url: str,
+    port: Optional[int] = None,
+    workers: int = 1,
+    env: Optional[Dict[str, str]] = None,
+) -> Iterator[int]:
+    """Run ``uvicorn app.main:app`` against ``database_url`` and yield its port."""
+    port = port or free_port()
+    server_env = dict(os.environ)
+    server_env.update({
+        "DATABASE_URL": database_url,
+        "QUERY_COUNT_HEADER": "true",
+        # Storm scenarios would otherwise measure the rate limiter
+        "RATE_LIMIT_ENABLED": "false",
+        # An unplanned lazy load fails the run instead of skewing query counts
+        "STRICT_LOADING": "true",
+    })
+    server_env.update(env or {})
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=server_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(port)
+        yield port
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -0,0 +1,82 @@
+"""Cold-start benchmark: how long a fresh process takes to serve its first requests.
+
+Models scale-to-zero deployments, where every new instance pays for importing
+the application, running the startup lifespan and answering its first requests.
+Each run spawns a new server process and records:
+
+* ``import_ms``: importing ``app.main`` in a bare interpreter
+* ``ready_ms``: from spawning uvicorn to the first successful response
+* ``first_login_ms`` / ``first_board_open_ms``: the first requests of the process
+* ``warm_board_open_ms``: the same board open repeated, for comparison
+
+    python -m bench.startup --runs 5
+"""
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+
+from .datagen import Dataset, generate
+from .scenarios import Client, board_open
+from .server import BACKEND_DIR, serve
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+def measure_import() -> float:
+    output = subprocess.check_output(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+    )
+    return float(output.strip().splitlines()[-1]) * 1000
+
+def measure_start(database_url: str, ds: Dataset, seed: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    with serve(database_url) as port:
+        ready = time.perf_counter() - start
+        client = Client("127.0.0.1", port, [])
+        client.login(ds, 1)
+        rng = random.Random(seed)
+        board_open(client, ds, rng)
+        rng = random.Random(seed)
+        board_open(client, ds, rng)
+        client.close()
+    login, first_board, first_tasks, warm_board, warm_tasks = (sample.latency * 1000 for sample in client.samples)
+    return {
+        "ready_ms": ready * 1000,
+        "first_login_ms": login,
+        "first_board_open_ms": first_board + first_tasks,
+        "warm_board_open_ms": warm_board + warm_tasks,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=Dataset.seed)
+    parser.add_argument("--output", type=Path, help="write the JSON results here")
+    args = parser.parse_args()
+
+    ds = Dataset(teams=2, seed=args.seed)
+    runs: List[Dict[str, float]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        generate(create_engine(database_url), ds)
+        for _ in range(args.runs):
+            result = measure_start(database_url, ds, args.seed)
+            result["import_ms"] = measure_import()
+            runs.append(result)
+
+    summary = {name: round(statistics.median(run[name] for run in runs), 2) for name in runs[0]}
+    for name, value in summary.items():
+        print(f"{name:<22}{value:>10}")
+    if args.output:
+        args.output.write_text(json.dumps({"runs": runs, "median": summary}, indent=2))
+
+if __name__ == "__main__":
+    main()
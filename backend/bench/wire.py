@@ -0,0 +1,83 @@
+"""Wire-format benchmark: JSON versus MessagePack for large board payloads.
+
+Loads the task list of one board (1,000 tasks by default) the way ``GET
+/api/tasks/`` returns it and, for each format, measures the server-side encode
+(the schema dump in that format's mode plus rendering the body), the body size
+raw and gzipped, and the time a client needs to decode it.
+
+    python -m bench.wire --tasks 1000 --repeat 20
+"""
+import argparse
+import gzip
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.utils.wire import MsgpackResponse, msgpack, unpackb
+
+from .datagen import Dataset, generate
+
+def _timed(fn: Callable[[], object], repeat: int) -> float:
+    """Median wall time of ``fn`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def measure(tasks: List[schemas.Task], repeat: int) -> Dict[str, Dict[str, float]]:
+    adapter = TypeAdapter(List[schemas.Task])
+    formats = {
+        "json": ("json", lambda content: JSONResponse(content).body, json.loads),
+        "msgpack": ("python", lambda content: MsgpackResponse(content).body, unpackb),
+    }
+    results = {}
+    for name, (mode, render, decode) in formats.items():
+        body = render(adapter.dump_python(tasks, mode=mode))
+        results[name] = {
+            "encode_ms": _timed(lambda: render(adapter.dump_python(tasks, mode=mode)), repeat),
+            "decode_ms": _timed(lambda: decode(body), repeat),
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body)),
+        }
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare JSON and MessagePack response encoding")
+    parser.add_argument("--tasks", type=int, default=1000, help="tasks on the measured board")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    if msgpack is None:
+        print("msgpack is not installed")
+        return 1
+
+    ds = Dataset(teams=1, boards_per_team=1, members_per_team=2, tasks_per_board=args.tasks)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        generate(engine, ds)
+        with Session(engine) as db:
+            rows = db.query(models.Task).filter(models.Task.board_id == 1).order_by(models.Task.position).all()
+            # Validate once (this loads every relationship) so only encoding is timed
+            tasks = TypeAdapter(List[schemas.Task]).validate_python(rows)
+        engine.dispose()
+
+    results = measure(tasks, args.repeat)
+    print(f"{len(tasks)} tasks, median of {args.repeat} runs")
+    print(f"{'format':<10}{'encode ms':>12}{'decode ms':>12}{'bytes':>12}{'gzip bytes':>12}")
+    for name, row in results.items():
+        print(f"{name:<10}{row['encode_ms']:>12.2f}{row['decode_ms']:>12.2f}{row['bytes']:>12}{row['gzip_bytes']:>12}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
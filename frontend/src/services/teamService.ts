@@ -6,7 +6,10 @@ export interface Team {
   description?: string;
   created_at: string;
   created_by_id: number;
-  team_memberships: TeamMember[];
+  // Only present on single-team responses; listings carry member_count instead
+  team_memberships?: TeamMember[];
+  member_count?: number;
+  current_user_role?: 'admin' | 'member';
   created_by: User;
 }
 
@@ -65,6 +68,14 @@ export const teamService = {
     return response.data;
   },
 
+  // Get one page of a team's members, ordered by user id
+  getTeamMembers: async (teamId: number, afterUserId?: number, limit = 50): Promise<TeamMember[]> => {
+    const response = await api.get(`/teams/${teamId}/members`, {
+      params: { after_user_id: afterUserId, limit },
+    });
+    return response.data;
+  },
+
   // Get a specific team by ID
   getTeam: async (teamId: number): Promise<Team> => {
     const response = await api.get(`/teams/${teamId}`);